@@ -0,0 +1,76 @@
+"""
+Benchmark: grabs per second and per-grab latency of the per-call capture
+functions (new mss instance / GDI objects every grab) vs a long-lived
+CaptureBackend. With a window-capable backend (Win32, or X11 incl. Xvfb) the
+focused window is grabbed as well as the full screen. Needs a display.
+
+Usage:
+    python scripts/bench_capture.py [--grabs 100] [--window 0] [--backend x11]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Make the src package importable when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.capture import grab_screen, grab_window
+from src.capture_backend import create_capture_backend
+
+
+def time_grabs(fn, grabs):
+    """Call fn() `grabs` times (releasing each frame); return latencies in ms."""
+    fn().release()  # Warm up
+    latencies = []
+    for _ in range(grabs):
+        start = time.perf_counter()
+        frame = fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+        frame.release()
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    per_second = 1000 / statistics.mean(latencies)
+    print(f"  {name:<24} {per_second:8.1f} grabs/s   p50 {statistics.median(latencies):7.2f} ms   "
+          f"p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--grabs', type=int, default=100)
+    parser.add_argument('--window', type=int, default=0,
+                        help="HWND/XID to grab (default: the focused window)")
+    parser.add_argument('--backend', default=None, help="win32, x11 or screen (default: auto)")
+    args = parser.parse_args()
+
+    try:
+        backend = create_capture_backend(args.backend).open()
+        backend.grab_screen().release()
+    except Exception as e:
+        print(f"Cannot open a screen grabber (no display?): {e}")
+        return 1
+
+    with backend:
+        print(f"Full screen, {args.grabs} grabs:")
+        report("capture.grab_screen", time_grabs(grab_screen, args.grabs))
+        report("CaptureBackend", time_grabs(backend.grab_screen, args.grabs))
+
+        window = args.window or backend.get_foreground_window()
+        if backend.supports_windows and window:
+            print(f"\nWindow {window} ({backend.get_window_title(window)!r}), {args.grabs} grabs:")
+            report("capture.grab_window", time_grabs(lambda: grab_window(window), args.grabs))
+            report(f"CaptureBackend ({backend.name})",
+                   time_grabs(lambda: backend.grab_window(window), args.grabs))
+
+        print(f"\nBackend stats: {backend.get_stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Benchmark: screenshot size and encode time per format.
+Renders synthetic terminal frames and encodes them as uncompressed BMP (what
+window captures used to be written as), PNG at several zlib levels, lossless
+WebP and QOI, then reports bytes per frame, encode latency, and the wall time
+of a whole batch through the background FrameWriter pool.
+
+Usage:
+    python scripts/bench_encoder.py [--frames 10] [--width 1280] [--height 720] [--workers 2]
+"""
+
+import argparse
+import io
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+# Make the src package importable when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.encoder import ImageEncoder, QOI_AVAILABLE, WEBP_AVAILABLE
+from src.frame import Frame
+from src.frame_writer import FrameWriter
+
+COMMANDS = [
+    "git status", "git log --oneline -5", "pip install -r requirements.txt",
+    "npm run build", "docker compose up -d", "python -m pytest -q",
+    "cd src/components", "ls -la", "cargo build --release", "kubectl get pods",
+]
+
+
+def make_frame(width, height, seed):
+    """Render a dark terminal frame as a BGRA Frame (like a window grab)."""
+    rng = random.Random(seed)
+    img = Image.new('RGB', (width, height), color=(12, 12, 12))
+    draw = ImageDraw.Draw(img)
+    for y in range(6, height - 20, 20):
+        draw.text((8, y), f"user@build:~/project$ {rng.choice(COMMANDS)}", fill=(204, 204, 204))
+    return Frame(img.convert('RGBA').tobytes('raw', 'BGRA'), width, height, 'BGRA')
+
+
+def bmp_bytes(frame):
+    buffer = io.BytesIO()
+    frame.to_image().save(buffer, format='BMP')
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=10)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    frames = [make_frame(args.width, args.height, seed) for seed in range(args.frames)]
+
+    encoders = [ImageEncoder('png', compress_level=level) for level in (1, 6, 9)]
+    if WEBP_AVAILABLE:
+        encoders += [ImageEncoder('webp', webp_method=0), ImageEncoder('webp', webp_method=4)]
+    if QOI_AVAILABLE:
+        encoders.append(ImageEncoder('qoi'))
+
+    print(f"{args.frames} frames of {args.width}x{args.height}:")
+    print(f"  {'format':<28} {'KiB/frame':>10} {'ratio':>7} {'encode p50':>11}")
+    baseline = statistics.mean(len(bmp_bytes(frame)) for frame in frames)
+    print(f"  {'bmp (uncompressed)':<28} {baseline / 1024:10.1f} {1.0:7.2f} {'-':>11}")
+    for encoder in encoders:
+        sizes = []
+        latencies = []
+        for frame in frames:
+            start = time.perf_counter()
+            sizes.append(len(encoder.encode_bytes(frame)))
+            latencies.append((time.perf_counter() - start) * 1000)
+        size = statistics.mean(sizes)
+        print(f"  {encoder.describe():<28} {size / 1024:10.1f} {baseline / size:7.2f} "
+              f"{statistics.median(latencies):8.1f} ms")
+
+    print(f"\nBatch through FrameWriter ({args.workers} encoder threads):")
+    with tempfile.TemporaryDirectory() as tmp:
+        for encoder in encoders:
+            writer = FrameWriter(encoder=encoder, workers=args.workers)
+            start = time.perf_counter()
+            for i, frame in enumerate(frames):
+                writer.submit(frame, str(Path(tmp) / f"{encoder.format}_{i}{encoder.extension}"))
+            writer.stop()
+            elapsed = time.perf_counter() - start
+            print(f"  {encoder.describe():<28} {args.frames / elapsed:8.1f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: per-call OCR latency of pytesseract vs the persistent OcrEngine.
+Renders a synthetic terminal screenshot and OCRs it repeatedly with both paths.
+
+Usage:
+    python scripts/bench_ocr_engine.py [--calls 20] [--width 1280] [--height 360]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+# Make the src package importable when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytesseract
+from src.ocr_engine import OcrEngine, TESSEROCR_AVAILABLE
+
+
+def make_terminal_image(width, height):
+    """Render a black-on-white terminal-like image with a few prompt lines."""
+    img = Image.new('RGB', (width, height), color='white')
+    draw = ImageDraw.Draw(img)
+    lines = [
+        "Microsoft Windows [Version 10.0.22631.4460]",
+        "C:\\Users\\dev\\project> git status",
+        "On branch main, nothing to commit",
+        "C:\\Users\\dev\\project> pip install -r requirements.txt",
+        "C:\\Users\\dev\\project> python main.py",
+    ]
+    for i, line in enumerate(lines):
+        draw.text((10, 10 + i * 24), line, fill='black')
+    return img
+
+
+def time_calls(fn, img, calls):
+    """Run fn(img) `calls` times and return per-call latencies in ms."""
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn(img)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"  {name:<24} mean {statistics.mean(latencies):8.1f} ms   "
+          f"p50 {statistics.median(latencies):8.1f} ms   p95 {p95:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=360)
+    args = parser.parse_args()
+
+    img = make_terminal_image(args.width, args.height)
+
+    try:
+        print(f"Tesseract version: {pytesseract.get_tesseract_version()}")
+    except Exception as e:
+        print(f"✗ Tesseract not available: {e}")
+        sys.exit(1)
+
+    print(f"tesserocr available: {TESSEROCR_AVAILABLE}")
+    print(f"Image: {args.width}x{args.height}, {args.calls} calls per path\n")
+
+    # Before: one tesseract process per call
+    baseline = time_calls(pytesseract.image_to_string, img, args.calls)
+    report("pytesseract (per call)", baseline)
+
+    # After: one engine for all calls (first call warms it up)
+    engine = OcrEngine()
+    engine.image_to_string(img)
+    persistent = time_calls(engine.image_to_string, img, args.calls)
+    report(f"OcrEngine ({engine.backend})", persistent)
+
+    speedup = statistics.mean(baseline) / max(statistics.mean(persistent), 1e-9)
+    print(f"\nSpeedup: {speedup:.2f}x")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
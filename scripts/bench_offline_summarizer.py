@@ -0,0 +1,56 @@
+"""
+Benchmark: offline (rule-based) documentation generation.
+Documents synthetic sessions of mixed commands and reports time per document
+and per step.
+
+Usage:
+    python scripts/bench_offline_summarizer.py [--steps 50 500 5000] [--repeat 20]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Make the src package importable when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.summarizers import OfflineSummarizer
+
+COMMANDS = [
+    "git status", "git add -A", 'git commit -m "Fix the login form"', "git push -u origin main",
+    "cd services/api", "ls -la", "python -m pip install -r requirements.txt", "pytest -q -x",
+    "npm ci", "npm run build", "docker build -t api:dev .", "docker run --rm -p 8080:80 api:dev",
+    "kubectl get pods -n staging", "cat .env | grep DATABASE", "make -j8", "Command captured",
+    "./deploy.sh --dry-run",
+]
+
+
+def make_steps(count, rng):
+    start = datetime(2025, 1, 1, 9, 0, 0)
+    return [(rng.choice(COMMANDS), start + timedelta(seconds=i * 7), None) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    summarizer = OfflineSummarizer()
+    print(f"{'steps':>7} {'ms/doc':>10} {'us/step':>10} {'KB/doc':>8}")
+    for count in args.steps:
+        steps = make_steps(count, rng)
+        body = summarizer.summarize(steps)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            summarizer.summarize(steps)
+        elapsed = (time.perf_counter() - started) / args.repeat
+        print(f"{count:>7} {elapsed * 1000:>10.2f} {elapsed / count * 1e6:>10.1f} {len(body) / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: prompt grammar command extraction vs the old '>'/'$' split parser.
+Reports accuracy on the prompt corpus (tests/data/prompt_corpus.json) and
+parse throughput on large synthetic OCR dumps.
+
+Usage:
+    python scripts/bench_prompt_grammar.py [--dumps 200] [--lines 200]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# Make the src package importable when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.capture import _parse_command_from_text
+
+CORPUS_PATH = Path(__file__).parent.parent / "tests" / "data" / "prompt_corpus.json"
+
+OUTPUT_LINES = [
+    "Compiling module 12 of 40", "   Volume Serial Number is 1234-ABCD",
+    "drwxr-xr-x  5 dev dev 4096 Nov  9 22:45 src", "Total $5 charged",
+    "100 % done", "added 1402 packages in 12s", "> app@1.0.0 build",
+]
+PROMPTS = [
+    "C:\\Users\\dev>{}", "PS C:\\src\\app> {}", "dev@box:~/project$ {}",
+    "dev@mac ~/proj % {}", "dev@box ~/code> {}", "(venv) dev@box:~/api$ {}",
+]
+COMMANDS = ["git status", "npm run build", "python -m pytest -q", "ls -la", "make -j8"]
+
+
+def legacy_parse(text):
+    """The parser used before prompt grammars (kept here as the baseline)."""
+    if not text:
+        return None
+    lines = text.split('\n')
+    for line in reversed(lines):
+        line = line.strip()
+        if line and not line.startswith('Microsoft') and len(line) > 3:
+            if '>' in line:
+                parts = line.split('>', 1)
+                if len(parts) > 1:
+                    command = parts[1].strip()
+                    if command:
+                        return command
+            elif '$' in line:
+                parts = line.split('$', 1)
+                if len(parts) > 1:
+                    command = parts[1].strip()
+                    if command:
+                        return command
+            if line and not line.startswith('PS') and ' ' in line:
+                return line
+    for line in lines:
+        line = line.strip()
+        if line and len(line) > 3:
+            return line
+    return None
+
+
+def make_dump(lines, seed):
+    """A long OCR dump: output lines with a prompt line near the bottom."""
+    rng = random.Random(seed)
+    body = [rng.choice(OUTPUT_LINES) for _ in range(lines)]
+    body[-rng.randint(1, 3)] = rng.choice(PROMPTS).format(rng.choice(COMMANDS))
+    return '\n'.join(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dumps", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = json.loads(CORPUS_PATH.read_text(encoding="utf-8"))
+    parsers = {
+        "legacy": lambda text, title: legacy_parse(text),
+        "grammar": _parse_command_from_text,
+    }
+
+    print(f"Accuracy on {len(corpus)} corpus cases:")
+    for name, parse in parsers.items():
+        correct = sum(parse(c["text"], c["window_title"]) == c["expected"] for c in corpus)
+        print(f"  {name:8s} {correct}/{len(corpus)} ({correct / len(corpus):.0%})")
+
+    dumps = [make_dump(args.lines, seed) for seed in range(args.dumps)]
+    total_lines = args.dumps * args.lines
+    print(f"\nThroughput on {args.dumps} dumps x {args.lines} lines:")
+    for name, parse in parsers.items():
+        start = time.perf_counter()
+        for dump in dumps:
+            parse(dump, None)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:8s} {elapsed * 1000:8.1f} ms  ({total_lines / elapsed / 1e6:.2f} M lines/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import logging
 import time
 import pytesseract
 from PIL import Image
@@ -18,6 +19,26 @@ if sys.platform == 'win32':
 else:
     WIN32_AVAILABLE = False
 
+try:
+    from .ocr_engine import get_ocr_engine
+    from .ocr_cache import get_ocr_cache
+    from .delta_ocr import get_delta_ocr, segment_line_bands, to_grayscale_array
+    from .preprocess import get_preprocess_config, preprocess_image
+    from .frame import Frame
+    from .prompt_grammar import get_prompt_registry
+    from .capture_backend import X11CaptureBackend, enable_dpi_awareness, screen_area_for_rect
+except ImportError:
+    # Imported as a top-level module (e.g. from main.py)
+    from ocr_engine import get_ocr_engine
+    from ocr_cache import get_ocr_cache
+    from delta_ocr import get_delta_ocr, segment_line_bands, to_grayscale_array
+    from preprocess import get_preprocess_config, preprocess_image
+    from frame import Frame
+    from prompt_grammar import get_prompt_registry
+    from capture_backend import X11CaptureBackend, enable_dpi_awareness, screen_area_for_rect
+
+logger = logging.getLogger(__name__)
+
 # Configure Tesseract path for Windows if not in PATH
 if os.name == 'nt':  # Windows
     tesseract_paths = [
@@ -30,50 +51,178 @@ if os.name == 'nt':  # Windows
             break
 
 
-def capture_screen(screenshot_path="screenshot.png"):
-    """Take a screenshot and save it."""
+def grab_screen(window_rect=None):
+    """
+    Grab the primary monitor into memory, or just a window's area of the screen.
+    
+    Args:
+        window_rect: Optional (left, top, right, bottom) in screen pixels; only
+                     its part on the monitor showing most of it is grabbed
+    
+    Returns:
+        Frame holding the raw BGRA pixels
+    """
     with mss.mss() as sct:
-        monitor = sct.monitors[1]
-        sct_img = sct.grab(monitor)
-        img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
-        img.save(screenshot_path)
+        if window_rect:
+            area = screen_area_for_rect(sct.monitors, window_rect)
+        else:
+            area = sct.monitors[1]
+        sct_img = sct.grab(area)
+        frame = Frame(bytes(sct_img.raw), sct_img.width, sct_img.height, 'BGRA')
+    if window_rect:
+        left, top, right, bottom = window_rect
+        frame.offset = (max(0, area['left'] - left), max(0, area['top'] - top))
+        frame.window_size = (right - left, bottom - top)
+    return frame
+
+
+def save_frame(frame, screenshot_path):
+    """
+    Encode a frame and write it to disk (format chosen by file extension).
+    
+    Args:
+        frame: Frame to save
+        screenshot_path: Destination path
+    
+    Returns:
+        Path to saved screenshot
+    """
+    from pathlib import Path
+    Path(screenshot_path).parent.mkdir(parents=True, exist_ok=True)
+    frame.to_image().save(screenshot_path)
     return screenshot_path
 
 
-def extract_text_from_image(image_path, region=None):
+def capture_screen(screenshot_path="screenshot.png"):
+    """Take a screenshot and save it."""
+    return save_frame(grab_screen(), screenshot_path)
+
+
+def open_image(image):
     """
-    Run OCR on the image, optionally on a specific region.
+    Decode an image once so it can be shared by several OCR passes.
     
     Args:
-        image_path: Path to image file
+        image: Path to an image file, a captured Frame, a PIL Image, or a
+               NumPy frame buffer (H x W x channels)
+    
+    Returns:
+        Decoded PIL Image or NumPy array (already-decoded inputs are returned as-is)
+    """
+    if isinstance(image, (str, os.PathLike)):
+        # Decode now and release the file handle (screenshots may be moved later)
+        with Image.open(image) as img:
+            img.load()
+        return img
+    if isinstance(image, Frame):
+        return image.to_image()
+    return image
+
+
+def _image_size(img):
+    """Return (width, height) of a PIL Image or NumPy frame buffer."""
+    if isinstance(img, Image.Image):
+        return img.width, img.height
+    return img.shape[1], img.shape[0]
+
+
+def crop_region(img, region):
+    """
+    Crop a decoded image to a region, clamped to the image bounds.
+    NumPy frame buffers are sliced, so the crop is a view with no pixel copy.
+    
+    Args:
+        img: Decoded PIL Image or NumPy array
+        region: Optional dict with keys: x, y, width, height
+    
+    Returns:
+        Cropped image (or the original image if region is empty/invalid)
+    """
+    if not region:
+        return img
+    
+    img_width, img_height = _image_size(img)
+    x = region.get('x', 0)
+    y = region.get('y', 0)
+    width = region.get('width', img_width)
+    height = region.get('height', img_height)
+    
+    # Ensure region is within image bounds
+    x = max(0, min(x, img_width - 1))
+    y = max(0, min(y, img_height - 1))
+    width = min(width, img_width - x)
+    height = min(height, img_height - y)
+    
+    if width <= 0 or height <= 0:
+        return img
+    
+    if isinstance(img, Image.Image):
+        return img.crop((x, y, x + width, y + height))
+    return img[y:y + height, x:x + width]
+
+
+def extract_text_from_frame(img, region=None):
+    """
+    Run OCR on an already-decoded image, optionally on a specific region.
+    
+    Args:
+        img: Decoded PIL Image or NumPy frame buffer (see open_image)
         region: Optional dict with keys: x, y, width, height
                 If provided, only OCR this region of the image
     
     Returns:
         Extracted text string
     """
-    img = Image.open(image_path)
+    img = crop_region(img, region)
+    if not isinstance(img, Image.Image):
+        img = Image.fromarray(img)
     
-    # Crop to region if specified
-    if region:
-        x = region.get('x', 0)
-        y = region.get('y', 0)
-        width = region.get('width', img.width)
-        height = region.get('height', img.height)
-        
-        # Ensure region is within image bounds
-        x = max(0, min(x, img.width - 1))
-        y = max(0, min(y, img.height - 1))
-        width = min(width, img.width - x)
-        height = min(height, img.height - y)
-        
-        if width > 0 and height > 0:
-            img = img.crop((x, y, x + width, y + height))
+    return ocr_image(img)
+
+
+def ocr_image(img, psm=None):
+    """
+    OCR a PIL image through the content-hash cache.
+    Identical pixels with identical settings never reach tesseract twice.
+    On a miss the image goes through the preprocessing stage (if enabled) first.
     
-    text = pytesseract.image_to_string(img)
+    Args:
+        img: PIL Image (already cropped)
+        psm: Optional Tesseract page segmentation mode
+    
+    Returns:
+        Extracted text string
+    """
+    engine = get_ocr_engine()
+    cache = get_ocr_cache()
+    preprocess = get_preprocess_config()
+    preprocess_tag = preprocess.cache_tag() if preprocess else "none"
+    key = cache.make_key(img, f"lang={engine.lang};psm={psm};pre={preprocess_tag}")
+    
+    text = cache.get(key)
+    if text is None:
+        if preprocess:
+            img = preprocess_image(img, preprocess)
+        text = engine.image_to_string(img, psm=psm)
+        cache.put(key, text)
     return text
 
 
+def extract_text_from_image(image_path, region=None):
+    """
+    Run OCR on the image, optionally on a specific region.
+    
+    Args:
+        image_path: Path to image file
+        region: Optional dict with keys: x, y, width, height
+                If provided, only OCR this region of the image
+    
+    Returns:
+        Extracted text string
+    """
+    return extract_text_from_frame(open_image(image_path), region=region)
+
+
 def extract_text_from_region(image_path, region):
     """
     Extract text from a specific region of an image using OCR.
@@ -96,34 +245,37 @@ def capture_and_ocr():
     return text
 
 
-def capture_window(hwnd, screenshot_path=None):
+def grab_window(hwnd):
     """
-    Capture screenshot of a specific window.
+    Grab a specific window into memory.
+    Falls back to the window's area of the screen if it cannot be captured directly.
     
     Args:
-        hwnd: Window handle (Windows only)
-        screenshot_path: Optional path to save screenshot
+        hwnd: Window handle (HWND on Windows, XID on X11)
     
     Returns:
-        Path to saved screenshot
+        Frame holding the raw BGRA pixels
     """
     if not WIN32_AVAILABLE or sys.platform != 'win32':
+        if hwnd and X11CaptureBackend.is_available():
+            with X11CaptureBackend() as backend:
+                return backend.grab_window(hwnd)
         # Fallback to full screen capture
-        if screenshot_path is None:
-            screenshot_path = f"docs/window_{datetime.now().strftime('%H%M%S')}.png"
-        return capture_screen(screenshot_path)
+        return grab_screen()
     
+    # Window rectangles must be in the same physical pixels mss grabs
+    enable_dpi_awareness()
+    window_rect = None
     try:
         # Get window dimensions
-        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+        window_rect = tuple(win32gui.GetWindowRect(hwnd))
+        left, top, right, bottom = window_rect
         width = right - left
         height = bottom - top
         
         if width <= 0 or height <= 0:
             # Invalid window size, fallback to full screen
-            if screenshot_path is None:
-                screenshot_path = f"docs/window_{datetime.now().strftime('%H%M%S')}.png"
-            return capture_screen(screenshot_path)
+            return grab_screen()
         
         # Create device context
         hwndDC = win32gui.GetWindowDC(hwnd)
@@ -135,31 +287,40 @@ def capture_window(hwnd, screenshot_path=None):
         saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
         saveDC.SelectObject(saveBitMap)
         
-        # Copy window to bitmap
-        saveDC.BitBlt((0, 0), (width, height), mfcDC, (0, 0), win32con.SRCCOPY)
-        
-        # Save to file
-        if screenshot_path is None:
-            screenshot_path = f"docs/window_{datetime.now().strftime('%H%M%S')}.png"
-        
-        # Ensure directory exists
-        from pathlib import Path
-        Path(screenshot_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        saveBitMap.SaveBitmapFile(saveDC, screenshot_path)
-        
-        # Cleanup
-        win32gui.DeleteObject(saveBitMap.GetHandle())
-        saveDC.DeleteDC()
-        mfcDC.DeleteDC()
-        win32gui.ReleaseDC(hwnd, hwndDC)
+        try:
+            # Copy window to bitmap and read the raw BGRA bits
+            saveDC.BitBlt((0, 0), (width, height), mfcDC, (0, 0), win32con.SRCCOPY)
+            data = saveBitMap.GetBitmapBits(True)
+        finally:
+            # Cleanup
+            win32gui.DeleteObject(saveBitMap.GetHandle())
+            saveDC.DeleteDC()
+            mfcDC.DeleteDC()
+            win32gui.ReleaseDC(hwnd, hwndDC)
         
-        return screenshot_path
+        return Frame(data, width, height, 'BGRA', window_hwnd=hwnd)
     except Exception:
-        # Fallback to full screen capture on error
-        if screenshot_path is None:
-            screenshot_path = f"docs/window_{datetime.now().strftime('%H%M%S')}.png"
-        return capture_screen(screenshot_path)
+        # Fallback to the window's area of its monitor on error
+        logger.debug("Window grab failed, grabbing its screen area", exc_info=True)
+        frame = grab_screen(window_rect)
+        frame.window_hwnd = hwnd
+        return frame
+
+
+def capture_window(hwnd, screenshot_path=None):
+    """
+    Capture screenshot of a specific window.
+    
+    Args:
+        hwnd: Window handle (HWND on Windows, XID on X11)
+        screenshot_path: Optional path to save screenshot
+    
+    Returns:
+        Path to saved screenshot
+    """
+    if screenshot_path is None:
+        screenshot_path = f"docs/window_{datetime.now().strftime('%H%M%S')}.png"
+    return save_frame(grab_window(hwnd), screenshot_path)
 
 
 def get_window_text(hwnd):
@@ -222,66 +383,180 @@ def get_terminal_command_region(window_hwnd=None, window_width=None, window_heig
     return None
 
 
-def extract_terminal_text(screenshot_path, region=None, window_hwnd=None):
+def plan_capture_region(window_width, window_height, focus_region=None, margin=32):
+    """
+    Choose the part of a terminal window worth capturing: the command area at
+    the bottom (see get_terminal_command_region) plus the focus region if one
+    is known, grown by a margin on every side.
+    
+    Args:
+        window_width: Window width
+        window_height: Window height
+        focus_region: Optional window-relative focus region (x, y, width, height)
+        margin: Extra pixels around the combined region
+    
+    Returns:
+        Region dict with keys: x, y, width, height (clamped to the window)
+    """
+    regions = [get_terminal_command_region(None, window_width, window_height)]
+    if focus_region:
+        regions.append(focus_region)
+    regions = [r for r in regions if r]
+    if not regions:
+        return {'x': 0, 'y': 0, 'width': window_width, 'height': window_height}
+    
+    left = max(0, min(r['x'] for r in regions) - margin)
+    top = max(0, min(r['y'] for r in regions) - margin)
+    right = min(window_width, max(r['x'] + r['width'] for r in regions) + margin)
+    bottom = min(window_height, max(r['y'] + r['height'] for r in regions) + margin)
+    return {'x': left, 'y': top, 'width': right - left, 'height': bottom - top}
+
+
+def translate_region(region, offset):
+    """
+    Shift a window-relative region into the coordinates of a region capture.
+    
+    Args:
+        region: Optional dict with keys x, y (other keys are kept)
+        offset: (x, y) of the capture within the window
+    
+    Returns:
+        New region dict, or None if region is None
+    """
+    if not region or offset == (0, 0):
+        return region
+    x = region.get('x', 0) - offset[0]
+    y = region.get('y', 0) - offset[1]
+    translated = dict(region)
+    translated['x'] = max(0, x)
+    translated['y'] = max(0, y)
+    # Trim any part that lies before the capture's top-left corner
+    if 'width' in region:
+        translated['width'] = region['width'] + min(0, x)
+    if 'height' in region:
+        translated['height'] = region['height'] + min(0, y)
+    return translated
+
+
+# Tesseract page segmentation mode for a single text line
+SINGLE_LINE_PSM = 7
+
+
+def scan_prompt_bottom_up(img, max_lines=12, window_title=None):
+    """
+    OCR a terminal one text line at a time, from the bottom up.
+    Stops at the first line that looks like a prompt with a command typed,
+    so a typical capture costs one or two single-line OCRs instead of a full frame.
+    
+    Args:
+        img: Decoded PIL Image or NumPy frame buffer
+        max_lines: Give up after this many lines without a prompt
+        window_title: Terminal window title, used to pick the prompt grammar
+    
+    Returns:
+        Text of the prompt line, or None if none was found
+    """
+    if not isinstance(img, Image.Image):
+        img = Image.fromarray(img)
+    
+    registry = get_prompt_registry()
+    bands = segment_line_bands(to_grayscale_array(img))
+    for top, bottom in list(reversed(bands))[:max_lines]:
+        line = ocr_image(img.crop((0, top, img.width, bottom)), psm=SINGLE_LINE_PSM).strip()
+        match = registry.match_line(line, window_title) if line else None
+        if match and match[1]:
+            return line
+    return None
+
+
+def extract_terminal_text(screenshot_path, region=None, window_hwnd=None, delta=False,
+                          bottom_up=False, window_title=None):
     """
     Extract text from terminal window screenshot using OCR.
     Attempts to parse the last command line.
     Supports focus region OCR with fallback to full window.
+    The screenshot is decoded once and shared by all OCR passes.
     
     Args:
-        screenshot_path: Path to terminal screenshot
+        screenshot_path: Path to terminal screenshot, or an already-decoded
+                         PIL Image / NumPy frame buffer
         region: Optional dict with keys: x, y, width, height, confidence
                 If provided, tries OCR on this region first
         window_hwnd: Optional window handle for heuristics
+        delta: OCR the full window line by line, reusing the text of lines
+               unchanged since the previous capture of the same window
+        bottom_up: Before any larger pass, scan single lines upward from the
+                   bottom and stop at the first prompt line
+        window_title: Terminal window title used to pick the prompt grammar
+                      (looked up from window_hwnd if not given)
     
     Returns:
         Extracted command text (best effort)
     """
     try:
+        img = open_image(screenshot_path)
+        if window_title is None and window_hwnd:
+            window_title = get_window_text(window_hwnd)
         focus_text = None
         focus_confidence = 0.0
         
         # Try focus region first if provided
         if region:
             try:
-                focus_text = extract_text_from_region(screenshot_path, region)
+                focus_text = extract_text_from_frame(img, region)
                 focus_confidence = region.get('confidence', 0.5)
                 
                 # Check if focus region yielded useful text
                 if focus_text and focus_text.strip():
                     # Try to extract command from focus region text
-                    command = _parse_command_from_text(focus_text)
+                    command = _parse_command_from_text(focus_text, window_title)
                     if command:
                         return command
             except Exception:
                 # If focus region OCR fails, continue to fallback
-                pass
+                logger.debug("Focus region OCR failed", exc_info=True)
+        
+        # Cheap pass: find the last prompt line without OCR'ing the whole window
+        if bottom_up:
+            try:
+                prompt_line = scan_prompt_bottom_up(img, window_title=window_title)
+                if prompt_line:
+                    command = _parse_command_from_text(prompt_line, window_title)
+                    if command:
+                        return command
+            except Exception:
+                logger.debug("Bottom-up prompt scan failed", exc_info=True)
         
         # Fallback: use terminal heuristics if no region provided
         if not region and window_hwnd:
-            heuristic_region = get_terminal_command_region(window_hwnd)
+            img_width, img_height = _image_size(img)
+            # Image size, not window size: region captures are smaller than the window
+            heuristic_region = get_terminal_command_region(None, img_width, img_height)
             if heuristic_region:
                 try:
-                    heuristic_text = extract_text_from_region(screenshot_path, heuristic_region)
+                    heuristic_text = extract_text_from_frame(img, heuristic_region)
                     if heuristic_text and heuristic_text.strip():
-                        command = _parse_command_from_text(heuristic_text)
+                        command = _parse_command_from_text(heuristic_text, window_title)
                         if command:
                             return command
                 except Exception:
-                    pass
+                    logger.debug("Command region OCR failed", exc_info=True)
         
         # Final fallback: full window OCR
-        full_text = extract_text_from_image(screenshot_path)
+        if delta:
+            full_text = get_delta_ocr().extract(img, ocr_image, window_key=window_hwnd)
+        else:
+            full_text = extract_text_from_frame(img)
         
         # If we have focus region text, prefer it if it's more recent/relevant
         if focus_text and focus_text.strip() and focus_confidence > 0.3:
             # Try parsing focus text first
-            command = _parse_command_from_text(focus_text)
+            command = _parse_command_from_text(focus_text, window_title)
             if command:
                 return command
         
         # Parse full window text
-        command = _parse_command_from_text(full_text)
+        command = _parse_command_from_text(full_text, window_title)
         if command:
             return command
         
@@ -289,16 +564,19 @@ def extract_terminal_text(screenshot_path, region=None, window_hwnd=None):
         return full_text[:100] if full_text else ""
         
     except Exception:
+        logger.warning("Terminal OCR failed", exc_info=True)
         return ""
 
 
-def _parse_command_from_text(text):
+def _parse_command_from_text(text, window_title=None):
     """
     Parse command text from OCR output.
-    Looks for command patterns like "C:\> command" or "$ command".
+    Looks for the last line matching a shell prompt grammar (cmd, PowerShell,
+    bash, zsh, fish, ...) and returns what was typed after the prompt.
     
     Args:
         text: Raw OCR text
+        window_title: Terminal window title, used to prefer the matching grammar
     
     Returns:
         Extracted command string, or None if not found
@@ -306,29 +584,20 @@ def _parse_command_from_text(text):
     if not text:
         return None
     
+    registry = get_prompt_registry()
+    command = registry.find_command(text, window_title)
+    if command:
+        return command
+    
     lines = text.split('\n')
     
-    # Try to extract the last command line
+    # No prompt found: return the last line that looks like a command
     for line in reversed(lines):
         line = line.strip()
-        # Look for command-like patterns
-        if line and not line.startswith('Microsoft') and len(line) > 3:
-            # Try to find the actual command (after prompt)
-            if '>' in line:
-                parts = line.split('>', 1)
-                if len(parts) > 1:
-                    command = parts[1].strip()
-                    if command:
-                        return command
-            elif '$' in line:
-                parts = line.split('$', 1)
-                if len(parts) > 1:
-                    command = parts[1].strip()
-                    if command:
-                        return command
-            # If no prompt found, return the line if it looks like a command
-            if line and not line.startswith('PS') and ' ' in line:
-                return line
+        if (line and len(line) > 3 and ' ' in line
+                and not line.startswith(('Microsoft', 'PS'))
+                and registry.match_line(line, window_title) is None):
+            return line
     
     # Fallback: return first non-empty line
     for line in lines:
@@ -337,4 +606,3 @@ def _parse_command_from_text(text):
             return line
     
     return None
-
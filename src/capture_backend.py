@@ -0,0 +1,744 @@
+"""
+Capture Backend - Long-lived screen/window grabber for one recording.
+The module-level grab functions in capture.py open an mss instance or build a
+set of GDI objects for every screenshot. A CaptureBackend is opened once per
+recording and keeps those handles, the per-window bitmap and a pool of frame
+buffers alive, so a grab is just a blit and a copy into a recycled buffer.
+
+When a window cannot be captured directly, backends grab the window's area
+of the screen instead, from the monitor that shows most of it (not the whole
+primary monitor, which may not even be the right screen on multi-monitor setups).
+
+Backends are pluggable: the base class grabs the full screen only, the Win32
+backend captures windows by HWND through GDI, and the X11 backend captures
+windows by XID (including under Xvfb). Each also lists windows, reports the
+focused one and reads titles, which is all the recorder needs to find terminals.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import mss
+
+if sys.platform == 'win32':
+    try:
+        import ctypes
+        from ctypes import wintypes
+        import win32gui
+        import win32con
+        WIN32_AVAILABLE = True
+    except ImportError:
+        WIN32_AVAILABLE = False
+else:
+    WIN32_AVAILABLE = False
+
+try:
+    from Xlib import X
+    from Xlib import display as xdisplay
+    XLIB_AVAILABLE = True
+except ImportError:
+    XLIB_AVAILABLE = False
+
+try:
+    from .frame import Frame
+except ImportError:
+    # Imported as a top-level module (e.g. from main.py)
+    from frame import Frame
+
+
+# Result of the first enable_dpi_awareness() call (the mode can't change afterwards)
+_dpi_awareness_set: Optional[bool] = None
+
+
+def enable_dpi_awareness() -> bool:
+    """
+    Make window rectangles and grabs use physical pixels on scaled monitors (Windows).
+    Per-monitor awareness keeps coordinates exact on mixed-DPI setups. Only the
+    first call in a process takes effect, so call it before creating any windows.
+
+    Returns:
+        Whether an awareness mode was set
+    """
+    global _dpi_awareness_set
+    if not WIN32_AVAILABLE:
+        return False
+    if _dpi_awareness_set is None:
+        _dpi_awareness_set = _set_dpi_awareness()
+    return _dpi_awareness_set
+
+
+def _set_dpi_awareness() -> bool:
+    try:
+        # DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE_V2 (Windows 10 1703+)
+        if ctypes.windll.user32.SetProcessDpiAwarenessContext(ctypes.c_void_p(-4)):
+            return True
+    except (AttributeError, OSError):
+        pass
+    try:
+        # PROCESS_PER_MONITOR_DPI_AWARE (Windows 8.1+)
+        return ctypes.windll.shcore.SetProcessDpiAwareness(2) == 0
+    except (AttributeError, OSError):
+        pass
+    try:
+        return bool(ctypes.windll.user32.SetProcessDPIAware())
+    except (AttributeError, OSError):
+        return False
+
+
+def intersect_rect(a: Tuple[int, int, int, int],
+                   b: Tuple[int, int, int, int]) -> Optional[Tuple[int, int, int, int]]:
+    """Intersection of two (left, top, right, bottom) rectangles, or None if they don't overlap."""
+    left, top = max(a[0], b[0]), max(a[1], b[1])
+    right, bottom = min(a[2], b[2]), min(a[3], b[3])
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right, bottom
+
+
+def monitor_rect(monitor: Dict) -> Tuple[int, int, int, int]:
+    """(left, top, right, bottom) of an mss monitor dict."""
+    return (monitor['left'], monitor['top'],
+            monitor['left'] + monitor['width'], monitor['top'] + monitor['height'])
+
+
+def monitor_for_rect(monitors: List[Dict], rect: Tuple[int, int, int, int]) -> Dict:
+    """
+    Pick the monitor showing most of a rectangle.
+
+    Args:
+        monitors: mss monitor list (index 0 is the combined virtual screen)
+        rect: (left, top, right, bottom) in screen pixels
+
+    Returns:
+        The monitor dict with the largest overlap (the primary one if none overlap)
+    """
+    best, best_area = None, 0
+    for monitor in monitors[1:]:
+        overlap = intersect_rect(rect, monitor_rect(monitor))
+        if overlap:
+            area = (overlap[2] - overlap[0]) * (overlap[3] - overlap[1])
+            if area > best_area:
+                best, best_area = monitor, area
+    if best is None:
+        best = monitors[1] if len(monitors) > 1 else monitors[0]
+    return best
+
+
+def screen_area_for_rect(monitors: List[Dict], rect: Tuple[int, int, int, int]) -> Dict:
+    """
+    Screen area to grab for a window rectangle: the part of it on its monitor.
+
+    Args:
+        monitors: mss monitor list
+        rect: Window (or window region) rectangle in screen pixels
+
+    Returns:
+        mss area dict (left, top, width, height); the whole monitor if the
+        rectangle is entirely off-screen
+    """
+    monitor = monitor_for_rect(monitors, rect)
+    overlap = intersect_rect(rect, monitor_rect(monitor))
+    if overlap is None:
+        return dict(monitor)
+    left, top, right, bottom = overlap
+    return {'left': left, 'top': top, 'width': right - left, 'height': bottom - top}
+
+
+class FrameBufferPool:
+    """Free list of pixel buffers, recycled once the frames using them are released."""
+
+    def __init__(self, max_free: int = 8):
+        """
+        Initialize buffer pool.
+
+        Args:
+            max_free: Maximum number of idle buffers kept for reuse
+        """
+        self.max_free = max_free
+        self._free: Dict[int, List[bytearray]] = {}
+        self._free_count = 0
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, nbytes: int) -> bytearray:
+        """Get a buffer of exactly nbytes (contents undefined)."""
+        with self._lock:
+            buffers = self._free.get(nbytes)
+            if buffers:
+                self._free_count -= 1
+                self.reused += 1
+                return buffers.pop()
+            self.allocated += 1
+        return bytearray(nbytes)
+
+    def give_back(self, buffer: bytearray):
+        """Return a buffer for reuse (dropped if the pool is full)."""
+        with self._lock:
+            if self._free_count >= self.max_free:
+                return
+            self._free.setdefault(len(buffer), []).append(buffer)
+            self._free_count += 1
+
+    def clear(self):
+        """Drop all idle buffers."""
+        with self._lock:
+            self._free.clear()
+            self._free_count = 0
+
+
+class _WindowSurface:
+    """Memory DC and bitmap sized for one window, kept between grabs (Windows only)."""
+
+    def __init__(self, hwnd: int, width: int, height: int):
+        self.hwnd = hwnd
+        self.width = width
+        self.height = height
+        hwnd_dc = win32gui.GetWindowDC(hwnd)
+        try:
+            self.mem_dc = win32gui.CreateCompatibleDC(hwnd_dc)
+            self.bitmap = win32gui.CreateCompatibleBitmap(hwnd_dc, width, height)
+        finally:
+            win32gui.ReleaseDC(hwnd, hwnd_dc)
+        self._previous = win32gui.SelectObject(self.mem_dc, self.bitmap)
+
+    def grab_into(self, buffer: bytearray, x: int = 0, y: int = 0):
+        """Blit the window area starting at (x, y) and read its BGRA bits straight into buffer."""
+        hwnd_dc = win32gui.GetWindowDC(self.hwnd)
+        try:
+            win32gui.BitBlt(self.mem_dc, 0, 0, self.width, self.height,
+                            hwnd_dc, x, y, win32con.SRCCOPY)
+        finally:
+            win32gui.ReleaseDC(self.hwnd, hwnd_dc)
+
+        target = (ctypes.c_char * len(buffer)).from_buffer(buffer)
+        copied = _get_bitmap_bits(self.bitmap, len(buffer), ctypes.addressof(target))
+        if copied != len(buffer):
+            raise OSError(f"GetBitmapBits copied {copied} of {len(buffer)} bytes")
+
+    def close(self):
+        try:
+            win32gui.SelectObject(self.mem_dc, self._previous)
+            win32gui.DeleteObject(self.bitmap)
+            win32gui.DeleteDC(self.mem_dc)
+        except Exception:
+            pass
+
+
+if WIN32_AVAILABLE:
+    _get_bitmap_bits = ctypes.windll.gdi32.GetBitmapBits
+    _get_bitmap_bits.argtypes = [wintypes.HANDLE, ctypes.c_long, ctypes.c_void_p]
+    _get_bitmap_bits.restype = ctypes.c_long
+
+
+def clamp_region(region: Optional[Dict], width: int, height: int) -> Tuple[int, int, int, int]:
+    """
+    Clamp a window-relative region to the window.
+
+    Args:
+        region: Optional dict with keys x, y, width, height (None = whole window)
+        width: Window width
+        height: Window height
+
+    Returns:
+        (x, y, width, height); the whole window if region is empty or outside it
+    """
+    if not region:
+        return 0, 0, width, height
+    x = max(0, min(int(region.get('x', 0)), width - 1))
+    y = max(0, min(int(region.get('y', 0)), height - 1))
+    region_width = min(int(region.get('width', width)), width - x)
+    region_height = min(int(region.get('height', height)), height - y)
+    if region_width <= 0 or region_height <= 0:
+        return 0, 0, width, height
+    return x, y, region_width, region_height
+
+
+class CaptureBackend:
+    """
+    Screen grabber that keeps its handles and buffers between grabs.
+    This base backend cannot see individual windows: grab_window falls back to
+    the full screen and window discovery finds nothing. Subclasses add windows.
+    Safe to call from several threads; grabs are serialized.
+    """
+
+    name = 'screen'
+    # Whether windows can be listed and captured individually
+    supports_windows = False
+
+    def __init__(self, max_free_buffers: int = 8):
+        """
+        Initialize capture backend.
+
+        Args:
+            max_free_buffers: Idle frame buffers kept for reuse
+        """
+        self.pool = FrameBufferPool(max_free=max_free_buffers)
+        self._sct = None
+        self._lock = threading.Lock()
+        self.grab_count = 0
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Whether this backend can run in the current environment."""
+        return True
+
+    def open(self) -> 'CaptureBackend':
+        """Open native handles. The screen grabber itself opens on the first screen grab."""
+        return self
+
+    def _screen_grabber(self):
+        """The long-lived mss instance (lock must be held)."""
+        if self._sct is None:
+            self._sct = mss.mss()
+        return self._sct
+
+    def close(self):
+        """Release all handles. Frames already handed out stay valid."""
+        with self._lock:
+            if self._sct is not None:
+                try:
+                    self._sct.close()
+                except Exception:
+                    pass
+                self._sct = None
+            self.pool.clear()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _recycle(self, frame: Frame):
+        """on_release hook of pooled frames."""
+        self.pool.give_back(frame.data)
+
+    def grab_screen(self, area: Optional[Dict] = None) -> Frame:
+        """
+        Grab the primary monitor (or part of the screen).
+
+        Args:
+            area: Optional dict with keys left, top, width, height in screen pixels
+
+        Returns:
+            Frame holding the raw BGRA pixels
+        """
+        with self._lock:
+            sct = self._screen_grabber()
+            sct_img = sct.grab(area or sct.monitors[1])
+            self.grab_count += 1
+        # mss hands back a fresh bytearray per grab; wrap it without copying
+        return Frame(sct_img.raw, sct_img.width, sct_img.height, 'BGRA')
+
+    def grab_window_area(self, window_id, region: Optional[Dict] = None) -> Frame:
+        """
+        Grab a window's area of the screen (what is visible there, including
+        anything covering it), clipped to the monitor that shows most of it.
+        Falls back to the primary monitor if the window's position is unknown.
+
+        Args:
+            window_id: Native window id
+            region: Optional window-relative region to grab
+
+        Returns:
+            Frame whose offset/window_size place it within the window
+        """
+        rect = self.get_window_rect(window_id) if window_id else None
+        if not rect or rect[2] <= rect[0] or rect[3] <= rect[1]:
+            return self.grab_screen()
+
+        window_size = (rect[2] - rect[0], rect[3] - rect[1])
+        x, y, width, height = clamp_region(region, *window_size)
+        target = (rect[0] + x, rect[1] + y, rect[0] + x + width, rect[1] + y + height)
+        with self._lock:
+            monitors = self._screen_grabber().monitors
+        area = screen_area_for_rect(monitors, target)
+        frame = self.grab_screen(area)
+        frame.window_hwnd = window_id
+        frame.offset = (max(0, area['left'] - rect[0]), max(0, area['top'] - rect[1]))
+        frame.window_size = window_size
+        return frame
+
+    def grab_window(self, window_id, region: Optional[Dict] = None) -> Frame:
+        """
+        Grab a specific window, or only a region of it.
+        Falls back to the window's area of the screen if the window cannot be
+        captured directly.
+
+        Args:
+            window_id: Native window id (HWND on Windows, XID on X11)
+            region: Optional dict with keys x, y, width, height relative to the
+                    window; the frame's offset records where it was taken from
+
+        Returns:
+            Frame holding the raw pixels; call release() when done with it
+            so its buffer can be reused
+        """
+        return self.grab_window_area(window_id, region)
+
+    def get_window_size(self, window_id) -> Optional[Tuple[int, int]]:
+        """(width, height) of a window, or None if unknown."""
+        return None
+
+    def get_window_rect(self, window_id) -> Optional[Tuple[int, int, int, int]]:
+        """(left, top, right, bottom) of a window in screen pixels, or None if unknown."""
+        return None
+
+    def list_windows(self) -> List[Tuple[int, str]]:
+        """Visible top-level windows as (window_id, title), in stacking/enumeration order."""
+        return []
+
+    def get_foreground_window(self) -> Optional[int]:
+        """The focused window, or None if unknown."""
+        return None
+
+    def get_window_title(self, window_id) -> str:
+        """Title of a window ("" if unknown)."""
+        return ""
+
+    def is_window_visible(self, window_id) -> bool:
+        """Whether a window is currently shown."""
+        return False
+
+    def get_stats(self) -> Dict:
+        """Grab and buffer reuse counters."""
+        return {
+            'backend': self.name,
+            'grabs': self.grab_count,
+            'buffers_allocated': self.pool.allocated,
+            'buffers_reused': self.pool.reused,
+        }
+
+
+class Win32CaptureBackend(CaptureBackend):
+    """Captures windows by HWND through GDI, keeping a bitmap per window."""
+
+    name = 'win32'
+    supports_windows = True
+
+    def __init__(self, max_windows: int = 4, max_free_buffers: int = 8):
+        """
+        Initialize Win32 capture backend.
+
+        Args:
+            max_windows: Number of GDI bitmaps (per window and grab size) kept open
+            max_free_buffers: Idle frame buffers kept for reuse
+        """
+        super().__init__(max_free_buffers=max_free_buffers)
+        self.max_windows = max_windows
+        self._surfaces: OrderedDict = OrderedDict()
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return WIN32_AVAILABLE
+
+    def open(self) -> 'Win32CaptureBackend':
+        # Window rectangles must be in the same physical pixels mss grabs
+        enable_dpi_awareness()
+        return super().open()
+
+    def close(self):
+        with self._lock:
+            for surface in self._surfaces.values():
+                surface.close()
+            self._surfaces.clear()
+        super().close()
+
+    def grab_window(self, hwnd, region: Optional[Dict] = None) -> Frame:
+        if not hwnd:
+            return self.grab_screen()
+
+        try:
+            window_size = self.get_window_size(hwnd)
+            if not window_size or window_size[0] <= 0 or window_size[1] <= 0:
+                return self.grab_window_area(hwnd, region)
+            x, y, width, height = clamp_region(region, *window_size)
+
+            buffer = self.pool.acquire(width * height * 4)
+            with self._lock:
+                surface = self._surface_for(hwnd, width, height)
+                surface.grab_into(buffer, x, y)
+                self.grab_count += 1
+            return Frame(buffer, width, height, 'BGRA', window_hwnd=hwnd,
+                         on_release=self._recycle, offset=(x, y), window_size=window_size)
+        except Exception:
+            # Drop possibly broken surfaces and fall back to the window's screen area
+            with self._lock:
+                for key in [key for key in self._surfaces if key[0] == hwnd]:
+                    self._surfaces.pop(key).close()
+            return self.grab_window_area(hwnd, region)
+
+    def _surface_for(self, hwnd, width: int, height: int) -> _WindowSurface:
+        """Get the cached surface for a window and grab size (lock must be held)."""
+        key = (hwnd, width, height)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = _WindowSurface(hwnd, width, height)
+            self._surfaces[key] = surface
+        self._surfaces.move_to_end(key)
+        while len(self._surfaces) > self.max_windows:
+            _, evicted = self._surfaces.popitem(last=False)
+            evicted.close()
+        return surface
+
+    def get_window_size(self, hwnd) -> Optional[Tuple[int, int]]:
+        rect = self.get_window_rect(hwnd)
+        if rect is None:
+            return None
+        return rect[2] - rect[0], rect[3] - rect[1]
+
+    def get_window_rect(self, hwnd) -> Optional[Tuple[int, int, int, int]]:
+        try:
+            return tuple(win32gui.GetWindowRect(hwnd))
+        except Exception:
+            return None
+
+    def list_windows(self) -> List[Tuple[int, str]]:
+        windows = []
+
+        def enum_handler(hwnd, ctx):
+            try:
+                if win32gui.IsWindowVisible(hwnd):
+                    ctx.append((hwnd, win32gui.GetWindowText(hwnd)))
+            except Exception:
+                pass
+            return True
+
+        win32gui.EnumWindows(enum_handler, windows)
+        return windows
+
+    def get_foreground_window(self) -> Optional[int]:
+        return win32gui.GetForegroundWindow() or None
+
+    def get_window_title(self, hwnd) -> str:
+        try:
+            return win32gui.GetWindowText(hwnd)
+        except Exception:
+            return ""
+
+    def is_window_visible(self, hwnd) -> bool:
+        try:
+            return bool(win32gui.IsWindowVisible(hwnd))
+        except Exception:
+            return False
+
+
+class X11CaptureBackend(CaptureBackend):
+    """
+    Captures windows by XID through python-xlib. Works on any X server,
+    including a headless Xvfb, so the pipeline can run on Linux build servers.
+    """
+
+    name = 'x11'
+    supports_windows = True
+
+    def __init__(self, display_name: Optional[str] = None, max_free_buffers: int = 8):
+        """
+        Initialize X11 capture backend.
+
+        Args:
+            display_name: X display to connect to (None uses $DISPLAY, e.g. ':99' for Xvfb)
+            max_free_buffers: Idle frame buffers kept for reuse
+        """
+        super().__init__(max_free_buffers=max_free_buffers)
+        self.display_name = display_name
+        self._display = None
+        self._atoms: Dict[str, int] = {}
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return XLIB_AVAILABLE and bool(os.environ.get('DISPLAY'))
+
+    def open(self) -> 'X11CaptureBackend':
+        with self._lock:
+            if self._display is None:
+                self._display = xdisplay.Display(self.display_name)
+        return super().open()
+
+    def close(self):
+        with self._lock:
+            if self._display is not None:
+                try:
+                    self._display.close()
+                except Exception:
+                    pass
+                self._display = None
+        super().close()
+
+    def _root(self):
+        """Root window of the default screen (lock must be held)."""
+        return self._display.screen().root
+
+    def _ensure_open(self):
+        if self._display is None:
+            self.open()
+
+    def _atom(self, name: str) -> int:
+        if name not in self._atoms:
+            self._atoms[name] = self._display.intern_atom(name)
+        return self._atoms[name]
+
+    def _window(self, xid):
+        return self._display.create_resource_object('window', xid)
+
+    def grab_window(self, xid, region: Optional[Dict] = None) -> Frame:
+        if not xid:
+            return self.grab_screen()
+
+        try:
+            self._ensure_open()
+            with self._lock:
+                window = self._window(xid)
+                geometry = window.get_geometry()
+                window_size = (geometry.width, geometry.height)
+                x, y, width, height = clamp_region(region, *window_size)
+                try:
+                    image = window.get_image(x, y, width, height, X.ZPixmap, 0xffffffff)
+                except Exception:
+                    image = None
+                if image is not None and len(image.data) != width * height * 4:
+                    image = None
+            if image is None:
+                # Unmapped, partly off-screen, or not 32 bits per pixel:
+                # grab the window's area of the screen instead
+                return self.grab_window_area(xid, region)
+
+            buffer = self.pool.acquire(len(image.data))
+            buffer[:] = image.data
+            with self._lock:
+                self.grab_count += 1
+            # ZPixmap at depth 24/32 on a little-endian server is BGRX
+            return Frame(buffer, width, height, 'BGRX', window_hwnd=xid,
+                         on_release=self._recycle, offset=(x, y), window_size=window_size)
+        except Exception:
+            return self.grab_screen()
+
+    def get_window_size(self, xid) -> Optional[Tuple[int, int]]:
+        try:
+            self._ensure_open()
+            with self._lock:
+                geometry = self._window(xid).get_geometry()
+                return geometry.width, geometry.height
+        except Exception:
+            return None
+
+    def get_window_rect(self, xid) -> Optional[Tuple[int, int, int, int]]:
+        try:
+            self._ensure_open()
+            with self._lock:
+                window = self._window(xid)
+                geometry = window.get_geometry()
+                # Position of the root's origin in window coordinates, negated
+                origin = window.translate_coords(self._root(), 0, 0)
+                left, top = -origin.x, -origin.y
+                return left, top, left + geometry.width, top + geometry.height
+        except Exception:
+            return None
+
+    def list_windows(self) -> List[Tuple[int, str]]:
+        self._ensure_open()
+        with self._lock:
+            root = self._root()
+            # EWMH window managers publish their client list; bare Xvfb has none
+            prop = root.get_full_property(self._atom('_NET_CLIENT_LIST'), X.AnyPropertyType)
+            if prop is not None:
+                xids = list(prop.value)
+            else:
+                xids = [child.id for child in root.query_tree().children]
+
+            windows = []
+            for xid in xids:
+                try:
+                    window = self._window(xid)
+                    if window.get_attributes().map_state != X.IsViewable:
+                        continue
+                    windows.append((xid, self._title(window)))
+                except Exception:
+                    continue
+            return windows
+
+    def get_foreground_window(self) -> Optional[int]:
+        self._ensure_open()
+        with self._lock:
+            root = self._root()
+            prop = root.get_full_property(self._atom('_NET_ACTIVE_WINDOW'), X.AnyPropertyType)
+            if prop is not None and prop.value and prop.value[0]:
+                return int(prop.value[0])
+            focus = self._display.get_input_focus().focus
+            return focus.id if hasattr(focus, 'id') and focus.id > 1 else None
+
+    def get_window_title(self, xid) -> str:
+        try:
+            self._ensure_open()
+            with self._lock:
+                return self._title(self._window(xid))
+        except Exception:
+            return ""
+
+    def _title(self, window) -> str:
+        """_NET_WM_NAME (UTF-8) or the legacy WM_NAME (lock must be held)."""
+        prop = window.get_full_property(self._atom('_NET_WM_NAME'), self._atom('UTF8_STRING'))
+        if prop is not None and prop.value:
+            value = prop.value
+            return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+        name = window.get_wm_name()
+        if isinstance(name, bytes):
+            return name.decode('latin-1')
+        return name or ""
+
+    def is_window_visible(self, xid) -> bool:
+        try:
+            self._ensure_open()
+            with self._lock:
+                return self._window(xid).get_attributes().map_state == X.IsViewable
+        except Exception:
+            return False
+
+
+# Registered backends by name, in order of preference for auto-selection
+CAPTURE_BACKENDS: Dict[str, type] = OrderedDict([
+    ('win32', Win32CaptureBackend),
+    ('x11', X11CaptureBackend),
+    ('screen', CaptureBackend),
+])
+
+
+def register_capture_backend(name: str, backend_class: type, preferred: bool = False):
+    """
+    Add a capture backend.
+
+    Args:
+        name: Backend name used with create_capture_backend
+        backend_class: CaptureBackend subclass
+        preferred: Try it before the built-in backends during auto-selection
+    """
+    CAPTURE_BACKENDS[name] = backend_class
+    if preferred:
+        CAPTURE_BACKENDS.move_to_end(name, last=False)
+
+
+def create_capture_backend(name: Optional[str] = None, **kwargs) -> CaptureBackend:
+    """
+    Create a capture backend (not yet opened).
+
+    Args:
+        name: Backend name ('win32', 'x11', 'screen', or a registered one);
+              None picks the first backend available in this environment
+        **kwargs: Passed to the backend's constructor
+
+    Returns:
+        CaptureBackend instance
+    """
+    if name is not None:
+        if name not in CAPTURE_BACKENDS:
+            raise ValueError(f"Unknown capture backend: {name}")
+        return CAPTURE_BACKENDS[name](**kwargs)
+
+    for backend_class in CAPTURE_BACKENDS.values():
+        if backend_class.is_available():
+            return backend_class(**kwargs)
+    return CaptureBackend(**kwargs)
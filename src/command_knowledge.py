@@ -0,0 +1,688 @@
+"""
+Command Knowledge - What common terminal commands and their flags do.
+Used by the offline summarizer to explain captured commands without an LLM.
+
+TOOLS maps a program name to its entry:
+    family       Key into FAMILIES (related steps are grouped by family)
+    summary      What running the program does
+    subcommands  name -> (summary, flags) or (summary, flags, summary with {args})
+    flags        Flags that apply to every subcommand
+
+Flag keys are the flag itself, followed by a placeholder when it takes a
+value (e.g. '-m <message>'). "{args}" in a summary is replaced by the
+command's positional arguments.
+"""
+
+# Text stored for a capture when OCR yields nothing usable (set by ocr_pipeline)
+FALLBACK_COMMAND = "Command captured"
+
+# Family key -> section title
+FAMILIES = {
+    'git': "Version control",
+    'python': "Python",
+    'node': "Node.js packages and scripts",
+    'docker': "Containers",
+    'kubernetes': "Kubernetes",
+    'files': "Files and folders",
+    'search': "Searching",
+    'network': "Network and remote access",
+    'system': "System packages",
+    'build': "Building",
+    'shell': "Shell",
+}
+
+TOOLS = {
+    # --- Version control ---
+    'git': {
+        'family': 'git',
+        'summary': "Run Git",
+        'subcommands': {
+            'init': ("Create a new Git repository in the current folder", {}),
+            'clone': ("Download a copy of a repository", {
+                '--depth <n>': "Only fetch the latest n commits",
+                '-b <branch>': "Check out this branch instead of the default",
+                '--recursive': "Also clone submodules",
+            }, "Download a copy of the repository {args}"),
+            'status': ("Show which files are modified, staged or untracked", {
+                '-s': "Short, one line per file",
+                '--short': "Short, one line per file",
+            }),
+            'add': ("Stage changes for the next commit", {
+                '-A': "Stage every change, including deletions",
+                '--all': "Stage every change, including deletions",
+                '-p': "Pick the changes to stage hunk by hunk",
+            }, "Stage {args} for the next commit"),
+            'commit': ("Record the staged changes as a new commit", {
+                '-m <message>': "Commit message",
+                '-a': "Stage modified tracked files first",
+                '--amend': "Replace the last commit instead of adding one",
+            }),
+            'push': ("Upload local commits to the remote", {
+                '-u': "Remember the remote branch as upstream",
+                '--set-upstream': "Remember the remote branch as upstream",
+                '--force': "Overwrite the remote branch (discards its other commits)",
+                '-f': "Overwrite the remote branch (discards its other commits)",
+                '--tags': "Also push tags",
+            }, "Upload local commits to {args}"),
+            'pull': ("Fetch the remote's commits and merge them into the current branch", {
+                '--rebase': "Rebase local commits on top instead of merging",
+            }),
+            'fetch': ("Download commits and branches from the remote without merging", {
+                '--all': "Fetch from every remote",
+                '--prune': "Drop references to deleted remote branches",
+            }),
+            'checkout': ("Switch branches or restore files", {
+                '-b <branch>': "Create the branch and switch to it",
+            }, "Switch to {args}"),
+            'switch': ("Switch branches", {
+                '-c <branch>': "Create the branch and switch to it",
+            }, "Switch to branch {args}"),
+            'branch': ("List branches", {
+                '-a': "Include remote branches",
+                '-d': "Delete the branch",
+                '-D': "Delete the branch even if it is not merged",
+            }, "Create or manage branch {args}"),
+            'merge': ("Merge another branch into the current one", {
+                '--no-ff': "Always create a merge commit",
+            }, "Merge {args} into the current branch"),
+            'rebase': ("Replay the current branch's commits on top of another branch", {
+                '-i': "Edit, reorder or squash the commits interactively",
+                '--continue': "Continue after resolving conflicts",
+                '--abort': "Give up and restore the original branch",
+            }, "Replay the current branch's commits on top of {args}"),
+            'log': ("Show the commit history", {
+                '--oneline': "One line per commit",
+                '--graph': "Draw the branch structure",
+                '-n <count>': "Only the latest commits",
+            }),
+            'diff': ("Show changes that are not staged yet", {
+                '--staged': "Show the staged changes instead",
+                '--cached': "Show the staged changes instead",
+                '--stat': "Only a per-file summary",
+            }),
+            'stash': ("Set uncommitted changes aside", {}),
+            'reset': ("Move the current branch or unstage changes", {
+                '--hard': "Also discard the changes in the working tree",
+                '--soft': "Keep the changes staged",
+            }),
+            'remote': ("Manage the remote repositories", {
+                '-v': "Show the remote URLs",
+            }),
+            'tag': ("Create or list tags", {
+                '-a': "Annotated tag",
+                '-m <message>': "Tag message",
+            }),
+        },
+        'flags': {},
+    },
+
+    # --- Python ---
+    'pip': {
+        'family': 'python',
+        'summary': "Manage Python packages",
+        'subcommands': {
+            'install': ("Install Python packages", {
+                '-r <file>': "Install everything listed in this requirements file",
+                '-e': "Editable install: use the source folder in place",
+                '-U': "Upgrade packages that are already installed",
+                '--upgrade': "Upgrade packages that are already installed",
+                '--user': "Install for the current user only",
+                '--no-cache-dir': "Don't use or fill pip's download cache",
+            }, "Install the Python package(s) {args}"),
+            'uninstall': ("Remove Python packages", {
+                '-y': "Don't ask for confirmation",
+            }, "Remove the Python package(s) {args}"),
+            'list': ("List installed Python packages", {
+                '--outdated': "Only packages with newer versions available",
+            }),
+            'freeze': ("Print installed packages in requirements format", {}),
+            'show': ("Show details of an installed package", {}, "Show details of the package {args}"),
+        },
+        'flags': {
+            '-q': "Less output",
+            '-v': "More output",
+        },
+    },
+    'python': {
+        'family': 'python',
+        'summary': "Start the Python interpreter",
+        'subcommands': {},
+        'flags': {
+            '-m <module>': "Run a library module as a script",
+            '-c <code>': "Run this code",
+            '-u': "Unbuffered output",
+            '-V': "Print the Python version",
+            '--version': "Print the Python version",
+        },
+        'with_args': "Run the Python script {args}",
+    },
+    'pytest': {
+        'family': 'python',
+        'summary': "Run the test suite with pytest",
+        'subcommands': {},
+        'flags': {
+            '-q': "Less output",
+            '-v': "One line per test",
+            '-x': "Stop at the first failure",
+            '-k <expression>': "Only tests whose names match the expression",
+            '-s': "Show print output",
+        },
+        'with_args': "Run the tests in {args}",
+    },
+    'venv': {
+        'family': 'python',
+        'summary': "Create a Python virtual environment",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Create a Python virtual environment in {args}",
+    },
+
+    # --- Node.js ---
+    'npm': {
+        'family': 'node',
+        'summary': "Run the Node.js package manager",
+        'subcommands': {
+            'install': ("Install the project's dependencies from package.json", {
+                '--save-dev': "Record it as a development dependency",
+                '-D': "Record it as a development dependency",
+                '-g': "Install globally",
+                '--global': "Install globally",
+            }, "Install the npm package(s) {args}"),
+            'i': ("Install the project's dependencies from package.json", {
+                '-D': "Record it as a development dependency",
+                '-g': "Install globally",
+            }, "Install the npm package(s) {args}"),
+            'ci': ("Clean install exactly what package-lock.json lists", {}),
+            'run': ("Run a script from package.json", {}, "Run the package.json script {args}"),
+            'start': ("Run the project's start script", {}),
+            'test': ("Run the project's test script", {}),
+            'init': ("Create a package.json", {
+                '-y': "Accept the defaults",
+            }),
+            'uninstall': ("Remove npm packages", {}, "Remove the npm package(s) {args}"),
+            'update': ("Update packages to the newest allowed versions", {}),
+            'audit': ("Check dependencies for known vulnerabilities", {}),
+            'publish': ("Publish the package to the registry", {}),
+        },
+        'flags': {},
+    },
+    'npx': {
+        'family': 'node',
+        'summary': "Run a package's command without installing it globally",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Run {args} through npx (downloading it if needed)",
+    },
+    'yarn': {
+        'family': 'node',
+        'summary': "Install the project's dependencies with Yarn",
+        'subcommands': {
+            'add': ("Add packages", {
+                '-D': "As development dependencies",
+            }, "Add the package(s) {args}"),
+            'install': ("Install the project's dependencies", {}),
+            'run': ("Run a script from package.json", {}, "Run the package.json script {args}"),
+            'build': ("Run the project's build script", {}),
+            'test': ("Run the project's test script", {}),
+        },
+        'flags': {},
+    },
+    'node': {
+        'family': 'node',
+        'summary': "Start the Node.js interpreter",
+        'subcommands': {},
+        'flags': {
+            '-v': "Print the Node.js version",
+            '--version': "Print the Node.js version",
+        },
+        'with_args': "Run the script {args} with Node.js",
+    },
+
+    # --- Containers ---
+    'docker': {
+        'family': 'docker',
+        'summary': "Run Docker",
+        'subcommands': {
+            'build': ("Build an image from a Dockerfile", {
+                '-t <name>': "Name (and tag) the image",
+                '-f <file>': "Use this Dockerfile",
+                '--no-cache': "Rebuild every layer",
+            }, "Build an image from the Dockerfile in {args}"),
+            'run': ("Start a new container", {
+                '-d': "Run in the background",
+                '-it': "Interactive, with a terminal",
+                '-i': "Keep standard input open",
+                '-t': "Allocate a terminal",
+                '--rm': "Remove the container when it exits",
+                '-p <ports>': "Publish a container port on the host (host:container)",
+                '-v <volume>': "Mount a host folder or volume (host:container)",
+                '-e <variable>': "Set an environment variable",
+                '--name <name>': "Name the container",
+            }, "Start a container from {args}"),
+            'ps': ("List running containers", {
+                '-a': "Include stopped containers",
+            }),
+            'images': ("List local images", {}),
+            'pull': ("Download an image", {}, "Download the image {args}"),
+            'push': ("Upload an image to a registry", {}, "Upload the image {args}"),
+            'exec': ("Run a command in a running container", {
+                '-it': "Interactive, with a terminal",
+            }, "Run a command in the container {args}"),
+            'logs': ("Show a container's output", {
+                '-f': "Keep following new output",
+            }, "Show the output of {args}"),
+            'stop': ("Stop running containers", {}, "Stop {args}"),
+            'rm': ("Remove containers", {
+                '-f': "Stop them first if they are running",
+            }, "Remove the container(s) {args}"),
+            'rmi': ("Remove images", {}, "Remove the image(s) {args}"),
+            'compose': ("Manage a multi-container application", {}),
+        },
+        'flags': {},
+    },
+    'docker-compose': {
+        'family': 'docker',
+        'summary': "Manage a multi-container application",
+        'subcommands': {
+            'up': ("Create and start the application's containers", {
+                '-d': "Run in the background",
+                '--build': "Rebuild images first",
+            }),
+            'down': ("Stop and remove the application's containers", {
+                '-v': "Also remove its volumes",
+            }),
+            'build': ("Build the application's images", {}),
+            'logs': ("Show the application's output", {
+                '-f': "Keep following new output",
+            }),
+            'ps': ("List the application's containers", {}),
+        },
+        'flags': {
+            '-f <file>': "Use this compose file",
+        },
+    },
+    'kubectl': {
+        'family': 'kubernetes',
+        'summary': "Run kubectl against the Kubernetes cluster",
+        'subcommands': {
+            'get': ("List cluster resources", {
+                '-o <format>': "Output format (e.g. yaml, wide)",
+            }, "List the cluster's {args}"),
+            'describe': ("Show details of a resource", {}, "Show details of {args}"),
+            'apply': ("Create or update resources from a manifest", {
+                '-f <file>': "Manifest file or folder",
+            }),
+            'delete': ("Delete resources", {
+                '-f <file>': "Delete what this manifest defines",
+            }, "Delete {args}"),
+            'logs': ("Show a pod's output", {
+                '-f': "Keep following new output",
+            }, "Show the output of {args}"),
+        },
+        'flags': {
+            '-n <namespace>': "In this namespace",
+            '--namespace <namespace>': "In this namespace",
+        },
+    },
+
+    # --- Files and folders ---
+    'cd': {
+        'family': 'files',
+        'summary': "Go to the home folder",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Change into the folder {args}",
+    },
+    'ls': {
+        'family': 'files',
+        'summary': "List the files in the current folder",
+        'subcommands': {},
+        'flags': {
+            '-l': "Long format: permissions, owner, size and date",
+            '-a': "Include hidden files",
+            '-h': "Human-readable sizes",
+            '-R': "Include subfolders",
+            '-t': "Newest first",
+        },
+        'with_args': "List the files in {args}",
+    },
+    'dir': {
+        'family': 'files',
+        'summary': "List the files in the current folder",
+        'subcommands': {},
+        'flags': {
+            '/s': "Include subfolders",
+            '/b': "Names only",
+        },
+        'with_args': "List the files in {args}",
+    },
+    'pwd': {
+        'family': 'files',
+        'summary': "Print the current folder",
+        'subcommands': {},
+        'flags': {},
+    },
+    'mkdir': {
+        'family': 'files',
+        'summary': "Create a folder",
+        'subcommands': {},
+        'flags': {
+            '-p': "Create parent folders as needed",
+        },
+        'with_args': "Create the folder {args}",
+    },
+    'rm': {
+        'family': 'files',
+        'summary': "Delete files",
+        'subcommands': {},
+        'flags': {
+            '-r': "Delete folders and everything in them",
+            '-f': "Don't ask, and ignore missing files",
+        },
+        'with_args': "Delete {args}",
+    },
+    'del': {
+        'family': 'files',
+        'summary': "Delete files",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Delete {args}",
+    },
+    'cp': {
+        'family': 'files',
+        'summary': "Copy files",
+        'subcommands': {},
+        'flags': {
+            '-r': "Copy folders and everything in them",
+        },
+        'with_args': "Copy {args}",
+    },
+    'copy': {
+        'family': 'files',
+        'summary': "Copy files",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Copy {args}",
+    },
+    'mv': {
+        'family': 'files',
+        'summary': "Move or rename files",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Move or rename {args}",
+    },
+    'touch': {
+        'family': 'files',
+        'summary': "Create an empty file (or update its timestamp)",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Create the file {args} (or update its timestamp)",
+    },
+    'cat': {
+        'family': 'files',
+        'summary': "Print a file",
+        'subcommands': {},
+        'flags': {
+            '-n': "Number the lines",
+        },
+        'with_args': "Print the contents of {args}",
+    },
+    'type': {
+        'family': 'files',
+        'summary': "Print a file",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Print the contents of {args}",
+    },
+    'chmod': {
+        'family': 'files',
+        'summary': "Change file permissions",
+        'subcommands': {},
+        'flags': {
+            '-R': "Include subfolders",
+        },
+        'with_args': "Change the permissions: {args}",
+    },
+    'tar': {
+        'family': 'files',
+        'summary': "Create or extract a tar archive",
+        'subcommands': {},
+        'flags': {
+            '-x': "Extract",
+            '-c': "Create",
+            '-z': "gzip compression",
+            '-v': "List the files as they are processed",
+            '-f <archive>': "Archive file",
+        },
+    },
+
+    # --- Searching ---
+    'grep': {
+        'family': 'search',
+        'summary': "Search text for a pattern",
+        'subcommands': {},
+        'flags': {
+            '-r': "Search folders recursively",
+            '-i': "Ignore case",
+            '-n': "Show line numbers",
+            '-v': "Show lines that do not match",
+            '-l': "Only list matching files",
+        },
+        'with_args': "Search for {args}",
+    },
+    'find': {
+        'family': 'search',
+        'summary': "Find files",
+        'subcommands': {},
+        'flags': {
+            '-name <pattern>': "Match file names against the pattern",
+            '-type <kind>': "Only files (f) or folders (d)",
+        },
+        'with_args': "Find files in {args}",
+    },
+
+    # --- Network and remote access ---
+    'curl': {
+        'family': 'network',
+        'summary': "Make an HTTP request",
+        'subcommands': {},
+        'flags': {
+            '-X <method>': "HTTP method",
+            '-H <header>': "Send this header",
+            '-d <data>': "Send this request body",
+            '-o <file>': "Save the response to a file",
+            '-L': "Follow redirects",
+            '-s': "No progress output",
+            '-I': "Only fetch the headers",
+        },
+        'with_args': "Request {args}",
+    },
+    'wget': {
+        'family': 'network',
+        'summary': "Download a file",
+        'subcommands': {},
+        'flags': {
+            '-O <file>': "Save it under this name",
+        },
+        'with_args': "Download {args}",
+    },
+    'ssh': {
+        'family': 'network',
+        'summary': "Open a remote shell",
+        'subcommands': {},
+        'flags': {
+            '-i <key>': "Log in with this private key",
+            '-p <port>': "Connect to this port",
+        },
+        'with_args': "Open a remote shell on {args}",
+    },
+    'scp': {
+        'family': 'network',
+        'summary': "Copy files to or from another machine",
+        'subcommands': {},
+        'flags': {
+            '-r': "Copy folders and everything in them",
+        },
+        'with_args': "Copy {args} over SSH",
+    },
+    'ping': {
+        'family': 'network',
+        'summary': "Check that a host responds",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Check that {args} responds",
+    },
+    'ipconfig': {
+        'family': 'network',
+        'summary': "Show the network configuration",
+        'subcommands': {},
+        'flags': {
+            '/all': "Full details",
+        },
+    },
+
+    # --- System packages ---
+    'apt': {
+        'family': 'system',
+        'summary': "Manage system packages",
+        'subcommands': {
+            'update': ("Refresh the list of available packages", {}),
+            'upgrade': ("Upgrade the installed packages", {}),
+            'install': ("Install system packages", {
+                '-y': "Don't ask for confirmation",
+            }, "Install the system package(s) {args}"),
+            'remove': ("Remove system packages", {}, "Remove the system package(s) {args}"),
+        },
+        'flags': {},
+    },
+    'brew': {
+        'family': 'system',
+        'summary': "Manage Homebrew packages",
+        'subcommands': {
+            'install': ("Install packages", {}, "Install {args} with Homebrew"),
+            'update': ("Update Homebrew itself", {}),
+            'upgrade': ("Upgrade installed packages", {}),
+        },
+        'flags': {},
+    },
+    'winget': {
+        'family': 'system',
+        'summary': "Manage Windows packages",
+        'subcommands': {
+            'install': ("Install a package", {}, "Install {args} with winget"),
+            'upgrade': ("Upgrade installed packages", {}),
+            'search': ("Search for packages", {}, "Search for {args}"),
+        },
+        'flags': {},
+    },
+
+    # --- Building ---
+    'make': {
+        'family': 'build',
+        'summary': "Build the project's default target",
+        'subcommands': {},
+        'flags': {
+            '-j <jobs>': "Run this many jobs in parallel",
+        },
+        'with_args': "Build the make target {args}",
+    },
+    'cmake': {
+        'family': 'build',
+        'summary': "Configure or build a CMake project",
+        'subcommands': {},
+        'flags': {
+            '-S <dir>': "Source folder",
+            '-B <dir>': "Build folder",
+            '--build <dir>': "Build the configured project in this folder",
+        },
+    },
+    'cargo': {
+        'family': 'build',
+        'summary': "Run Rust's package manager",
+        'subcommands': {
+            'build': ("Compile the project", {
+                '--release': "Optimized build",
+            }),
+            'run': ("Build and run the project", {
+                '--release': "Optimized build",
+            }),
+            'test': ("Run the tests", {}),
+            'add': ("Add a dependency", {}, "Add the dependency {args}"),
+        },
+        'flags': {},
+    },
+    'go': {
+        'family': 'build',
+        'summary': "Run the Go toolchain",
+        'subcommands': {
+            'build': ("Compile the packages", {}),
+            'run': ("Compile and run a program", {}, "Compile and run {args}"),
+            'test': ("Run the tests", {
+                '-v': "One line per test",
+            }),
+            'mod': ("Manage the module's dependencies", {}),
+            'get': ("Add a dependency", {}, "Add the dependency {args}"),
+        },
+        'flags': {},
+    },
+
+    # --- Shell ---
+    'echo': {
+        'family': 'shell',
+        'summary': "Print an empty line",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Print {args}",
+    },
+    'export': {
+        'family': 'shell',
+        'summary': "List exported environment variables",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Set the environment variable {args}",
+    },
+    'set': {
+        'family': 'shell',
+        'summary': "List environment variables",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Set the environment variable {args}",
+    },
+    'source': {
+        'family': 'shell',
+        'summary': "Run a script in the current shell",
+        'subcommands': {},
+        'flags': {},
+        'with_args': "Load {args} into the current shell",
+    },
+    'clear': {
+        'family': 'shell',
+        'summary': "Clear the terminal",
+        'subcommands': {},
+        'flags': {},
+    },
+    'cls': {
+        'family': 'shell',
+        'summary': "Clear the terminal",
+        'subcommands': {},
+        'flags': {},
+    },
+}
+
+# Other names the same programs go by
+ALIASES = {
+    'pip3': 'pip',
+    'python3': 'python',
+    'py': 'python',
+    'pnpm': 'npm',
+    'apt-get': 'apt',
+    'ls.exe': 'ls',
+    'dir.exe': 'dir',
+    'erase': 'del',
+    'md': 'mkdir',
+    'move': 'mv',
+    'ren': 'mv',
+}
+
+# Words that run the command after them (explained as that command)
+WRAPPERS = {'sudo', 'time', 'nohup', 'exec'}
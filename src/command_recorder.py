@@ -2,6 +2,8 @@
 Command Recorder - Detects terminal windows and captures commands.
 """
 
+import logging
+import queue
 import sys
 import threading
 import time
@@ -20,24 +22,25 @@ if sys.platform == 'win32':
         win32gui = None
         win32con = None
         win32ui = None
-    
-    try:
-        from pynput import keyboard, mouse
-        PYNPUT_AVAILABLE = True
-    except ImportError:
-        PYNPUT_AVAILABLE = False
-        keyboard = None
-        mouse = None
 else:
-    # Placeholder for non-Windows (not implemented)
     WIN32_AVAILABLE = False
-    PYNPUT_AVAILABLE = False
     win32gui = None
     win32con = None
     win32ui = None
+
+try:
+    from pynput import keyboard, mouse
+    PYNPUT_AVAILABLE = True
+except Exception:
+    # Not installed, or no display to hook into (e.g. a headless Linux server)
+    PYNPUT_AVAILABLE = False
     keyboard = None
     mouse = None
 
+from .latency import CaptureTrace, LatencyTracker
+
+logger = logging.getLogger(__name__)
+
 
 class CommandRecorder:
     """Records commands from terminal windows."""
@@ -49,16 +52,32 @@ class CommandRecorder:
         'windows terminal',
         'command prompt',
         'terminal',
-        'pwsh.exe'
+        'pwsh.exe',
+        'xterm',
+        'konsole',
+        'alacritty',
+        'kitty',
+        'urxvt',
     ]
     
-    def __init__(self, on_command_captured=None, session_manager=None):
+    def __init__(self, on_command_captured=None, session_manager=None,
+                 streaming_ocr=False, on_command_recognized=None, ocr_options=None,
+                 capture_backend=None, image_encoder=None):
         """
         Initialize command recorder.
         
         Args:
             on_command_captured: Callback function(command, screenshot_path, timestamp)
             session_manager: Optional SessionManager instance for organizing files
+            streaming_ocr: Run OCR in the background while recording instead of
+                           deferring all of it until stop_recording
+            on_command_recognized: Callback function(command, screenshot_path) called
+                                   from the streaming OCR thread as results arrive
+            ocr_options: Optional keyword arguments for extract_terminal_text used
+                         by streaming OCR, e.g. {'delta': True, 'bottom_up': True}
+            capture_backend: Capture backend name ('win32', 'x11', 'screen'), or
+                             None to pick the best one for this platform
+            image_encoder: Optional ImageEncoder for saved screenshots (default PNG)
         """
         self.is_recording = False
         self.detected_terminal = None
@@ -84,6 +103,57 @@ class CommandRecorder:
         # Last capture time for debouncing
         self.last_capture_time = 0
         self.min_capture_interval = 2.0  # Minimum seconds between captures
+        
+        # In-memory frame handoff: captures go to the OCR queue as raw frames
+        # while the frame writer persists them to disk in the background
+        from .frame_writer import FrameWriter
+        self.frame_writer = FrameWriter(encoder=image_encoder)
+        # Grabber opened once per recording (keeps handles and frame buffers
+        # alive); also used to find terminal windows
+        self.capture_backend_name = capture_backend
+        self.capture_backend = None
+        # Items: (screenshot_path, frame or None, region)
+        self.ocr_queue: queue.Queue = queue.Queue()
+        # Frames beyond this many are dropped from memory; OCR reads them from disk
+        self.max_frames_in_memory = 64
+        self._frames_in_memory = 0
+        self._frames_lock = threading.Lock()
+        
+        # Optional streaming OCR (runs only while no capture is in progress)
+        self.streaming_ocr = streaming_ocr
+        self.on_command_recognized = on_command_recognized
+        self.ocr_options = ocr_options
+        self.streaming_worker = None
+        self._capture_idle = threading.Event()
+        self._capture_idle.set()
+        self.streaming_stop_timeout = 10.0  # Max seconds to wait for the in-flight OCR
+        
+        # Optional region capture: grab only the command area (plus the focus
+        # region) with a margin, and a full-window keyframe every N captures
+        self.region_capture = False
+        self.region_margin = 32
+        self.keyframe_interval = 10
+        self._keyframe_hwnd = None
+        self._captures_since_keyframe = 0
+        self.capture_stats: Dict[str, int] = {}
+        self._reset_capture_stats()
+        
+        # Optional pre-keypress sampling: a low-rate ring buffer of the tracked
+        # terminal, so a capture shows the screen from just before Enter
+        self.pre_capture_sampling = False
+        self.sampler_fps = 6.0
+        self.sampler_max_bytes = 64 * 1024 * 1024
+        self.frame_sampler = None
+        
+        # Stage timing for every capture (keypress -> grab -> write -> OCR);
+        # latency_trace also keeps each capture's timestamps for write_trace()
+        self.latency = LatencyTracker()
+        self.latency_trace = False
+        
+        # Optional background previews of each capture, made from the in-memory
+        # frame into the session's thumbnail cache (see ThumbnailService)
+        self.background_thumbnails = False
+        self.thumbnail_service = None
     
     def start_recording(self):
         """Start recording commands."""
@@ -94,13 +164,56 @@ class CommandRecorder:
         self._stop_monitoring = False
         self.command_history = []
         self.detected_terminal = None
+        self.ocr_queue = queue.Queue()
+        self._frames_in_memory = 0
+        self._keyframe_hwnd = None
+        self._reset_capture_stats()
+        self.latency.reset()
+        self.latency.keep_traces = self.latency_trace
+        self.frame_writer.latency = self.latency
+        # Deduplicate screenshots into the session's content-addressed store
+        if self.session_manager:
+            self.frame_writer.store = self.session_manager.screenshot_store
+            self.frame_writer.writer = self.session_manager.writer
+            if self.background_thumbnails:
+                self.thumbnail_service = self.session_manager.thumbnails
+        self.frame_writer.start()
+        try:
+            from .capture_backend import create_capture_backend
+            self.capture_backend = create_capture_backend(self.capture_backend_name).open()
+        except Exception:
+            # No way to grab the screen (e.g. no display); nothing will be captured
+            self.capture_backend = None
+        
+        # Start sampling the tracked terminal if requested (needs an open backend)
+        if self.pre_capture_sampling and self.capture_backend is not None and self._windows_supported():
+            from .frame_sampler import FrameSampler
+            self.frame_sampler = FrameSampler(
+                self.capture_backend.grab_window,
+                lambda: self.detected_terminal,
+                fps=self.sampler_fps,
+                max_bytes=self.sampler_max_bytes
+            ).start()
+        
+        # Start background OCR if requested
+        if self.streaming_ocr:
+            from .ocr_pipeline import StreamingOcr
+            self.streaming_worker = StreamingOcr(
+                self.ocr_queue,
+                self._capture_idle,
+                on_result=self._on_ocr_result,
+                on_item_done=self._release_frame,
+                default_hwnd=lambda: self.detected_terminal,
+                ocr_options=self.ocr_options
+            )
+            self.streaming_worker.start()
         
         # Start monitoring threads
         self.window_monitor_thread = threading.Thread(target=self._monitor_windows, daemon=True)
         self.window_monitor_thread.start()
         
         # Start keyboard listener
-        if sys.platform == 'win32' and PYNPUT_AVAILABLE and keyboard:
+        if PYNPUT_AVAILABLE and keyboard:
             try:
                 self.keyboard_listener = keyboard.Listener(on_press=self._on_key_press)
                 self.keyboard_listener.start()
@@ -126,6 +239,19 @@ class CommandRecorder:
         """
         Stop recording and return command history.
         This should ONLY be called explicitly by the user via button press.
+        Blocks until every capture is on disk; a UI should call request_stop()
+        and leave finish_recording() to a worker thread instead.
+        """
+        self.request_stop()
+        return self.finish_recording()
+    
+    def request_stop(self):
+        """
+        Stop taking captures without waiting for background work to drain.
+        Cheap enough to call on the UI thread.
+        
+        Returns:
+            Copy of the command history (commands not yet filled in by streaming OCR)
         """
         # Set flags to stop monitoring
         self._stop_monitoring = True
@@ -152,14 +278,59 @@ class CommandRecorder:
         
         # Mark recording as stopped
         self.is_recording = False
+        return self.command_history.copy()
+    
+    def finish_recording(self):
+        """
+        Wait for the background writers and OCR after request_stop().
+        Joins threads and flushes files, so call it off the UI thread.
+        
+        Returns:
+            Command history with commands already recognized while recording filled in
+        """
+        # A capture already under way still hands its frame to the writer
+        self._capture_idle.wait(timeout=self.streaming_stop_timeout)
+        
+        # Stop sampling before the backend it grabs through goes away
+        if self.frame_sampler:
+            self.frame_sampler.stop()
+            self.frame_sampler = None
+        
+        # Make sure every screenshot (and preview) is on disk before processing begins
+        self.frame_writer.stop()
+        if self.thumbnail_service:
+            self.thumbnail_service.stop()
+            self.thumbnail_service = None
+        if self.session_manager:
+            self.session_manager.writer.flush()
+        if self.capture_backend:
+            self.capture_backend.close()
+            self.capture_backend = None
+        
+        # Finish the capture being OCR'd in the background; the rest stays queued
+        if self.streaming_worker:
+            self.streaming_worker.stop(timeout=self.streaming_stop_timeout)
+            recognized = self.streaming_worker.get_results()
+            self.streaming_worker = None
+            
+            # Return history with already-recognized commands filled in
+            return [
+                (recognized.get(item[2], item[0]),) + tuple(item[1:])
+                for item in self.command_history
+            ]
         
         # Return a copy of the command history
         return self.command_history.copy()
     
+    def _windows_supported(self) -> bool:
+        """Whether the capture backend can find and capture individual windows."""
+        backend = self.capture_backend
+        return bool(backend and backend.supports_windows)
+    
     def _monitor_windows(self):
         """Monitor for terminal windows opening."""
         while not self._stop_monitoring and self.is_recording:
-            if sys.platform != 'win32' or not WIN32_AVAILABLE:
+            if not self._windows_supported():
                 time.sleep(1)
                 continue
             
@@ -174,54 +345,44 @@ class CommandRecorder:
             except Exception:
                 time.sleep(1)
     
+    def _is_terminal_title(self, window_title: str) -> bool:
+        """Check if a window title matches a terminal pattern."""
+        window_title = window_title.lower()
+        return any(pattern in window_title for pattern in self.TERMINAL_PATTERNS)
+    
     def _is_terminal_window(self, hwnd) -> bool:
         """Check if a window handle is a terminal window."""
-        if sys.platform != 'win32' or not WIN32_AVAILABLE:
+        if not self._windows_supported():
             return False
         
         try:
-            if not win32gui.IsWindowVisible(hwnd):
+            backend = self.capture_backend
+            if not backend.is_window_visible(hwnd):
                 return False
-            
-            window_title = win32gui.GetWindowText(hwnd).lower()
-            for pattern in self.TERMINAL_PATTERNS:
-                if pattern in window_title:
-                    return True
-            return False
+            return self._is_terminal_title(backend.get_window_title(hwnd))
         except Exception:
             return False
     
     def _find_terminal_window(self) -> Optional[int]:
         """Find active terminal window handle."""
-        if sys.platform != 'win32' or not WIN32_AVAILABLE:
+        if not self._windows_supported():
             return None
         
-        foreground_window = win32gui.GetForegroundWindow()
-        terminal_windows = []
-        
-        def enum_handler(hwnd, ctx):
-            try:
-                if win32gui.IsWindowVisible(hwnd):
-                    window_title = win32gui.GetWindowText(hwnd).lower()
-                    for pattern in self.TERMINAL_PATTERNS:
-                        if pattern in window_title:
-                            ctx.append((hwnd, hwnd == foreground_window))
-                            break
-            except Exception:
-                pass
-            return True
-        
         try:
-            win32gui.EnumWindows(enum_handler, terminal_windows)
+            backend = self.capture_backend
+            foreground_window = backend.get_foreground_window()
+            terminal_windows = [
+                hwnd for hwnd, window_title in backend.list_windows()
+                if self._is_terminal_title(window_title)
+            ]
             
             # Prefer foreground window, but also accept any visible terminal
-            for hwnd, is_foreground in terminal_windows:
-                if is_foreground:
-                    return hwnd
+            if foreground_window in terminal_windows:
+                return foreground_window
             
             # If no foreground terminal, return the first visible terminal
             if terminal_windows:
-                return terminal_windows[0][0]
+                return terminal_windows[0]
             
             return None
         except Exception:
@@ -241,13 +402,15 @@ class CommandRecorder:
             if key == keyboard.Key.enter:
                 # Debounce: don't capture too frequently
                 current_time = time.time()
+                pressed_at = current_time
+                trace = CaptureTrace()
                 if current_time - self.last_capture_time < self.min_capture_interval:
                     return True
                 
                 # Check if terminal is still active
-                if sys.platform == 'win32' and WIN32_AVAILABLE:
+                if self._windows_supported():
                     try:
-                        active_window = win32gui.GetForegroundWindow()
+                        active_window = self.capture_backend.get_foreground_window()
                         # Check if active window is a terminal (might be different from detected_terminal)
                         if active_window == self.detected_terminal or self._is_terminal_window(active_window):
                             # Update detected terminal if it changed
@@ -268,10 +431,10 @@ class CommandRecorder:
                                         self.detected_terminal = current_terminal
                                     
                                     # Capture the command immediately (before execution)
-                                    self._capture_command()
+                                    self._capture_command(pressed_at, trace)
                                 except Exception:
                                     # Don't let capture errors stop recording
-                                    pass
+                                    logger.warning("Capture failed", exc_info=True)
                             
                             capture_thread = threading.Thread(target=immediate_capture, daemon=True)
                             capture_thread.start()
@@ -284,15 +447,27 @@ class CommandRecorder:
         # Return True to keep the listener running
         return True
     
-    def _capture_command(self):
-        """Capture command from terminal window."""
+    def _capture_command(self, pressed_at: Optional[float] = None,
+                         trace: Optional[CaptureTrace] = None):
+        """
+        Capture command from terminal window.
+        
+        Args:
+            pressed_at: time.time() of the Enter keypress; with pre-capture
+                        sampling, the last frame sampled before it is used
+            trace: CaptureTrace started at the keypress (None starts one now)
+        """
         # Double-check recording is still active
         if not self.is_recording:
             return
             
-        if not self.detected_terminal or sys.platform != 'win32' or not WIN32_AVAILABLE:
+        if not self.detected_terminal or not self._windows_supported():
             return
         
+        # Hold off streaming OCR until this capture is done
+        self._capture_idle.clear()
+        captured_frame = None
+        trace = trace or CaptureTrace()
         try:
             # Update last capture time
             self.last_capture_time = time.time()
@@ -309,8 +484,37 @@ class CommandRecorder:
                 # If region tracking fails, continue without it
                 pass
             
-            # Capture screenshot of terminal window (just save, don't process yet)
-            screenshot_path = self._capture_window_screenshot(self.detected_terminal)
+            # Prefer the screen as it was before Enter, if it was sampled
+            trace.mark('grab_start')
+            screenshot_path, captured_frame = self._take_sampled_frame(
+                self.detected_terminal, pressed_at, trace
+            )
+            if captured_frame is None:
+                # Capture terminal window into memory (saved to disk in the background)
+                capture_region = self._plan_capture_region(self.detected_terminal, focus_region)
+                screenshot_path, captured_frame = self._capture_window_screenshot(
+                    self.detected_terminal, capture_region, trace
+                )
+            frame = captured_frame
+            if captured_frame is not None:
+                self._record_capture_stats(captured_frame)
+                # The saved image starts at the region's corner, not the window's
+                if captured_frame.is_region:
+                    from .capture import translate_region
+                    focus_region = translate_region(focus_region, captured_frame.offset)
+            
+            # Hand the raw frame to OCR, unless too many are already held in memory
+            if frame is not None:
+                with self._frames_lock:
+                    if self._frames_in_memory >= self.max_frames_in_memory:
+                        frame = None
+                    else:
+                        self._frames_in_memory += 1
+            self.ocr_queue.put((screenshot_path, frame.retain() if frame is not None else None,
+                                focus_region))
+            trace.mark('queued')
+            if self.thumbnail_service and captured_frame is not None:
+                self.thumbnail_service.submit(screenshot_path, frame=captured_frame)
             
             # Don't extract command text here - we'll do OCR later when processing
             # Just store empty command for now
@@ -335,48 +539,183 @@ class CommandRecorder:
                 except Exception:
                     # Don't let callback errors stop recording
                     pass
-        except Exception as e:
-            # Silently fail - don't interrupt user workflow or stop recording
+        except Exception:
+            # Don't interrupt user workflow or stop recording
             # Recording should continue even if one capture fails
-            pass
+            logger.warning("Capture failed", exc_info=True)
+            self.latency.record_failure('capture')
+        finally:
+            # The writer and OCR queue hold their own references by now
+            if captured_frame is not None:
+                captured_frame.release()
+            self._capture_idle.set()
     
-    def _capture_window_screenshot(self, hwnd) -> str:
-        """Capture screenshot of specific window."""
-        if sys.platform != 'win32' or not WIN32_AVAILABLE:
-            return ""
+    def take_frames(self) -> Dict[str, object]:
+        """
+        Drain the OCR queue.
+        
+        Returns:
+            Dict mapping screenshot_path -> in-memory Frame for captures
+            whose frame is still held in memory
+        """
+        frames = {}
+        while True:
+            try:
+                screenshot_path, frame, _ = self.ocr_queue.get_nowait()
+            except queue.Empty:
+                break
+            if frame is not None:
+                # The caller now owns the queue's reference, so the buffer is not recycled
+                frames[screenshot_path] = frame
+                self._release_frame(frame, recycle=False)
+        return frames
+    
+    def _release_frame(self, frame, recycle=True):
+        """
+        Return a consumed frame's slot to the in-memory frame budget.
+        With recycle, also drop the OCR queue's reference so a pooled buffer can be reused.
+        """
+        if frame is not None:
+            with self._frames_lock:
+                self._frames_in_memory -= 1
+            if recycle:
+                frame.release()
+    
+    def _new_screenshot_path(self) -> str:
+        """Get the path a new screenshot will be written to."""
+        # Use session manager if available, otherwise fallback to old location
+        extension = self.frame_writer.encoder.extension
+        if self.session_manager:
+            return str(self.session_manager.get_screenshot_path(extension=extension))
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
+        Path("docs/generated").mkdir(parents=True, exist_ok=True)
+        return f"docs/generated/command_{timestamp}{extension}"
+    
+    def _plan_capture_region(self, hwnd, focus_region) -> Optional[Dict]:
+        """
+        Decide what to grab for the next capture.
+        
+        Returns:
+            Window-relative region to grab, or None for a full-window keyframe
+        """
+        if not self.region_capture:
+            return None
+        
+        # Keyframe on the first capture of a window and every keyframe_interval captures
+        if hwnd != self._keyframe_hwnd or self._captures_since_keyframe >= self.keyframe_interval - 1:
+            self._keyframe_hwnd = hwnd
+            self._captures_since_keyframe = 0
+            return None
+        
+        window_size = self.capture_backend.get_window_size(hwnd) if self.capture_backend else None
+        if not window_size:
+            return None
+        self._captures_since_keyframe += 1
+        
+        from .capture import plan_capture_region
+        return plan_capture_region(window_size[0], window_size[1], focus_region, self.region_margin)
+    
+    def _reset_capture_stats(self):
+        self.capture_stats = {
+            'captures': 0,
+            'keyframes': 0,
+            'region_captures': 0,
+            'bytes_captured': 0,
+            'bytes_full_window': 0,
+            'sampled': 0,
+        }
+    
+    def _record_capture_stats(self, frame):
+        """Count a capture's size against what a full-window grab would have been."""
+        stats = self.capture_stats
+        stats['captures'] += 1
+        stats['region_captures' if frame.is_region else 'keyframes'] += 1
+        bytes_per_pixel = frame.nbytes // max(1, frame.width * frame.height)
+        stats['bytes_captured'] += frame.nbytes
+        stats['bytes_full_window'] += frame.window_size[0] * frame.window_size[1] * bytes_per_pixel
+    
+    def get_capture_stats(self) -> Dict:
+        """Capture counters, including the share of full-window bytes actually grabbed."""
+        stats = dict(self.capture_stats)
+        full = stats['bytes_full_window']
+        stats['bytes_ratio'] = round(stats['bytes_captured'] / full, 4) if full else 0.0
+        if self.frame_sampler:
+            stats['sampler'] = self.frame_sampler.get_stats()
+        return stats
+    
+    def _take_sampled_frame(self, hwnd, pressed_at: Optional[float],
+                            trace: Optional[CaptureTrace] = None) -> Tuple[str, Optional[object]]:
+        """
+        Use the last frame the sampler took before a keypress.
+        
+        Returns:
+            Tuple of (screenshot_path, Frame), or ("", None) if none qualifies
+        """
+        if not self.frame_sampler or pressed_at is None:
+            return "", None
+        frame = self.frame_sampler.frame_before(pressed_at, window=hwnd)
+        if frame is None:
+            return "", None
+        
+        screenshot_path = self._new_screenshot_path()
+        self._submit_frame(frame, screenshot_path, trace)
+        self.capture_stats['sampled'] += 1
+        return screenshot_path, frame
+    
+    def _submit_frame(self, frame, screenshot_path: str, trace: Optional[CaptureTrace]):
+        """Hand a grabbed frame to the frame writer, tracing it under its path."""
+        if trace is not None:
+            trace.mark('grabbed')
+            self.latency.attach(trace, screenshot_path)
+        self.frame_writer.submit(frame, screenshot_path)
+    
+    def _on_ocr_result(self, command: str, screenshot_path: str):
+        """Streaming OCR finished a capture: trace it, then pass it on."""
+        self.latency.mark(screenshot_path, 'ocr_done')
+        if self.on_command_recognized:
+            self.on_command_recognized(command, screenshot_path)
+    
+    def _capture_window_screenshot(self, hwnd, region=None,
+                                   trace: Optional[CaptureTrace] = None) -> Tuple[str, Optional[object]]:
+        """
+        Capture screenshot of specific window into memory.
+        The frame is queued on the frame writer, so the file appears shortly after.
+        
+        Args:
+            hwnd: Window to capture
+            region: Optional window-relative region to grab instead of the whole window
+            trace: Optional CaptureTrace to mark and register under the screenshot path
+        
+        Returns:
+            Tuple of (screenshot_path, Frame), or ("", None) if capture failed
+        """
+        if not self._windows_supported():
+            return "", None
         
         try:
-            # Use capture module's window capture function
-            from .capture import capture_window
-            
-            # Use session manager if available, otherwise fallback to old location
-            if self.session_manager:
-                screenshot_path = str(self.session_manager.get_screenshot_path())
-            else:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
-                screenshot_path = f"docs/generated/command_{timestamp}.png"
-                Path("docs/generated").mkdir(parents=True, exist_ok=True)
-            
-            capture_window(hwnd, screenshot_path)
-            return screenshot_path
+            # Use the recording's backend (falls back to full screen itself)
+            screenshot_path = self._new_screenshot_path()
+            frame = self.capture_backend.grab_window(hwnd, region)
         except Exception:
-            # Fallback: use full screen capture
+            # Fallback: grab the window's area of its monitor
+            logger.debug("Window grab failed, grabbing its screen area", exc_info=True)
+            self.latency.record_failure('grab')
             try:
-                from .capture import capture_screen
+                from .capture import grab_screen
                 
-                # Use session manager if available
-                if self.session_manager:
-                    screenshot_path = str(self.session_manager.get_screenshot_path())
-                else:
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
-                    screenshot_path = f"docs/generated/command_{timestamp}.png"
-                    Path("docs/generated").mkdir(parents=True, exist_ok=True)
-                
-                capture_screen(screenshot_path)
-                return screenshot_path
+                screenshot_path = self._new_screenshot_path()
+                # The backend is None when it could not be opened; grab the whole screen then
+                rect = self.capture_backend.get_window_rect(hwnd) if self.capture_backend else None
+                frame = grab_screen(rect)
             except Exception:
                 # Last resort: return empty path
-                return ""
+                logger.warning("Screen grab failed, capture skipped", exc_info=True)
+                self.latency.record_failure('grab_screen')
+                return "", None
+        
+        self._submit_frame(frame, screenshot_path, trace)
+        return screenshot_path, frame
     
     def _extract_terminal_command(self, hwnd) -> str:
         """Extract command text from terminal window."""
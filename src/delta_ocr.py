@@ -0,0 +1,206 @@
+"""
+Delta OCR - Only OCR the text lines that changed since the previous capture.
+Consecutive captures of one terminal differ mostly in the last few lines. Each
+frame is split into horizontal text-line bands; bands whose pixels match a band
+of the previous frame from the same window reuse its text, and only changed
+bands go to tesseract. Matching is by content hash, so scrolled lines still hit.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+def to_grayscale_array(img) -> np.ndarray:
+    """
+    Convert a PIL Image or NumPy frame buffer to a 2-D uint8 array.
+
+    Args:
+        img: PIL Image or H x W (x channels) NumPy array
+
+    Returns:
+        H x W uint8 array
+    """
+    if isinstance(img, Image.Image):
+        return np.asarray(img.convert('L'))
+    arr = np.asarray(img)
+    if arr.ndim == 3:
+        # Average the colour channels, ignoring any alpha channel
+        arr = arr[:, :, :3].mean(axis=2)
+    return arr.astype(np.uint8, copy=False)
+
+
+def segment_line_bands(gray: np.ndarray, threshold: int = 40, min_gap: int = 2,
+                       padding: int = 2) -> List[Tuple[int, int]]:
+    """
+    Find horizontal bands of rows that contain text.
+    The background colour is taken as the most common pixel value, so light and
+    dark terminal themes both work.
+
+    Args:
+        gray: H x W uint8 grayscale image
+        threshold: Minimum difference from the background for a pixel to count as ink
+        min_gap: Blank runs shorter than this many rows do not split a band
+        padding: Rows of margin added above and below each band
+
+    Returns:
+        List of (top, bottom) row ranges, bottom exclusive, in top-to-bottom order
+    """
+    if gray.size == 0:
+        return []
+
+    background = int(np.bincount(gray.ravel(), minlength=256).argmax())
+    ink_rows = (np.abs(gray.astype(np.int16) - background) > threshold).any(axis=1)
+
+    # Start/end indices of runs of ink rows
+    edges = np.diff(np.concatenate(([0], ink_rows.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    bands: List[Tuple[int, int]] = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if bands and start - bands[-1][1] < min_gap:
+            bands[-1] = (bands[-1][0], end)
+        else:
+            bands.append((start, end))
+
+    height = gray.shape[0]
+    return [(max(0, top - padding), min(height, bottom + padding)) for top, bottom in bands]
+
+
+def _band_hash(band: np.ndarray) -> str:
+    """Hash a band's pixels (shape included so equal bytes of other sizes differ)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{band.shape}".encode("utf-8"))
+    digest.update(np.ascontiguousarray(band).tobytes())
+    return digest.hexdigest()
+
+
+class DeltaOcr:
+    """
+    Band-level OCR that reuses text from the previous frame of the same window.
+    """
+
+    # Tesseract page segmentation mode for a single text line
+    LINE_PSM = 7
+
+    def __init__(self, max_windows: int = 16):
+        """
+        Initialize delta OCR.
+
+        Args:
+            max_windows: Number of windows whose previous frame is remembered
+        """
+        self.max_windows = max_windows
+        # window key -> {band hash: text} of the previous frame
+        self._previous: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def extract(self, img, ocr_func: Callable, window_key=None) -> str:
+        """
+        OCR a full frame band by band.
+
+        Args:
+            img: Decoded PIL Image or NumPy frame buffer
+            ocr_func: Function(pil_image, psm) -> text used for changed bands
+            window_key: Identifier of the window the frame came from (e.g. hwnd)
+
+        Returns:
+            Text of all bands joined top to bottom
+        """
+        if not isinstance(img, Image.Image):
+            img = Image.fromarray(img)
+        gray = to_grayscale_array(img)
+        bands = segment_line_bands(gray)
+
+        with self._lock:
+            previous = self._previous.get(window_key, {})
+
+        current: Dict[str, str] = {}
+        lines = []
+        pixels_ocrd = 0
+        reused = 0
+        for top, bottom in bands:
+            band_key = _band_hash(gray[top:bottom])
+            if band_key in current:
+                text = current[band_key]
+                reused += 1
+            elif band_key in previous:
+                text = previous[band_key]
+                reused += 1
+            else:
+                text = ocr_func(img.crop((0, top, img.width, bottom)), psm=self.LINE_PSM)
+                pixels_ocrd += (bottom - top) * img.width
+            current[band_key] = text
+            text = text.strip('\n')
+            if text.strip():
+                lines.append(text)
+
+        with self._lock:
+            self._previous[window_key] = current
+            self._previous.move_to_end(window_key)
+            while len(self._previous) > self.max_windows:
+                self._previous.popitem(last=False)
+
+            self.frames += 1
+            self.bands_total += len(bands)
+            self.bands_reused += reused
+            self.pixels_total += img.width * img.height
+            self.pixels_ocrd += pixels_ocrd
+
+        return '\n'.join(lines)
+
+    def reset(self, window_key=None):
+        """Forget the previous frame of one window (or of all windows if None)."""
+        with self._lock:
+            if window_key is None:
+                self._previous.clear()
+            else:
+                self._previous.pop(window_key, None)
+
+    def reset_stats(self):
+        """Zero the counters."""
+        self.frames = 0
+        self.bands_total = 0
+        self.bands_reused = 0
+        self.pixels_total = 0
+        self.pixels_ocrd = 0
+
+    def merge_stats(self, stats: Dict):
+        """Add counters reported by another process (e.g. an OCR pool worker)."""
+        with self._lock:
+            self.frames += stats.get('frames', 0)
+            self.bands_total += stats.get('bands_total', 0)
+            self.bands_reused += stats.get('bands_reused', 0)
+            self.pixels_total += stats.get('pixels_total', 0)
+            self.pixels_ocrd += stats.get('pixels_ocrd', 0)
+
+    def get_stats(self) -> Dict:
+        """Counters showing how much OCR the delta mode avoided."""
+        return {
+            'frames': self.frames,
+            'bands_total': self.bands_total,
+            'bands_reused': self.bands_reused,
+            'pixels_total': self.pixels_total,
+            'pixels_ocrd': self.pixels_ocrd,
+            'pixel_ratio': round(self.pixels_ocrd / self.pixels_total, 4) if self.pixels_total else 0.0,
+        }
+
+
+_delta_ocr: Optional[DeltaOcr] = None
+_delta_ocr_lock = threading.Lock()
+
+
+def get_delta_ocr() -> DeltaOcr:
+    """Get the process-wide delta OCR instance."""
+    global _delta_ocr
+    if _delta_ocr is None:
+        with _delta_ocr_lock:
+            if _delta_ocr is None:
+                _delta_ocr = DeltaOcr()
+    return _delta_ocr
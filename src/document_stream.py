@@ -0,0 +1,92 @@
+"""
+Document Stream - Writes generated documentation to disk while it is produced.
+LLM output arrives token by token; appending each token to the file would mean
+thousands of tiny writes, so text is buffered and appended in small batches
+(by size or age). Whatever was generated before a crash is already in the
+file, and replace() swaps in the finished document in one step at the end.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+# Append buffered text once it reaches this many characters...
+DEFAULT_FLUSH_CHARS = 256
+# ...or has waited this many seconds
+DEFAULT_FLUSH_INTERVAL = 0.25
+
+
+class DocumentStream:
+    """Buffered, append-only writer for a document being generated."""
+
+    def __init__(self, path, writer=None, flush_chars: int = DEFAULT_FLUSH_CHARS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """
+        Initialize document stream.
+
+        Args:
+            path: Document file (e.g. <session>/documentation.md)
+            writer: Optional SessionWriter that performs the file writes
+            flush_chars: Buffered characters that trigger an append
+            flush_interval: Seconds after which buffered text is appended anyway
+        """
+        self.path = Path(path)
+        self.writer = writer
+        self.flush_chars = flush_chars
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self.chars_written = 0
+        self.appends = 0
+
+    def write(self, text: str):
+        """Add generated text; it is appended to the file in batches."""
+        if not text:
+            return
+        with self._lock:
+            self._buffer.append(text)
+            self._buffered += len(text)
+            due = (self._buffered >= self.flush_chars
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Append everything buffered so far."""
+        with self._lock:
+            text = "".join(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            self._last_flush = time.monotonic()
+            if not text:
+                return
+            self.chars_written += len(text)
+            self.appends += 1
+            self._write(text, append=True)
+
+    def replace(self, text: str):
+        """Drop anything buffered and make text the whole document."""
+        with self._lock:
+            self._buffer = []
+            self._buffered = 0
+            self._last_flush = time.monotonic()
+            self.chars_written = len(text)
+            self._write(text, append=False)
+
+    def _write(self, text: str, append: bool):
+        """Write to the file (lock held, so appends stay in order)."""
+        if self.writer is not None:
+            self.writer.write(self.path, text, append=append)
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if append:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            temp = self.path.with_name(self.path.name + ".tmp")
+            with open(temp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temp, self.path)
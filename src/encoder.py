@@ -0,0 +1,99 @@
+"""
+Encoder - Configurable image encoding for saved screenshots.
+Frames are stored as PNG (with a chosen zlib level), lossless WebP, or QOI.
+Lossless WebP at a low method is both smaller and faster than PNG for terminal
+captures. QOI is not viewable in most markdown renderers, and Pillow's QOI
+writer is pure Python, so it only pays off with a native build. File
+extensions always follow the format actually written.
+"""
+
+import io
+from pathlib import Path
+from typing import Dict
+
+from PIL import Image
+
+Image.init()
+# Pillow writes QOI from 11.3 on
+QOI_AVAILABLE = 'QOI' in Image.SAVE
+WEBP_AVAILABLE = 'WEBP' in Image.SAVE
+
+# Every extension a screenshot may have been written with
+SCREENSHOT_EXTENSIONS = ('.png', '.webp', '.qoi', '.bmp')
+
+
+class ImageEncoder:
+    """Encodes frames in one configured format."""
+
+    # Format name -> (PIL format, file extension)
+    FORMATS = {
+        'png': ('PNG', '.png'),
+        'webp': ('WEBP', '.webp'),
+        'qoi': ('QOI', '.qoi'),
+    }
+
+    def __init__(self, format: str = 'png', compress_level: int = 6, webp_method: int = 4):
+        """
+        Initialize image encoder.
+
+        Args:
+            format: 'png', 'webp' (lossless) or 'qoi'; formats this Pillow
+                    cannot write fall back to fast PNG
+            compress_level: PNG zlib level, 0 (fastest) to 9 (smallest)
+            webp_method: WebP effort, 0 (fastest) to 6 (smallest)
+        """
+        if format not in self.FORMATS:
+            raise ValueError(f"Unsupported image format: {format}")
+        if (format == 'qoi' and not QOI_AVAILABLE) or (format == 'webp' and not WEBP_AVAILABLE):
+            format = 'png'
+            compress_level = 1
+        self.format = format
+        self.compress_level = compress_level
+        self.webp_method = webp_method
+
+    @property
+    def extension(self) -> str:
+        """File extension (with dot) for this format."""
+        return self.FORMATS[self.format][1]
+
+    def save_options(self) -> Dict:
+        """Keyword arguments for PIL's Image.save."""
+        if self.format == 'png':
+            return {'compress_level': self.compress_level}
+        if self.format == 'webp':
+            return {'lossless': True, 'method': self.webp_method}
+        return {}
+
+    def encode(self, frame, path) -> str:
+        """
+        Encode a frame and write it to path (the extension is not changed).
+
+        Args:
+            frame: Frame or PIL Image
+            path: Destination path
+
+        Returns:
+            The path written
+        """
+        img = frame if isinstance(frame, Image.Image) else frame.to_image()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        img.save(path, format=self.FORMATS[self.format][0], **self.save_options())
+        return str(path)
+
+    def encode_bytes(self, frame) -> bytes:
+        """Encode a frame in memory (used by benchmarks)."""
+        img = frame if isinstance(frame, Image.Image) else frame.to_image()
+        buffer = io.BytesIO()
+        img.save(buffer, format=self.FORMATS[self.format][0], **self.save_options())
+        return buffer.getvalue()
+
+    def describe(self) -> str:
+        """Short human-readable settings string."""
+        if self.format == 'png':
+            return f"png (level {self.compress_level})"
+        if self.format == 'webp':
+            return f"webp lossless (method {self.webp_method})"
+        return self.format
+
+    def __repr__(self):
+        return f"ImageEncoder({self.describe()})"
@@ -0,0 +1,121 @@
+"""
+Frame - Raw pixels from a screen or window grab, kept in memory.
+Lets captures go straight to OCR without an encode/decode round trip through disk.
+"""
+
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from PIL import Image
+
+
+class Frame:
+    """
+    A captured frame buffer.
+    Holds the raw bytes exactly as the grab produced them (BGRA from mss and
+    GDI bitmaps, or packed RGB) plus enough metadata to decode them.
+    """
+
+    # Pixel formats understood by to_image(), mapped to PIL raw decoder modes
+    RAW_MODES = {
+        'BGRA': 'BGRX',  # Alpha from screen grabs is meaningless, drop it
+        'BGRX': 'BGRX',
+        'RGB': 'RGB',
+    }
+
+    def __init__(self, data: bytes, width: int, height: int, pixel_format: str = 'BGRA',
+                 timestamp: Optional[float] = None, window_hwnd: Optional[int] = None,
+                 on_release: Optional[Callable[['Frame'], None]] = None,
+                 offset: Tuple[int, int] = (0, 0), window_size: Optional[Tuple[int, int]] = None):
+        """
+        Initialize frame.
+
+        Args:
+            data: Raw pixel bytes, top-down rows with no padding
+            width: Frame width in pixels
+            height: Frame height in pixels
+            pixel_format: One of 'BGRA', 'BGRX' or 'RGB'
+            timestamp: Grab time (time.time()), defaults to now
+            window_hwnd: Window the frame was grabbed from (None for full screen)
+            on_release: Called once the last holder releases the frame, e.g. to
+                        return a pooled buffer (see retain/release)
+            offset: (x, y) of the frame within the window, for region grabs
+            window_size: (width, height) of the whole window (defaults to the frame size)
+        """
+        if pixel_format not in self.RAW_MODES:
+            raise ValueError(f"Unsupported pixel format: {pixel_format}")
+        self.data = data
+        self.width = width
+        self.height = height
+        self.pixel_format = pixel_format
+        self.timestamp = timestamp or time.time()
+        self.window_hwnd = window_hwnd
+        self.offset = offset
+        self.window_size = window_size or (width, height)
+        # The creator holds the first reference
+        self._refs = 1
+        self._refs_lock = threading.Lock()
+        self._on_release = on_release
+
+    def retain(self) -> 'Frame':
+        """Add a holder (e.g. a queue the frame is handed to). Returns self."""
+        with self._refs_lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        """
+        Drop a holder. When the last one is gone the on_release hook runs and
+        the buffer must no longer be read. Frames without a hook just stay valid.
+        """
+        with self._refs_lock:
+            self._refs -= 1
+            if self._refs > 0 or self._on_release is None:
+                return
+            on_release, self._on_release = self._on_release, None
+        on_release(self)
+
+    def __getstate__(self):
+        # Sent to OCR worker processes: the copy owns its pixels outright
+        state = self.__dict__.copy()
+        del state['_refs_lock']
+        state['_refs'] = 1
+        state['_on_release'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._refs_lock = threading.Lock()
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height) of the frame."""
+        return self.width, self.height
+
+    @property
+    def is_region(self) -> bool:
+        """Whether this frame covers only part of its window."""
+        return self.offset != (0, 0) or self.window_size != self.size
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the raw buffer in bytes."""
+        return len(self.data)
+
+    def to_image(self) -> Image.Image:
+        """Wrap the raw buffer as an RGB PIL Image."""
+        return Image.frombuffer(
+            'RGB', self.size, self.data, 'raw', self.RAW_MODES[self.pixel_format], 0, 1
+        )
+
+    @classmethod
+    def from_image(cls, img: Image.Image, timestamp: Optional[float] = None,
+                   window_hwnd: Optional[int] = None) -> 'Frame':
+        """Create a frame from a PIL Image (converted to packed RGB)."""
+        img = img.convert('RGB')
+        return cls(img.tobytes(), img.width, img.height, 'RGB',
+                   timestamp=timestamp, window_hwnd=window_hwnd)
+
+    def __repr__(self):
+        return f"Frame({self.width}x{self.height}, {self.pixel_format}, hwnd={self.window_hwnd})"
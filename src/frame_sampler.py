@@ -0,0 +1,190 @@
+"""
+Frame Sampler - Low-rate background grabs of the tracked terminal.
+The Enter key handler only starts capturing after the key is down, by which
+time fast commands have often printed output or cleared the screen. The
+sampler keeps a small ring buffer of recent frames so a capture can use the
+last frame taken *before* the keypress instead.
+
+Frames are only added when the window's pixels change, so an idle terminal
+costs one grab and compare per tick and no memory. The buffer is capped in
+bytes; the oldest frames are released first.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+
+class FrameSampler:
+    """Background sampler keeping a bounded ring buffer of recent window frames."""
+
+    def __init__(self, grab: Callable, get_window: Callable[[], Optional[int]],
+                 fps: float = 6.0, max_bytes: int = 64 * 1024 * 1024,
+                 max_age: float = 10.0):
+        """
+        Initialize frame sampler.
+
+        Args:
+            grab: Function(window) -> Frame, e.g. a capture backend's grab_window
+            get_window: Function returning the window to sample (None = pause)
+            fps: Samples per second
+            max_bytes: Memory cap for buffered frames (the newest is always kept)
+            max_age: Seconds after which buffered frames are dropped
+        """
+        self.grab = grab
+        self.get_window = get_window
+        self.interval = 1.0 / max(0.1, fps)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # Entries: {'frame': Frame, 'last_seen': time the window last showed these pixels}
+        self._buffer: deque = deque()
+        self._buffered_bytes = 0
+        self._window = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.unchanged = 0
+        self.evicted = 0
+        self.hits = 0
+        self.misses = 0
+
+    def start(self) -> 'FrameSampler':
+        """Start sampling in a background thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and release every buffered frame."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.clear()
+
+    def clear(self):
+        """Release every buffered frame."""
+        with self._lock:
+            entries = list(self._buffer)
+            self._buffer.clear()
+            self._buffered_bytes = 0
+        for entry in entries:
+            entry['frame'].release()
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Bytes currently held by buffered frames."""
+        return self._buffered_bytes
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def _run(self):
+        """Sampling loop: grab the tracked window every interval until stopped."""
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                self.sample()
+            except Exception:
+                # Window closed or moved mid-grab; try again next tick
+                pass
+            self._stop.wait(max(0.0, self.interval - (time.time() - started)))
+
+    def sample(self):
+        """Take one sample of the tracked window (called by the sampling loop)."""
+        window = self.get_window()
+        if window != self._window:
+            # Frames of another window are no use for this one
+            self.clear()
+            self._window = window
+        if window is None:
+            return
+
+        frame = self.grab(window)
+        now = time.time()
+        evicted = []
+        with self._lock:
+            self.samples += 1
+            newest = self._buffer[-1] if self._buffer else None
+            if newest is not None and self._same_pixels(newest['frame'], frame):
+                # Unchanged: the buffered frame is still what the window shows
+                newest['last_seen'] = now
+                self.unchanged += 1
+            else:
+                self._buffer.append({'frame': frame, 'last_seen': now})
+                self._buffered_bytes += frame.nbytes
+                frame = None
+            evicted = self._evict(now)
+        if frame is not None:
+            frame.release()
+        for entry in evicted:
+            entry['frame'].release()
+
+    @staticmethod
+    def _same_pixels(a, b) -> bool:
+        return (a.size == b.size and a.offset == b.offset
+                and a.pixel_format == b.pixel_format and a.data == b.data)
+
+    def _evict(self, now: float):
+        """Drop the oldest frames over the byte cap or age limit (lock held)."""
+        evicted = []
+        while len(self._buffer) > 1 and (
+                self._buffered_bytes > self.max_bytes
+                or now - self._buffer[0]['last_seen'] > self.max_age):
+            entry = self._buffer.popleft()
+            self._buffered_bytes -= entry['frame'].nbytes
+            evicted.append(entry)
+        self.evicted += len(evicted)
+        return evicted
+
+    def frame_before(self, timestamp: float, window=None, max_staleness: Optional[float] = None):
+        """
+        Get the last frame taken before a moment (e.g. a keypress).
+
+        Args:
+            timestamp: time.time() of the moment
+            window: Only accept frames of this window (None = any)
+            max_staleness: How long before the moment the window must last have
+                           been seen with these pixels (default two intervals)
+
+        Returns:
+            Frame, retained for the caller (release it when done), or None
+        """
+        if max_staleness is None:
+            max_staleness = 2 * self.interval
+        with self._lock:
+            if window is not None and window != self._window:
+                self.misses += 1
+                return None
+            for index in range(len(self._buffer) - 1, -1, -1):
+                entry = self._buffer[index]
+                if entry['frame'].timestamp > timestamp:
+                    continue
+                # A later frame proves these pixels were on screen until it was taken
+                is_newest = index == len(self._buffer) - 1
+                seen = timestamp if not is_newest else entry['last_seen']
+                if timestamp - seen > max_staleness:
+                    break
+                self.hits += 1
+                return entry['frame'].retain()
+            self.misses += 1
+            return None
+
+    def get_stats(self) -> Dict:
+        """Sampler counters suitable for session metadata."""
+        with self._lock:
+            return {
+                'fps': round(1.0 / self.interval, 2),
+                'samples': self.samples,
+                'unchanged': self.unchanged,
+                'buffered_frames': len(self._buffer),
+                'buffered_bytes': self._buffered_bytes,
+                'evicted': self.evicted,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
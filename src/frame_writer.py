@@ -0,0 +1,163 @@
+"""
+Frame Writer - Persists captured frames to disk off the capture hot path.
+Captures hand their in-memory frames to a small pool of background encoder
+threads that encode them (see encoder.py) and write them into the session's
+screenshots/ folder. Pillow releases the GIL while compressing, so several
+frames encode in parallel.
+"""
+
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from .encoder import ImageEncoder
+except ImportError:
+    # Imported as a top-level module (e.g. from main.py)
+    from encoder import ImageEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class FrameWriter:
+    """Background encoder threads that save frames."""
+
+    def __init__(self, encoder: Optional[ImageEncoder] = None, workers: int = 2, store=None):
+        """
+        Initialize frame writer.
+
+        Args:
+            encoder: ImageEncoder used for every frame (None = default PNG)
+            workers: Number of encoder threads
+            store: Optional ScreenshotStore; identical frames are then encoded
+                   once and linked instead of written again
+        """
+        self.encoder = encoder or ImageEncoder()
+        self.store = store
+        # Optional LatencyTracker; frames are marked as they are encoded and written
+        self.latency = None
+        # Optional SessionWriter: frames are encoded here and written by its thread
+        self.writer = None
+        self.workers = max(1, workers)
+        self._queue: queue.Queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # Paths whose write failed (OCR can still use the in-memory frame)
+        self.failed_paths: List[str] = []
+        self.written_count = 0
+        self.bytes_written = 0
+        self.encode_seconds = 0.0
+
+    def start(self):
+        """Start the encoder threads (no-op if already running)."""
+        with self._lock:
+            if any(thread.is_alive() for thread in self._threads):
+                return
+            self._threads = [
+                threading.Thread(target=self._run, daemon=True) for _ in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def submit(self, frame, screenshot_path: str):
+        """
+        Queue a frame to be written to screenshot_path.
+        Returns immediately; the file appears once the writer catches up.
+        The writer holds its own reference to the frame until it is written.
+        """
+        self.start()
+        # The store slot is taken here, on the capturing thread, to keep capture order
+        slot = self.store.reserve(screenshot_path) if self.store is not None else None
+        self._queue.put((frame.retain(), screenshot_path, slot))
+
+    def flush(self):
+        """Block until every submitted frame has been written (or has failed)."""
+        if any(thread.is_alive() for thread in self._threads):
+            self._queue.join()
+
+    def stop(self):
+        """Write any pending frames, then stop the encoder threads."""
+        with self._lock:
+            threads = self._threads
+            self._threads = []
+        alive = [thread for thread in threads if thread.is_alive()]
+        for _ in alive:
+            self._queue.put(None)
+        for thread in alive:
+            thread.join()
+
+    @property
+    def pending_count(self) -> int:
+        """Number of frames waiting to be written."""
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict:
+        """Encoder counters suitable for session metadata."""
+        return {
+            'format': self.encoder.describe(),
+            'written': self.written_count,
+            'failed': len(self.failed_paths),
+            'bytes_written': self.bytes_written,
+            'avg_encode_ms': round(self.encode_seconds / self.written_count * 1000, 2)
+            if self.written_count else 0.0,
+        }
+
+    def _run(self):
+        """Encoder loop: encode and save frames until a stop sentinel arrives."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                frame, screenshot_path, slot = item
+                try:
+                    started = time.perf_counter()
+                    if self.latency is not None:
+                        self.latency.mark(screenshot_path, 'encode_start', started)
+                    if self.store is not None:
+                        written_path = self.store.put(frame, screenshot_path, self.encoder, slot)
+                    elif self.writer is not None:
+                        self._write_async(frame, screenshot_path)
+                        written_path = None
+                    else:
+                        written_path = self.encoder.encode(frame, screenshot_path)
+                    elapsed = time.perf_counter() - started
+                    if written_path is not None:
+                        self._record_written(screenshot_path, Path(written_path).stat().st_size)
+                    with self._lock:
+                        self.encode_seconds += elapsed
+                except Exception:
+                    # Don't let one bad write stop the writer
+                    self._record_failed(screenshot_path)
+                frame.release()
+            finally:
+                self._queue.task_done()
+
+    def _write_async(self, frame, screenshot_path: str):
+        """Encode here and queue the bytes on the session writer."""
+        data = self.encoder.encode_bytes(frame)
+
+        def on_done(future):
+            if future.exception() is not None:
+                self._record_failed(screenshot_path, future.exception())
+            else:
+                self._record_written(screenshot_path, len(data))
+
+        self.writer.write(screenshot_path, data).add_done_callback(on_done)
+
+    def _record_written(self, screenshot_path: str, size: int):
+        if self.latency is not None:
+            self.latency.mark(screenshot_path, 'written')
+        with self._lock:
+            self.written_count += 1
+            self.bytes_written += size
+
+    def _record_failed(self, screenshot_path: str, error=None):
+        logger.warning("Could not write %s", screenshot_path, exc_info=error or True)
+        with self._lock:
+            self.failed_paths.append(screenshot_path)
+        if self.latency is not None:
+            self.latency.record_failure('write')
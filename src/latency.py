@@ -0,0 +1,202 @@
+"""
+Latency - Per-capture stage timing aggregated into per-session histograms.
+Each capture gets a trace that records a monotonic timestamp (perf_counter)
+as it passes each stage:
+
+    keypress -> grab_start -> grabbed -> queued -> encode_start -> written
+                                                -> ocr_done
+
+The tracker turns those into durations for the intervals below and reports
+p50/p95/p99 plus bucketed counts, for session_info.json. Failures per stage
+are counted too, so swallowed errors still show up in the session metadata.
+"""
+
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Stages in the order a capture passes them
+STAGES = ('keypress', 'grab_start', 'grabbed', 'queued', 'encode_start', 'written', 'ocr_done')
+
+# Reported intervals: name -> (from stage, to stage)
+INTERVALS = {
+    'dispatch': ('keypress', 'grab_start'),      # Listener thread hop and window checks
+    'grab': ('grab_start', 'grabbed'),
+    'handoff': ('grabbed', 'queued'),            # Path, writer and OCR queue handoff
+    'write_wait': ('queued', 'encode_start'),    # Time in the frame writer queue
+    'encode_write': ('encode_start', 'written'),
+    'ocr': ('queued', 'ocr_done'),               # Includes time waiting for OCR
+    'keypress_to_disk': ('keypress', 'written'),
+    'end_to_end': ('keypress', 'ocr_done'),
+}
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+
+    Args:
+        sorted_values: Values in ascending order (must not be empty)
+        fraction: Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        The value at that rank
+    """
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize_durations(durations_ms: List[float]) -> Dict:
+    """Percentiles and bucketed counts for a list of durations in ms."""
+    values = sorted(durations_ms)
+    buckets = {}
+    for value in values:
+        label = next((f"<={bound}" for bound in BUCKET_BOUNDS_MS if value <= bound),
+                     f">{BUCKET_BOUNDS_MS[-1]}")
+        buckets[label] = buckets.get(label, 0) + 1
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 0.50), 3),
+        'p95_ms': round(percentile(values, 0.95), 3),
+        'p99_ms': round(percentile(values, 0.99), 3),
+        'max_ms': round(values[-1], 3),
+        'mean_ms': round(sum(values) / len(values), 3),
+        'buckets': buckets,
+    }
+
+
+class CaptureTrace:
+    """Stage timestamps of one capture."""
+
+    def __init__(self, started: Optional[float] = None):
+        """
+        Initialize capture trace.
+
+        Args:
+            started: perf_counter() of the keypress, defaults to now
+        """
+        self.marks: Dict[str, float] = {'keypress': started or time.perf_counter()}
+        self.key: Optional[str] = None
+
+    def mark(self, stage: str, at: Optional[float] = None):
+        """Record when the capture reached a stage (the first mark wins)."""
+        self.marks.setdefault(stage, at or time.perf_counter())
+
+    def durations_ms(self) -> Dict[str, float]:
+        """Durations of every reported interval this capture has both ends of."""
+        return {
+            name: (self.marks[end] - self.marks[start]) * 1000
+            for name, (start, end) in INTERVALS.items()
+            if start in self.marks and end in self.marks
+        }
+
+    def to_dict(self) -> Dict:
+        """Stage offsets from the keypress in ms, for the per-capture trace."""
+        origin = self.marks['keypress']
+        stages = sorted(self.marks.items(), key=lambda item: item[1])
+        return {
+            'capture': self.key,
+            'stages_ms': {stage: round((at - origin) * 1000, 3) for stage, at in stages},
+        }
+
+
+class LatencyTracker:
+    """Collects capture traces for a session."""
+
+    def __init__(self, keep_traces: bool = False):
+        """
+        Initialize latency tracker.
+
+        Args:
+            keep_traces: Keep every capture's stage timestamps for write_trace()
+                         (histograms are available either way)
+        """
+        self.keep_traces = keep_traces
+        self._lock = threading.Lock()
+        self._traces: Dict[str, CaptureTrace] = {}
+        self._failures: Dict[str, int] = {}
+
+    def reset(self):
+        """Forget all traces and failure counts (e.g. when a new recording starts)."""
+        with self._lock:
+            self._traces = {}
+            self._failures = {}
+
+    def attach(self, trace: CaptureTrace, key: str):
+        """
+        Register a trace under its capture key (the screenshot path), so later
+        stages running on other threads can mark it by key.
+        """
+        trace.key = key
+        with self._lock:
+            self._traces[key] = trace
+
+    def mark(self, key: str, stage: str, at: Optional[float] = None):
+        """Record a stage for the capture with this key (ignored for unknown keys)."""
+        with self._lock:
+            trace = self._traces.get(key)
+        if trace is not None:
+            trace.mark(stage, at)
+
+    def record_failure(self, stage: str):
+        """Count a failure at a stage."""
+        with self._lock:
+            self._failures[stage] = self._failures.get(stage, 0) + 1
+
+    def get_histograms(self) -> Dict:
+        """
+        Latency summary suitable for session metadata.
+
+        Returns:
+            Dict with capture and failure counts and, per interval, percentiles
+            and bucketed counts in ms
+        """
+        with self._lock:
+            traces = list(self._traces.values())
+            failures = dict(self._failures)
+        durations: Dict[str, List[float]] = {}
+        for trace in traces:
+            for name, value in trace.durations_ms().items():
+                durations.setdefault(name, []).append(value)
+        return {
+            'captures': len(traces),
+            'failures': failures,
+            'intervals': {
+                name: summarize_durations(durations[name])
+                for name in INTERVALS if name in durations
+            },
+        }
+
+    def write_trace(self, path, writer=None) -> Optional[Path]:
+        """
+        Write the per-capture trace as JSON lines (only with keep_traces).
+
+        Args:
+            path: Destination file
+            writer: Optional SessionWriter to queue the write on
+
+        Returns:
+            Path written, or None if traces are off or the write failed
+        """
+        if not self.keep_traces:
+            return None
+        with self._lock:
+            traces = list(self._traces.values())
+        path = Path(path)
+        if writer is not None:
+            writer.write(path, "".join(json.dumps(trace.to_dict()) + "\n" for trace in traces))
+            return path
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                for trace in traces:
+                    f.write(json.dumps(trace.to_dict()) + "\n")
+            return path
+        except OSError:
+            return None
@@ -0,0 +1,205 @@
+"""
+LLM Cache - Persistent cache of chat completions.
+Regenerating a session's documentation, or re-running the manual capture on an
+unchanged screen, sends the exact same prompt again. Completions are stored in
+a SQLite file under the sessions base dir, keyed by a hash of the model, the
+temperature and the normalized prompt, so repeats are answered from disk.
+The file is capped by size; the least recently used entries go first.
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Size cap of the stored responses
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_TRAILING_SPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompt text with line endings, trailing spaces and outer blank lines made uniform."""
+    text = prompt.replace("\r\n", "\n").replace("\r", "\n")
+    return _TRAILING_SPACE.sub("", text).strip()
+
+
+class LlmCache:
+    """SQLite-backed cache of completion texts with least-recently-used eviction."""
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize LLM cache.
+
+        Args:
+            db_path: SQLite file (None = caching off)
+            max_bytes: Size cap of the stored responses
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.reset_stats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.db_path is not None
+
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt: str) -> str:
+        """
+        Build a cache key for a completion request.
+
+        Args:
+            model: Model name
+            temperature: Sampling temperature
+            prompt: Prompt text (normalized before hashing)
+
+        Returns:
+            Hex digest string
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{model}:{float(temperature)!r}:".encode("utf-8"))
+        digest.update(normalize_prompt(prompt).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a completion; returns None on a miss (or when caching is off)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+                    conn.commit()
+            except sqlite3.Error:
+                logger.warning("LLM cache lookup failed", exc_info=True)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        """Store a completion, then evict the least recently used ones over max_bytes."""
+        if not self.enabled:
+            return
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            try:
+                conn = self._connect()
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, response, bytes, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, response, size, now, now)
+                )
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error:
+                # The cache is best effort
+                logger.warning("LLM cache write failed", exc_info=True)
+
+    def record_bypass(self):
+        """Count a request that skipped the lookup on purpose."""
+        with self._lock:
+            self.bypassed += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (lock held)."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=5.0, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, bytes INTEGER NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Delete least recently used entries until the total fits max_bytes (lock held)."""
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute(
+            "SELECT key, bytes FROM completions ORDER BY last_used ASC"
+        ).fetchall():
+            conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def reset_stats(self):
+        """Zero the hit/miss counters (e.g. at the start of a session)."""
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters suitable for session metadata."""
+        lookups = self.hits + self.misses
+        stats = {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+        if self.enabled:
+            with self._lock:
+                try:
+                    entries, stored = self._connect().execute(
+                        "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM completions"
+                    ).fetchone()
+                    stats.update({'entries': entries, 'stored_bytes': stored})
+                except sqlite3.Error:
+                    pass
+        return stats
+
+
+_cache = LlmCache()
+
+
+def get_llm_cache() -> LlmCache:
+    """Get the process-wide LLM cache."""
+    return _cache
+
+
+def configure_llm_cache(db_path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> LlmCache:
+    """
+    Replace the process-wide LLM cache.
+
+    Args:
+        db_path: SQLite file (None = caching off)
+        max_bytes: Size cap of the stored responses
+
+    Returns:
+        The new cache
+    """
+    global _cache
+    _cache.close()
+    _cache = LlmCache(db_path=db_path, max_bytes=max_bytes)
+    return _cache
@@ -0,0 +1,331 @@
+"""
+LLM Calls - Deadlines, retries, hedging and cancellation for LLM requests.
+A single hung completion used to leave documentation generation (and the
+toolbar) stuck forever. Every request now runs on its own daemon thread while
+the caller waits with:
+
+    deadline    an overall time limit for the call, retries included
+    retries     transient failures (timeouts, connection errors, 429, 5xx) are
+                retried with jittered exponential backoff
+    hedging     optionally, if the first request is slower than the p95 of
+                recent calls, a second identical request is sent and whichever
+                answers first wins
+    cancel      a CancelToken the UI can set; waiting stops immediately
+
+Requests that are abandoned (cancelled, timed out or beaten by a hedge) finish
+on their own thread; their per-request timeout bounds how long that takes.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional
+
+try:
+    from .latency import percentile
+except ImportError:
+    # Imported as a top-level module (e.g. from main.py)
+    from latency import percentile
+
+# HTTP statuses worth retrying: timeout, conflict, rate limit and server errors
+RETRYABLE_STATUSES = {408, 409, 429}
+
+# Recent call durations kept for the hedging delay
+LATENCY_WINDOW = 100
+# Calls needed before the p95 is trusted for hedging
+MIN_HEDGE_SAMPLES = 10
+
+# Longest the wait loop sleeps before checking for cancellation again
+_POLL_SECONDS = 0.05
+
+
+class LlmCallCancelled(Exception):
+    """The call was cancelled (e.g. from the UI)."""
+
+
+class LlmDeadlineExceeded(TimeoutError):
+    """The call's overall deadline passed (retries included)."""
+
+
+class AttemptTimeout(TimeoutError):
+    """A single request took longer than its timeout (retried)."""
+
+
+class StreamInterrupted(Exception):
+    """A streamed response failed after part of it was delivered (not retried)."""
+
+
+class CancelToken:
+    """Shared flag that cancels the LLM calls it is passed to."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to timeout seconds; returns True early if cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise LlmCallCancelled("LLM call cancelled")
+
+
+class CallPolicy:
+    """Limits and retry settings for LLM calls."""
+
+    def __init__(self, deadline: float = 180.0, attempt_timeout: float = 60.0,
+                 max_attempts: int = 4, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 hedge: bool = False, hedge_delay: float = 10.0, hedge_percentile: float = 0.95):
+        """
+        Initialize call policy.
+
+        Args:
+            deadline: Seconds a call may take in total, retries included
+            attempt_timeout: Seconds a single request may take
+            max_attempts: Requests per call before giving up (1 = no retries)
+            backoff_base: Backoff before the first retry (doubles per retry, full jitter)
+            backoff_max: Longest backoff between retries
+            hedge: Send a second request when the first is slow (not for streamed calls)
+            hedge_delay: Seconds before hedging until enough calls were timed
+            hedge_percentile: Recent-latency percentile after which to hedge
+        """
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Whether a failed request timed out (our timer or the HTTP client's)."""
+    if isinstance(error, AttemptTimeout):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(error, openai.APITimeoutError)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed request is worth sending again."""
+    if isinstance(error, (AttemptTimeout, ConnectionError)):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUSES or error.status_code >= 500
+    return False
+
+
+class LlmCaller:
+    """Runs LLM requests under a CallPolicy and keeps call statistics."""
+
+    def __init__(self, policy: Optional[CallPolicy] = None):
+        """
+        Initialize LLM caller.
+
+        Args:
+            policy: Limits and retry settings (default: CallPolicy())
+        """
+        self.policy = policy or CallPolicy()
+        self._lock = threading.Lock()
+        self._durations = deque(maxlen=LATENCY_WINDOW)
+        self.reset_stats()
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for a request before hedging it."""
+        with self._lock:
+            durations = sorted(self._durations)
+        if len(durations) < MIN_HEDGE_SAMPLES:
+            return self.policy.hedge_delay
+        return percentile(durations, self.policy.hedge_percentile)
+
+    def backoff(self, retry: int) -> float:
+        """Jittered delay before the given retry (1 = first retry)."""
+        ceiling = min(self.policy.backoff_max, self.policy.backoff_base * (2 ** (retry - 1)))
+        return random.uniform(0, ceiling)
+
+    def call(self, request: Callable[[float], object], cancel: Optional[CancelToken] = None,
+             hedge: Optional[bool] = None):
+        """
+        Run a request with deadline, retries, optional hedging and cancellation.
+
+        Args:
+            request: Function(timeout) that performs one request and returns its
+                     result (streamed requests raise StreamInterrupted to stop retries)
+            cancel: Optional CancelToken
+            hedge: Override policy.hedge for this call
+
+        Returns:
+            The request's result
+
+        Raises:
+            LlmCallCancelled, LlmDeadlineExceeded, or the last request's error
+        """
+        policy = self.policy
+        hedge = policy.hedge if hedge is None else hedge
+        started = time.monotonic()
+        deadline_at = started + policy.deadline
+        attempt = 0
+        with self._lock:
+            self.calls += 1
+        while True:
+            if cancel is not None and cancel.cancelled:
+                self._count('cancelled')
+                raise LlmCallCancelled("LLM call cancelled")
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                self._count('deadline_exceeded')
+                raise LlmDeadlineExceeded(f"LLM call exceeded its {policy.deadline:.0f}s deadline")
+            attempt += 1
+            try:
+                result = self._attempt(request, min(policy.attempt_timeout, remaining), deadline_at,
+                                       cancel, hedge)
+            except (LlmCallCancelled, LlmDeadlineExceeded):
+                raise
+            except Exception as e:
+                # The HTTP client's timeout can fire just before ours (AttemptTimeout counts itself)
+                if is_timeout(e) and not isinstance(e, AttemptTimeout):
+                    self._count('timeouts')
+                if attempt >= policy.max_attempts or not is_retryable(e):
+                    self._count('failures')
+                    raise
+                delay = self.backoff(attempt)
+                if time.monotonic() + delay >= deadline_at:
+                    self._count('deadline_exceeded')
+                    raise LlmDeadlineExceeded(f"LLM call exceeded its {policy.deadline:.0f}s deadline") from e
+                self._count('retries')
+                if cancel is not None:
+                    cancel.wait(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            return result
+
+    def _attempt(self, request: Callable[[float], object], timeout: float, deadline_at: float,
+                 cancel: Optional[CancelToken], hedge: bool):
+        """One request (plus its hedge), waited for with timeout and cancellation."""
+        started = time.monotonic()
+        attempt_deadline = started + timeout
+        hedge_at = started + self.hedge_delay() if hedge else None
+        futures: List[Future] = [self._start(request, timeout)]
+        self._count('requests')
+        while True:
+            for index, future in enumerate(futures):
+                if future.done() and future.exception() is None:
+                    if index > 0:
+                        self._count('hedge_wins')
+                    # Only this attempt's latency: retries and backoff would skew the hedge delay
+                    with self._lock:
+                        self._durations.append(time.monotonic() - started)
+                    return future.result()
+            if all(future.done() for future in futures):
+                raise futures[-1].exception()
+            if cancel is not None and cancel.cancelled:
+                self._count('cancelled')
+                raise LlmCallCancelled("LLM call cancelled")
+            now = time.monotonic()
+            if now >= deadline_at:
+                self._count('deadline_exceeded')
+                raise LlmDeadlineExceeded(f"LLM call exceeded its {self.policy.deadline:.0f}s deadline")
+            if now >= attempt_deadline:
+                self._count('timeouts')
+                raise AttemptTimeout(f"LLM request took longer than {timeout:.0f}s")
+            if hedge_at is not None and len(futures) == 1 and now >= hedge_at:
+                futures.append(self._start(request, max(0.0, attempt_deadline - now)))
+                self._count('hedges')
+                self._count('requests')
+            wait([f for f in futures if not f.done()], timeout=_POLL_SECONDS, return_when=FIRST_COMPLETED)
+
+    @staticmethod
+    def _start(request: Callable[[float], object], timeout: float) -> Future:
+        """Run one request on a daemon thread (so an abandoned one can't block exit)."""
+        future: Future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(request(timeout))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def reset_stats(self):
+        """Zero the call counters (e.g. at the start of a session)."""
+        with self._lock:
+            self.calls = 0
+            self.requests = 0
+            self.retries = 0
+            self.timeouts = 0
+            self.hedges = 0
+            self.hedge_wins = 0
+            self.cancelled = 0
+            self.deadline_exceeded = 0
+            self.failures = 0
+
+    def get_stats(self) -> Dict:
+        """Call counters suitable for session metadata."""
+        with self._lock:
+            durations = sorted(self._durations)
+            stats = {
+                'calls': self.calls,
+                'requests': self.requests,
+                'retries': self.retries,
+                'timeouts': self.timeouts,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'cancelled': self.cancelled,
+                'deadline_exceeded': self.deadline_exceeded,
+                'failures': self.failures,
+            }
+        if durations:
+            stats['p50_seconds'] = round(percentile(durations, 0.50), 3)
+            stats['p95_seconds'] = round(percentile(durations, 0.95), 3)
+        return stats
+
+
+_caller = LlmCaller()
+
+
+def get_llm_caller() -> LlmCaller:
+    """Get the process-wide LLM caller."""
+    return _caller
+
+
+def configure_llm_calls(policy: Optional[CallPolicy] = None) -> LlmCaller:
+    """
+    Replace the process-wide LLM caller.
+
+    Args:
+        policy: Limits and retry settings (default: CallPolicy())
+
+    Returns:
+        The new caller
+    """
+    global _caller
+    _caller = LlmCaller(policy)
+    return _caller
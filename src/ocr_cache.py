@@ -0,0 +1,225 @@
+"""
+OCR Cache - Content-hash cache of OCR results.
+Terminal screenshots repeat heavily (empty prompts, re-run builds, identical
+prompt lines), so OCR results are keyed by a hash of the exact pixels plus the
+OCR config. A bounded in-memory LRU sits in front of an optional on-disk tier
+that is shared across captures, sessions and OCR worker processes. The disk
+tier is capped in bytes too: once it grows past max_disk_bytes, the least
+recently used files (by modification time, refreshed on every disk hit) are
+deleted until it is back under DISK_PRUNE_TARGET of the cap.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_MAX_DISK_BYTES = 64 * 1024 * 1024
+# Pruning goes a little below the cap so it doesn't rescan the folder on every write
+DISK_PRUNE_TARGET = 0.9
+
+
+class OcrCache:
+    """Two-tier (memory LRU + optional disk) cache of OCR text."""
+
+    def __init__(self, max_entries: int = 1024, disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        """
+        Initialize OCR cache.
+
+        Args:
+            max_entries: Maximum number of results kept in memory
+            disk_dir: Optional directory for the persistent tier (None = memory only)
+            max_disk_bytes: Size cap of the persistent tier
+        """
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        # Estimated size of the disk tier (scanned on first write; other
+        # processes sharing the folder are only seen at the next prune)
+        self._disk_bytes: Optional[int] = None
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @staticmethod
+    def make_key(img, config: str = "") -> str:
+        """
+        Build a cache key from an image's pixels and the OCR config.
+
+        Args:
+            img: PIL Image (already cropped to the region being OCR'd)
+            config: OCR settings that affect the result (language, psm, preprocessing)
+
+        Returns:
+            Hex digest string
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{img.mode}:{img.width}x{img.height}:{config}".encode("utf-8"))
+        digest.update(img.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a result; returns None on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        text = self._read_disk(key)
+        with self._lock:
+            if text is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._store_memory(key, text)
+            else:
+                self.misses += 1
+        return text
+
+    def put(self, key: str, text: str):
+        """Store a result in memory and (if configured) on disk."""
+        with self._lock:
+            self._store_memory(key, text)
+        self._write_disk(key, text)
+
+    def _store_memory(self, key: str, text: str):
+        """Insert into the LRU, evicting the oldest entries (lock must be held)."""
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if not self.disk_dir:
+            return None
+        # Shard by prefix so no single folder grows too large
+        return self.disk_dir / key[:2] / f"{key}.txt"
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        path = self._disk_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        try:
+            # Mark as recently used for pruning
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def _write_disk(self, key: str, text: str):
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError:
+            # Disk tier is best effort
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk()[1]
+            else:
+                self._disk_bytes += size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+
+    def _scan_disk(self):
+        """(mtime, size, path) of every disk entry, and their total size."""
+        entries = []
+        for path in self.disk_dir.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def _prune_disk(self):
+        """Delete least recently used disk entries until under the target (lock must be held)."""
+        entries, total = self._scan_disk()
+        target = self.max_disk_bytes * DISK_PRUNE_TARGET
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+        self._disk_bytes = total
+
+    def reset_stats(self):
+        """Zero the hit/miss counters (e.g. at the start of a session)."""
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.disk_evictions = 0
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters suitable for session metadata."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'memory_entries': len(self._entries),
+            'disk_evictions': self.disk_evictions,
+        }
+
+    def merge_stats(self, stats: Dict):
+        """Add counters reported by another process (e.g. an OCR pool worker)."""
+        with self._lock:
+            self.hits += stats.get('hits', 0)
+            self.misses += stats.get('misses', 0)
+            self.disk_hits += stats.get('disk_hits', 0)
+            self.disk_evictions += stats.get('disk_evictions', 0)
+
+    def settings(self) -> Dict:
+        """Constructor arguments, for configuring caches in worker processes."""
+        return {
+            'max_entries': self.max_entries,
+            'disk_dir': str(self.disk_dir) if self.disk_dir else None,
+            'max_disk_bytes': self.max_disk_bytes,
+        }
+
+
+_cache = OcrCache()
+
+
+def get_ocr_cache() -> OcrCache:
+    """Get the process-wide OCR cache."""
+    return _cache
+
+
+def configure_ocr_cache(max_entries: int = 1024, disk_dir: Optional[str] = None,
+                        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES) -> OcrCache:
+    """
+    Replace the process-wide OCR cache.
+
+    Args:
+        max_entries: Maximum number of results kept in memory
+        disk_dir: Optional directory for the persistent tier
+        max_disk_bytes: Size cap of the persistent tier
+
+    Returns:
+        The new cache
+    """
+    global _cache
+    _cache = OcrCache(max_entries=max_entries, disk_dir=disk_dir, max_disk_bytes=max_disk_bytes)
+    return _cache
@@ -0,0 +1,138 @@
+"""
+OCR Engine - Keeps one Tesseract instance alive across OCR calls.
+pytesseract forks a tesseract process, writes a temp image and reloads the
+language data on every call. When the tesserocr binding is installed the engine
+holds an in-process TessBaseAPI instead, so language data loads once per process.
+Falls back to pytesseract when the binding is missing or fails.
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+
+import pytesseract
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+
+# Tesseract's default page segmentation mode (fully automatic, no OSD)
+DEFAULT_PSM = 3
+
+
+def _find_tessdata_dir() -> Optional[str]:
+    """
+    Locate the tessdata folder next to the configured tesseract executable.
+    Needed on Windows, where Tesseract is usually not installed system-wide.
+    """
+    tessdata_prefix = os.environ.get('TESSDATA_PREFIX')
+    if tessdata_prefix and os.path.isdir(tessdata_prefix):
+        return tessdata_prefix
+
+    tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+    if tesseract_cmd and os.path.isabs(tesseract_cmd):
+        tessdata_dir = os.path.join(os.path.dirname(tesseract_cmd), 'tessdata')
+        if os.path.isdir(tessdata_dir):
+            return tessdata_dir
+
+    return None
+
+
+class OcrEngine:
+    """
+    Long-lived OCR engine.
+    Uses an in-process tesserocr API when available, pytesseract otherwise.
+    """
+
+    def __init__(self, lang: str = 'eng', persistent: bool = True):
+        """
+        Initialize OCR engine.
+
+        Args:
+            lang: Tesseract language code(s), e.g. 'eng' or 'eng+deu'
+            persistent: Try to keep an in-process tesserocr API alive
+        """
+        self.lang = lang
+        self._api = None
+        self._api_psm = DEFAULT_PSM
+        # TessBaseAPI is not thread-safe; serialize access to it
+        self._lock = threading.Lock()
+
+        if persistent and TESSEROCR_AVAILABLE:
+            try:
+                tessdata_dir = _find_tessdata_dir()
+                if tessdata_dir:
+                    self._api = tesserocr.PyTessBaseAPI(path=tessdata_dir, lang=lang)
+                else:
+                    self._api = tesserocr.PyTessBaseAPI(lang=lang)
+                self._api.SetPageSegMode(DEFAULT_PSM)
+            except Exception:
+                # Binding installed but unusable (e.g. missing language data)
+                logger.warning("tesserocr could not start; using pytesseract", exc_info=True)
+                self._api = None
+
+    @property
+    def backend(self) -> str:
+        """Name of the backend currently in use."""
+        return 'tesserocr' if self._api is not None else 'pytesseract'
+
+    def image_to_string(self, img, psm: Optional[int] = None) -> str:
+        """
+        Run OCR on a PIL image.
+
+        Args:
+            img: PIL Image to recognize
+            psm: Optional Tesseract page segmentation mode (default: automatic)
+
+        Returns:
+            Extracted text string
+        """
+        if psm is None:
+            psm = DEFAULT_PSM
+
+        if self._api is not None:
+            try:
+                with self._lock:
+                    if psm != self._api_psm:
+                        self._api.SetPageSegMode(psm)
+                        self._api_psm = psm
+                    self._api.SetImage(img)
+                    return self._api.GetUTF8Text()
+            except Exception:
+                # Fall through to pytesseract for this call
+                pass
+
+        config = f'--psm {psm}' if psm != DEFAULT_PSM else ''
+        return pytesseract.image_to_string(img, lang=self.lang, config=config)
+
+    def close(self):
+        """Release the in-process API (subsequent calls use pytesseract)."""
+        with self._lock:
+            if self._api is not None:
+                try:
+                    self._api.End()
+                except Exception:
+                    pass
+                self._api = None
+
+
+_engine: Optional[OcrEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine() -> OcrEngine:
+    """Get the process-wide OCR engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = OcrEngine()
+                logger.info("OCR backend: %s", _engine.backend)
+    return _engine
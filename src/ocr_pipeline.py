@@ -0,0 +1,345 @@
+"""
+OCR Pipeline - Turns recorded captures into command text.
+Runs terminal OCR over a command history, either serially or on a process pool,
+or streams it in the background while recording is still running.
+"""
+
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import List, Tuple, Optional, Dict, Callable
+
+try:
+    from .capture import extract_terminal_text
+    from .ocr_cache import get_ocr_cache, configure_ocr_cache
+    from .delta_ocr import get_delta_ocr
+    from .preprocess import get_preprocess_config, configure_preprocessing
+    from .command_knowledge import FALLBACK_COMMAND
+except ImportError:
+    # Imported as a top-level module (e.g. from main.py)
+    from capture import extract_terminal_text
+    from ocr_cache import get_ocr_cache, configure_ocr_cache
+    from delta_ocr import get_delta_ocr
+    from preprocess import get_preprocess_config, configure_preprocessing
+    from command_knowledge import FALLBACK_COMMAND
+
+# Default seconds to wait for a single capture's OCR in the process pool
+DEFAULT_ITEM_TIMEOUT = 60.0
+
+# ProcessPoolExecutor refuses more than 61 workers on Windows
+MAX_WINDOWS_WORKERS = 61
+
+
+def _split_history_item(item) -> Tuple[str, datetime, str, Optional[Dict]]:
+    """
+    Normalize a command history entry.
+    Handles both old format (command, timestamp, screenshot_path)
+    and new format (command, timestamp, screenshot_path, region).
+    """
+    if len(item) == 4:
+        command, timestamp, screenshot_path, region = item
+    else:
+        # Backward compatibility: old format without region
+        command, timestamp, screenshot_path = item
+        region = None
+    return command, timestamp, screenshot_path, region
+
+
+def ocr_capture(screenshot_path, region=None, window_hwnd=None, frame=None,
+                ocr_options: Optional[Dict] = None) -> str:
+    """
+    Extract the command from one captured screenshot.
+
+    Args:
+        screenshot_path: Path to the terminal screenshot
+        region: Optional focus region dict (see InteractionTracker.get_focus_region)
+        window_hwnd: Optional window handle for heuristics
+        frame: Optional in-memory Frame of the capture (skips reading the file)
+        ocr_options: Optional extra keyword arguments for extract_terminal_text,
+                     e.g. {'delta': True, 'bottom_up': True}
+
+    Returns:
+        Extracted command text, or FALLBACK_COMMAND if nothing was recognized
+    """
+    try:
+        extracted = extract_terminal_text(
+            frame if frame is not None else screenshot_path,
+            region=region,
+            window_hwnd=window_hwnd,
+            **(ocr_options or {})
+        )
+        if extracted and extracted.strip():
+            return extracted
+    except Exception:
+        # If OCR fails, just mark as captured
+        pass
+    return FALLBACK_COMMAND
+
+
+def _init_pool_worker(cache_settings, preprocess_config):
+    """Pool initializer: give each worker process the parent's OCR settings."""
+    configure_ocr_cache(**cache_settings)
+    configure_preprocessing(preprocess_config)
+
+
+def _ocr_capture_in_worker(screenshot_path, region=None, window_hwnd=None, frame=None,
+                           ocr_options=None):
+    """Run ocr_capture in a pool worker and report the counters it produced."""
+    cache = get_ocr_cache()
+    delta_ocr = get_delta_ocr()
+    cache.reset_stats()
+    delta_ocr.reset_stats()
+    command = ocr_capture(screenshot_path, region, window_hwnd, frame, ocr_options)
+    return command, cache.get_stats(), delta_ocr.get_stats()
+
+
+def resolve_worker_count(workers: Optional[int], item_count: int) -> int:
+    """
+    Decide how many OCR worker processes to use.
+
+    Args:
+        workers: Requested worker count (None uses the CPU count)
+        item_count: Number of captures that still need OCR
+
+    Returns:
+        Worker count, at least 1 and never more than item_count
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, item_count))
+    if sys.platform == 'win32':
+        workers = min(workers, MAX_WINDOWS_WORKERS)
+    return workers
+
+
+def process_command_history(
+    command_history,
+    workers: Optional[int] = None,
+    item_timeout: Optional[float] = DEFAULT_ITEM_TIMEOUT,
+    default_hwnd: Optional[int] = None,
+    frames: Optional[Dict[str, object]] = None,
+    ocr_options: Optional[Dict] = None,
+    on_result: Optional[Callable] = None
+) -> List[Tuple[str, datetime, str]]:
+    """
+    Run OCR over every capture that has no command text yet.
+
+    Output order always matches command_history. With one worker (or a single
+    pending capture) OCR runs in this process; otherwise captures are spread
+    across a process pool and each result is awaited for at most item_timeout
+    seconds before the capture falls back to FALLBACK_COMMAND.
+
+    Args:
+        command_history: List of (command, timestamp, screenshot_path[, region])
+        workers: Number of OCR processes (None uses the CPU count, 1 is serial)
+        item_timeout: Seconds to wait for each capture in the pool (None waits forever)
+        default_hwnd: Window handle used when a capture's region has none
+        frames: Optional dict of screenshot_path -> in-memory Frame; captures
+                found here are OCR'd from memory instead of from disk
+        ocr_options: Optional extra keyword arguments for extract_terminal_text.
+                     Delta OCR works best serially, where consecutive captures
+                     of a window are processed in order by the same process
+        on_result: Optional callback function(command, screenshot_path) called
+                   as each capture's OCR finishes
+
+    Returns:
+        List of (command, timestamp, screenshot_path) tuples
+    """
+    items = [_split_history_item(item) for item in command_history]
+    frames = frames or {}
+
+    # Work out which captures need OCR and with which arguments
+    jobs = []
+    for index, (command, timestamp, screenshot_path, region) in enumerate(items):
+        if command and command.strip():
+            continue
+        if region and 'window_hwnd' in region:
+            window_hwnd = region.get('window_hwnd')
+        else:
+            window_hwnd = default_hwnd
+        frame = frames.get(screenshot_path)
+        jobs.append((index, (screenshot_path, region, window_hwnd, frame, ocr_options)))
+
+    commands = [command for command, _, _, _ in items]
+    worker_count = resolve_worker_count(workers, len(jobs))
+
+    if worker_count <= 1:
+        for index, args in jobs:
+            commands[index] = ocr_capture(*args)
+            _notify_result(on_result, commands[index], args[0])
+    else:
+        _run_pool(jobs, commands, worker_count, item_timeout, on_result)
+
+    return [
+        (commands[index], timestamp, screenshot_path)
+        for index, (_, timestamp, screenshot_path, _) in enumerate(items)
+    ]
+
+
+def _notify_result(on_result, command, screenshot_path):
+    if on_result:
+        try:
+            on_result(command, screenshot_path)
+        except Exception:
+            # Don't let callback errors stop OCR
+            pass
+
+
+def _run_pool(jobs, commands, worker_count, item_timeout, on_result=None):
+    """Run OCR jobs on a process pool, writing results into commands in place."""
+    executor = ProcessPoolExecutor(
+        max_workers=worker_count,
+        initializer=_init_pool_worker,
+        initargs=(get_ocr_cache().settings(), get_preprocess_config())
+    )
+    cache = get_ocr_cache()
+    delta_ocr = get_delta_ocr()
+    futures = []
+    jobs_by_index = {index: args[0] for index, args in jobs}
+    timed_out = False
+    try:
+        for index, args in jobs:
+            futures.append((index, executor.submit(_ocr_capture_in_worker, *args)))
+
+        # Collect in submission order so output order is stable
+        for index, future in futures:
+            try:
+                commands[index], cache_stats, delta_stats = future.result(timeout=item_timeout)
+                cache.merge_stats(cache_stats)
+                delta_ocr.merge_stats(delta_stats)
+            except FutureTimeoutError:
+                timed_out = True
+                commands[index] = FALLBACK_COMMAND
+            except Exception:
+                # Worker crashed or pool broke - keep going with the rest
+                commands[index] = FALLBACK_COMMAND
+            _notify_result(on_result, commands[index], jobs_by_index[index])
+    finally:
+        for _, future in futures:
+            future.cancel()
+        # Grab worker handles before shutdown() clears them
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=not timed_out)
+        if timed_out:
+            # A hung tesseract call would otherwise keep its worker alive forever
+            for process in processes:
+                try:
+                    process.terminate()
+                except Exception:
+                    pass
+
+
+def _lower_current_thread_priority():
+    """Drop the calling thread to idle priority so it only uses spare CPU (Windows)."""
+    if sys.platform != 'win32':
+        return
+    try:
+        import win32api
+        import win32process
+        win32process.SetThreadPriority(
+            win32api.GetCurrentThread(), win32process.THREAD_PRIORITY_IDLE
+        )
+    except Exception:
+        # pywin32 missing or call refused - run at normal priority
+        pass
+
+
+class StreamingOcr:
+    """
+    Background OCR worker that processes captures while recording is still running.
+    Consumes the recorder's OCR queue one capture at a time, only while no capture
+    is in progress, so by the time recording stops only the backlog remains.
+    """
+
+    def __init__(self, ocr_queue: queue.Queue, capture_idle: threading.Event,
+                 on_result: Optional[Callable] = None,
+                 on_item_done: Optional[Callable] = None,
+                 default_hwnd: Optional[Callable] = None,
+                 ocr_options: Optional[Dict] = None):
+        """
+        Initialize streaming OCR worker.
+
+        Args:
+            ocr_queue: Queue of (screenshot_path, frame or None, region) items
+            capture_idle: Event that is set whenever no capture is in progress
+            on_result: Optional callback function(command, screenshot_path)
+            on_item_done: Optional callback function(frame) after each item
+                          (lets the owner release the frame from its memory budget)
+            default_hwnd: Optional callable returning the window handle to use
+                          when a capture's region has none
+            ocr_options: Optional extra keyword arguments for extract_terminal_text
+                         (captures arrive in order, which suits delta OCR)
+        """
+        self.ocr_queue = ocr_queue
+        self.capture_idle = capture_idle
+        self.on_result = on_result
+        self.on_item_done = on_item_done
+        self.default_hwnd = default_hwnd
+        self.ocr_options = ocr_options
+
+        # screenshot_path -> recognized command
+        self.results: Dict[str, str] = {}
+        self._results_lock = threading.Lock()
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the worker thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop taking new captures and wait for the one in flight to finish.
+        Anything still queued is left on the queue as backlog.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get_results(self) -> Dict[str, str]:
+        """Get a copy of the commands recognized so far (screenshot_path -> command)."""
+        with self._results_lock:
+            return dict(self.results)
+
+    def _run(self):
+        """Worker loop."""
+        _lower_current_thread_priority()
+
+        while not self._stop.is_set():
+            # Never compete with a capture that is happening right now
+            if not self.capture_idle.wait(timeout=0.2):
+                continue
+            try:
+                screenshot_path, frame, region = self.ocr_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            try:
+                window_hwnd = None
+                if region and 'window_hwnd' in region:
+                    window_hwnd = region.get('window_hwnd')
+                elif self.default_hwnd:
+                    window_hwnd = self.default_hwnd()
+
+                command = ocr_capture(screenshot_path, region, window_hwnd, frame, self.ocr_options)
+                with self._results_lock:
+                    self.results[screenshot_path] = command
+
+                if self.on_result:
+                    try:
+                        self.on_result(command, screenshot_path)
+                    except Exception:
+                        # Don't let callback errors stop the worker
+                        pass
+            finally:
+                if self.on_item_done:
+                    self.on_item_done(frame)
@@ -0,0 +1,161 @@
+"""
+Preprocess - Vectorized image cleanup ahead of Tesseract.
+Dark-themed terminals with anti-aliased fonts are slow and error-prone to
+recognize as-is. This stage converts a frame to what Tesseract reads best
+(dark text on a light background, binarized, at a comfortable glyph height)
+using NumPy array operations over the whole frame.
+"""
+
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+try:
+    from .delta_ocr import segment_line_bands
+except ImportError:
+    # Imported as a top-level module (e.g. from main.py)
+    from delta_ocr import segment_line_bands
+
+
+# ITU-R BT.601 luma weights (same as PIL's 'L' conversion)
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+class PreprocessConfig:
+    """Settings for the preprocessing chain. Each step can be switched off."""
+
+    def __init__(self, grayscale: bool = True, invert_dark: bool = True,
+                 adaptive_threshold: bool = True, block_size: int = 31,
+                 threshold_offset: int = 10, target_glyph_height: Optional[int] = 30,
+                 max_scale: float = 4.0):
+        """
+        Initialize preprocessing settings.
+
+        Args:
+            grayscale: Convert to grayscale (required by the later steps)
+            invert_dark: Invert frames whose background is dark (dark themes)
+            adaptive_threshold: Binarize against the local mean brightness
+            block_size: Side of the local window for the threshold (odd, pixels)
+            threshold_offset: How far below the local mean a pixel must be to count as text
+            target_glyph_height: Rescale so text lines are about this tall (None = no rescale)
+            max_scale: Largest up- or down-scale factor applied
+        """
+        self.grayscale = grayscale
+        self.invert_dark = invert_dark
+        self.adaptive_threshold = adaptive_threshold
+        self.block_size = block_size | 1  # Must be odd
+        self.threshold_offset = threshold_offset
+        self.target_glyph_height = target_glyph_height
+        self.max_scale = max_scale
+
+    def cache_tag(self) -> str:
+        """Short string identifying these settings (part of OCR cache keys)."""
+        return (f"g{int(self.grayscale)}i{int(self.invert_dark)}"
+                f"t{int(self.adaptive_threshold)}b{self.block_size}o{self.threshold_offset}"
+                f"h{self.target_glyph_height}m{self.max_scale}")
+
+    def __repr__(self):
+        return f"PreprocessConfig({self.cache_tag()})"
+
+
+def _to_gray(arr: np.ndarray) -> np.ndarray:
+    """RGB(A) uint8 array -> float32 grayscale array."""
+    if arr.ndim == 2:
+        return arr.astype(np.float32)
+    return arr[:, :, :3].astype(np.float32) @ LUMA_WEIGHTS
+
+
+def _box_mean(gray: np.ndarray, size: int) -> np.ndarray:
+    """Mean over a size x size window around every pixel, via an integral image."""
+    pad = size // 2
+    padded = np.pad(gray, pad, mode='edge')
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=np.float64)
+    np.cumsum(np.cumsum(padded, axis=0), axis=1, out=integral[1:, 1:])
+    window_sum = (integral[size:, size:] - integral[:-size, size:]
+                  - integral[size:, :-size] + integral[:-size, :-size])
+    return window_sum / (size * size)
+
+
+def estimate_glyph_height(gray: np.ndarray) -> Optional[float]:
+    """
+    Estimate the height of a text line in pixels.
+
+    Args:
+        gray: H x W grayscale array
+
+    Returns:
+        Median text-band height, or None if no text lines were found
+    """
+    bands = segment_line_bands(gray.astype(np.uint8), padding=0)
+    heights = [bottom - top for top, bottom in bands if bottom - top >= 4]
+    if not heights:
+        return None
+    return float(np.median(heights))
+
+
+def preprocess_image(img, config: Optional[PreprocessConfig] = None) -> Image.Image:
+    """
+    Run the preprocessing chain on one frame.
+
+    Args:
+        img: PIL Image or NumPy frame buffer
+        config: PreprocessConfig (None uses the defaults)
+
+    Returns:
+        Preprocessed PIL Image ('L' mode when grayscale is enabled)
+    """
+    if config is None:
+        config = PreprocessConfig()
+
+    arr = np.asarray(img)
+    if not config.grayscale:
+        return img if isinstance(img, Image.Image) else Image.fromarray(arr)
+
+    gray = _to_gray(arr)
+    if gray.size == 0:
+        return Image.fromarray(gray.astype(np.uint8))
+
+    # Theme-aware inversion: make the background light
+    if config.invert_dark and gray.mean() < 128:
+        gray = 255.0 - gray
+
+    # Rescale so glyphs land near the target height (undoes DPI scaling differences)
+    if config.target_glyph_height:
+        glyph_height = estimate_glyph_height(gray)
+        if glyph_height:
+            scale = config.target_glyph_height / glyph_height
+            scale = min(config.max_scale, max(1.0 / config.max_scale, scale))
+            if abs(scale - 1.0) > 0.1:
+                height, width = gray.shape
+                resized = Image.fromarray(gray.astype(np.uint8)).resize(
+                    (max(1, round(width * scale)), max(1, round(height * scale))),
+                    Image.BILINEAR
+                )
+                gray = np.asarray(resized, dtype=np.float32)
+
+    # Adaptive threshold: text is whatever is clearly darker than its neighbourhood
+    if config.adaptive_threshold:
+        local_mean = _box_mean(gray, config.block_size)
+        gray = np.where(gray < local_mean - config.threshold_offset, 0, 255)
+
+    return Image.fromarray(np.clip(gray, 0, 255).astype(np.uint8))
+
+
+_config: Optional[PreprocessConfig] = None
+
+
+def get_preprocess_config() -> Optional[PreprocessConfig]:
+    """Get the process-wide preprocessing settings (None = disabled)."""
+    return _config
+
+
+def configure_preprocessing(config: Optional[PreprocessConfig]):
+    """
+    Enable (or with None, disable) preprocessing for all OCR in this process.
+
+    Args:
+        config: PreprocessConfig to apply before every OCR call, or None
+    """
+    global _config
+    _config = config
@@ -0,0 +1,222 @@
+"""
+Prompt Grammar - Recognizes shell prompts in OCR text and extracts the typed command.
+Each shell (cmd, PowerShell, bash, zsh, fish, Git Bash, custom) is a compiled
+regex with a `command` group. Grammars are kept in a registry; the ones whose
+window patterns match the terminal's title are tried first, and all grammars
+are combined into one regex so each OCR line is matched once.
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class PromptGrammar:
+    """A shell prompt pattern."""
+
+    def __init__(self, name: str, pattern: str, window_patterns: Tuple[str, ...] = ()):
+        """
+        Initialize prompt grammar.
+
+        Args:
+            name: Unique grammar name (e.g. 'powershell')
+            pattern: Regex matching a whole prompt line, with a named group
+                     `command` for the typed command (may match empty text)
+            window_patterns: Lowercase substrings of window titles (or process
+                             names) for which this grammar is preferred
+        """
+        if '(?P<command>' not in pattern:
+            raise ValueError(f"Prompt grammar '{name}' needs a (?P<command>...) group")
+        self.name = name
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+        self.window_patterns = tuple(p.lower() for p in window_patterns)
+
+    def matches_window(self, window_title: Optional[str]) -> bool:
+        """Check whether this grammar is preferred for a window title."""
+        if not window_title:
+            return False
+        title = window_title.lower()
+        return any(p in title for p in self.window_patterns)
+
+    def parse(self, line: str) -> Optional[str]:
+        """
+        Match a single line.
+
+        Returns:
+            The command (possibly empty for a bare prompt), or None if not a prompt
+        """
+        match = self.regex.match(line)
+        if not match:
+            return None
+        return match.group('command').strip()
+
+    def __repr__(self):
+        return f"PromptGrammar({self.name})"
+
+
+# Optional "(venv) " / "(base) " prefix used by Python virtualenvs and conda
+_ENV_PREFIX = r'(?:\([\w.-]+\)\s+)?'
+
+BUILTIN_GRAMMARS = [
+    PromptGrammar(
+        'powershell',
+        r'^PS [A-Za-z]:\\[^>]*>\s*(?P<command>.*)$',
+        ('powershell', 'pwsh'),
+    ),
+    PromptGrammar(
+        # Windows paths cannot contain '>', so the first '>' ends the prompt
+        'cmd',
+        r'^[A-Za-z]:\\[^>]*>\s*(?P<command>.*)$',
+        ('cmd.exe', 'command prompt'),
+    ),
+    PromptGrammar(
+        # Second line of the MINGW prompt ("user@host MINGW64 ~/dir (main)" is above it)
+        'git_bash',
+        r'^\$\s+(?P<command>.*)$',
+        ('mingw', 'git bash'),
+    ),
+    PromptGrammar(
+        # user@host:~/dir$ cmd, [user@host dir]$ cmd, root# cmd, $ cmd
+        'bash',
+        r'^' + _ENV_PREFIX +
+        r'(?:[\w.-]+@[\w.-]+:[^$#]*|\[[\w.-]+@[\w.-]+ [^\]]*\]|[\w.-]+)?[$#]\s+(?P<command>.*)$',
+        ('bash', 'ubuntu', 'wsl'),
+    ),
+    PromptGrammar(
+        # user@host ~/dir % cmd, and oh-my-zsh "➜  dir git:(main) ✗ cmd"
+        'zsh',
+        r'^' + _ENV_PREFIX +
+        r'(?:(?:[\w.-]+@[\w.-]+(?:\s+[~/][^\s%]*)?\s*|[~/][^\s%]*\s+|[\w.-]+)?%'
+        r'|➜\s+\S+(?:\s+git:\([^)]*\))?(?:\s+✗)?)\s+(?P<command>.*)$',
+        ('zsh', 'iterm'),
+    ),
+    PromptGrammar(
+        # user@host ~/dir> cmd (fish's default prompt)
+        'fish',
+        r'^' + _ENV_PREFIX + r'[\w.-]+@[\w.-]+\s+[~/][^>]*>\s*(?P<command>.*)$',
+        ('fish',),
+    ),
+]
+
+
+class PromptGrammarRegistry:
+    """Registry of prompt grammars with per-window selection."""
+
+    def __init__(self, grammars: Optional[List[PromptGrammar]] = None):
+        self._grammars: List[PromptGrammar] = list(grammars if grammars is not None else BUILTIN_GRAMMARS)
+        self._lock = threading.Lock()
+        # Ordered grammar names -> (combined regex, group name -> grammar)
+        self._combined_cache: Dict[Tuple[str, ...], Tuple[re.Pattern, Dict[str, PromptGrammar]]] = {}
+
+    def register(self, grammar: PromptGrammar, first: bool = True):
+        """
+        Add (or replace) a grammar.
+
+        Args:
+            grammar: Grammar to add; an existing grammar with the same name is replaced
+            first: Try this grammar before the built-ins when no window preference applies
+        """
+        with self._lock:
+            self._grammars = [g for g in self._grammars if g.name != grammar.name]
+            if first:
+                self._grammars.insert(0, grammar)
+            else:
+                self._grammars.append(grammar)
+            self._combined_cache.clear()
+
+    def unregister(self, name: str):
+        """Remove a grammar by name."""
+        with self._lock:
+            self._grammars = [g for g in self._grammars if g.name != name]
+            self._combined_cache.clear()
+
+    @property
+    def grammars(self) -> List[PromptGrammar]:
+        return list(self._grammars)
+
+    def select(self, window_title: Optional[str] = None) -> List[PromptGrammar]:
+        """
+        Order grammars for a window: those matching its title first, then the rest.
+        """
+        grammars = self._grammars
+        preferred = [g for g in grammars if g.matches_window(window_title)]
+        return preferred + [g for g in grammars if g not in preferred]
+
+    def _combined(self, window_title: Optional[str]):
+        """Get (compiling once) the single alternation regex for a window's grammar order."""
+        ordered = self.select(window_title)
+        key = tuple(g.name for g in ordered)
+        with self._lock:
+            cached = self._combined_cache.get(key)
+            if cached is None:
+                groups = {}
+                parts = []
+                for i, grammar in enumerate(ordered):
+                    group = f"command_{i}"
+                    groups[group] = grammar
+                    parts.append('(?:' + grammar.pattern.replace('(?P<command>', f'(?P<{group}>') + ')')
+                cached = (re.compile('|'.join(parts)), groups)
+                self._combined_cache[key] = cached
+        return cached
+
+    def match_line(self, line: str, window_title: Optional[str] = None) -> Optional[Tuple[PromptGrammar, str]]:
+        """
+        Match one line against all grammars at once.
+
+        Returns:
+            (grammar, command) with command possibly empty, or None if not a prompt
+        """
+        regex, groups = self._combined(window_title)
+        match = regex.match(line.strip())
+        if not match:
+            return None
+        for group, value in match.groupdict().items():
+            if value is not None:
+                return groups[group], value.strip()
+        return None
+
+    def find_command(self, text: str, window_title: Optional[str] = None) -> Optional[str]:
+        """
+        Find the last command typed at a prompt in OCR text.
+        Lines are scanned once, bottom up; bare prompts with nothing typed are skipped.
+
+        Returns:
+            Command string, or None if no prompt line with a command was found
+        """
+        if not text:
+            return None
+        regex, groups = self._combined(window_title)
+        for line in reversed(text.split('\n')):
+            match = regex.match(line.strip())
+            if not match:
+                continue
+            for value in match.groupdict().values():
+                if value is not None and value.strip():
+                    return value.strip()
+        return None
+
+
+_registry = PromptGrammarRegistry()
+
+
+def get_prompt_registry() -> PromptGrammarRegistry:
+    """Get the process-wide prompt grammar registry."""
+    return _registry
+
+
+def register_prompt_grammar(name: str, pattern: str, window_patterns: Tuple[str, ...] = ()) -> PromptGrammar:
+    """
+    Register a custom prompt grammar.
+
+    Args:
+        name: Grammar name
+        pattern: Regex for a whole prompt line with a (?P<command>...) group
+        window_patterns: Window title substrings that prefer this grammar
+
+    Returns:
+        The registered grammar
+    """
+    grammar = PromptGrammar(name, pattern, window_patterns)
+    _registry.register(grammar)
+    return grammar
@@ -0,0 +1,219 @@
+"""
+Screenshot Store - Content-addressed screenshot storage for a session folder.
+Repeated Enters and re-run commands produce pixel-identical captures. Each
+distinct image is encoded once into screenshots/objects/ under its pixel hash;
+the per-step file (command_*.png) is a hard link to that object, or, where
+hard links are not supported, just a reference in screenshots/manifest.json.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def pixel_hash(frame) -> str:
+    """
+    Hash a frame's pixels (with its size and pixel format).
+
+    Args:
+        frame: Frame
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{frame.width}x{frame.height}:{frame.pixel_format}".encode("utf-8"))
+    digest.update(frame.data)
+    return digest.hexdigest()
+
+
+class ScreenshotStore:
+    """Deduplicating store for one session's screenshots folder."""
+
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, screenshots_dir, writer=None):
+        """
+        Initialize screenshot store.
+
+        Args:
+            screenshots_dir: The session's screenshots/ folder
+            writer: Optional SessionWriter that performs the file writes and links
+        """
+        self.screenshots_dir = Path(screenshots_dir)
+        self.writer = writer
+        self.objects_dir = self.screenshots_dir / "objects"
+        self._lock = threading.Lock()
+        # hash -> {'path': object path relative to screenshots_dir, 'bytes': size}
+        self._objects: Dict[str, Dict] = {}
+        # hash -> Event set once the object is on disk (or failed)
+        self._pending: Dict[str, threading.Event] = {}
+        # Per-step entries in the order their slots were reserved (see reserve)
+        self._steps: List[Dict] = []
+        self._step_objects: Dict[str, str] = {}
+
+    def _object_path(self, key: str, extension: str) -> Path:
+        # Shard by prefix so no single folder grows too large
+        return self.objects_dir / key[:2] / f"{key}{extension}"
+
+    def reserve(self, step_path) -> Dict:
+        """
+        Take a step's place in the manifest before its frame is encoded.
+        Call this where frames are produced (e.g. FrameWriter.submit), so the
+        manifest keeps capture order however the encoder threads finish.
+
+        Args:
+            step_path: The step's screenshot path
+
+        Returns:
+            The step's slot, to pass to put
+        """
+        step = {'path': self._relative(Path(step_path))}
+        with self._lock:
+            self._steps.append(step)
+        return step
+
+    def put(self, frame, step_path, encoder, slot: Optional[Dict] = None) -> str:
+        """
+        Store a frame for one capture step.
+
+        Args:
+            frame: Frame to store
+            step_path: The step's screenshot path (e.g. screenshots/command_*.png)
+            encoder: ImageEncoder used for new objects
+            slot: The step's slot from reserve (default: reserve one now)
+
+        Returns:
+            Path the step's image can be read from (the step path if it could
+            be linked, otherwise the shared object)
+        """
+        step_path = Path(step_path)
+        step = slot if slot is not None else self.reserve(step_path)
+        try:
+            return self._put(frame, step, step_path, encoder)
+        except Exception:
+            with self._lock:
+                self._steps.remove(step)
+            raise
+
+    def _put(self, frame, step: Dict, step_path: Path, encoder) -> str:
+        key = pixel_hash(frame)
+
+        with self._lock:
+            event = self._pending.get(key)
+            is_new = key not in self._objects and event is None
+            if is_new:
+                event = self._pending[key] = threading.Event()
+
+        if is_new:
+            object_path = self._object_path(key, encoder.extension)
+            try:
+                if self.writer is not None:
+                    self.writer.write(object_path, encoder.encode_bytes(frame)).result()
+                else:
+                    encoder.encode(frame, object_path)
+                with self._lock:
+                    self._objects[key] = {
+                        'path': object_path.relative_to(self.screenshots_dir).as_posix(),
+                        'bytes': object_path.stat().st_size,
+                    }
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+                event.set()
+        elif event is not None:
+            # Another encoder thread is writing the same pixels
+            event.wait()
+
+        with self._lock:
+            entry = self._objects.get(key)
+        if entry is None:
+            raise OSError(f"Screenshot object {key} could not be written")
+
+        object_path = self.screenshots_dir / entry['path']
+        linked = False
+        try:
+            if self.writer is not None:
+                self.writer.call(self._link, object_path, step_path).result()
+            else:
+                self._link(object_path, step_path)
+            linked = True
+        except OSError:
+            # No hard links here (e.g. FAT or some network shares): keep a reference only
+            pass
+
+        with self._lock:
+            step.update({'object': key, 'linked': linked})
+            self._step_objects[str(step_path)] = key
+        return str(step_path if linked else object_path)
+
+    @staticmethod
+    def _link(object_path: Path, step_path: Path):
+        step_path.parent.mkdir(parents=True, exist_ok=True)
+        os.link(object_path, step_path)
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.screenshots_dir).as_posix()
+        except ValueError:
+            return str(path)
+
+    def resolve(self, step_path: str) -> str:
+        """
+        Get a readable path for a step's screenshot.
+        Returns the step path itself when it exists, otherwise its stored object.
+        """
+        if not step_path or Path(step_path).exists():
+            return step_path
+        with self._lock:
+            key = self._step_objects.get(str(Path(step_path)))
+            entry = self._objects.get(key) if key else None
+        if entry is None:
+            return step_path
+        return str(self.screenshots_dir / entry['path'])
+
+    def _stored_steps(self) -> List[Dict]:
+        """Steps whose object is on disk, in capture order (lock held)."""
+        return [dict(step) for step in self._steps if 'object' in step]
+
+    def get_stats(self) -> Dict:
+        """Deduplication counters suitable for session metadata."""
+        with self._lock:
+            stored = self._stored_steps()
+            steps = len(stored)
+            unique = len(self._objects)
+            sizes = {key: entry['bytes'] for key, entry in self._objects.items()}
+            logical_bytes = sum(sizes.get(step['object'], 0) for step in stored)
+        stored_bytes = sum(sizes.values())
+        return {
+            'steps': steps,
+            'unique_images': unique,
+            'duplicates': steps - unique,
+            'dedup_ratio': round(steps / unique, 3) if unique else 0.0,
+            'logical_bytes': logical_bytes,
+            'stored_bytes': stored_bytes,
+            'bytes_saved': logical_bytes - stored_bytes,
+        }
+
+    def write_manifest(self) -> Optional[Path]:
+        """Write screenshots/manifest.json (objects, per-step references and stats)."""
+        with self._lock:
+            manifest = {
+                'objects': dict(self._objects),
+                'steps': self._stored_steps(),
+            }
+        manifest['stats'] = self.get_stats()
+        path = self.screenshots_dir / self.MANIFEST_NAME
+        if self.writer is not None:
+            self.writer.write_json(path, manifest)
+            return path
+        try:
+            self.screenshots_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            return path
+        except OSError:
+            return None
@@ -10,6 +10,18 @@ from pathlib import Path
 from typing import Optional, List, Dict
 import socket
 
+try:
+    from .encoder import SCREENSHOT_EXTENSIONS
+    from .screenshot_store import ScreenshotStore
+    from .thumbnails import ThumbnailService
+    from .session_writer import SessionWriter
+except ImportError:
+    # Imported as a top-level module (e.g. from main.py)
+    from encoder import SCREENSHOT_EXTENSIONS
+    from screenshot_store import ScreenshotStore
+    from thumbnails import ThumbnailService
+    from session_writer import SessionWriter
+
 
 def get_pc_name_abbreviation() -> str:
     """
@@ -83,17 +95,27 @@ def generate_session_folder_name(
 class SessionManager:
     """Manages recording session folders and file organization."""
     
-    def __init__(self, base_dir: str = "docs/sessions"):
+    def __init__(self, base_dir: str = "docs/sessions", fsync_policy: str = "never"):
         """
         Initialize session manager.
         
         Args:
             base_dir: Base directory for all sessions (default: docs/sessions)
+            fsync_policy: When session files are forced to disk ('never',
+                          'on_flush' or 'always', see SessionWriter)
         """
         self.base_dir = Path(base_dir)
+        # Single thread that performs every session file write
+        self.writer = SessionWriter(fsync_policy=fsync_policy)
         self.current_session_dir: Optional[Path] = None
         self.session_id: Optional[str] = None
         self.session_start_time: Optional[datetime] = None
+        # Extra sections (e.g. OCR cache statistics) written by finalize_session
+        self.extra_metadata: Dict[str, Dict] = {}
+        # Content-addressed store for the current session's screenshots
+        self.screenshot_store: Optional[ScreenshotStore] = None
+        # Cached screenshot previews for the current session (<session>/thumbnails)
+        self.thumbnails: Optional[ThumbnailService] = None
     
     def create_session_folder(
         self,
@@ -126,6 +148,9 @@ class SessionManager:
         self.current_session_dir = session_dir
         self.session_id = folder_name
         self.session_start_time = datetime.now()
+        self.extra_metadata = {}
+        self.screenshot_store = ScreenshotStore(session_dir / "screenshots", writer=self.writer)
+        self.thumbnails = ThumbnailService(session_dir / "thumbnails", writer=self.writer)
         
         # Create session metadata file
         self._create_session_metadata()
@@ -148,17 +173,46 @@ class SessionManager:
         
         metadata_file = self.current_session_dir / "metadata" / "session_info.json"
         try:
-            import json
-            with open(metadata_file, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, indent=2)
+            # Wait for the write, so a failed one falls back to the text file
+            self.writer.write_json(metadata_file, metadata).result()
         except Exception:
             # If JSON fails, create a simple text file
             metadata_file = self.current_session_dir / "metadata" / "session_info.txt"
-            with open(metadata_file, "w", encoding="utf-8") as f:
-                f.write(f"Session ID: {self.session_id}\n")
-                f.write(f"Start Time: {self.session_start_time}\n")
-                f.write(f"PC Name: {socket.gethostname()}\n")
-                f.write(f"PC Abbreviation: {get_pc_name_abbreviation()}\n")
+            self.writer.write(metadata_file, (
+                f"Session ID: {self.session_id}\n"
+                f"Start Time: {self.session_start_time}\n"
+                f"PC Name: {socket.gethostname()}\n"
+                f"PC Abbreviation: {get_pc_name_abbreviation()}\n"
+            ))
+    
+    def add_metadata(self, section: str, data: Dict):
+        """
+        Attach an extra section to the session metadata.
+        Sections are written to session_info.json by finalize_session().
+        
+        Args:
+            section: Key in session_info.json (e.g. "ocr_cache")
+            data: JSON-serializable dictionary
+        """
+        self.extra_metadata[section] = data
+    
+    def get_ocr_cache_dir(self) -> Path:
+        """
+        Get the on-disk OCR cache folder, shared by all sessions under base_dir.
+        
+        Returns:
+            Path object for the cache directory
+        """
+        return self.base_dir / ".ocr_cache"
+    
+    def get_llm_cache_path(self) -> Path:
+        """
+        Get the LLM response cache database, shared by all sessions under base_dir.
+        
+        Returns:
+            Path object for the SQLite file
+        """
+        return self.base_dir / ".llm_cache.sqlite3"
     
     def get_events_path(self) -> Path:
         """
@@ -185,24 +239,25 @@ class SessionManager:
         events_path = self.get_events_path()
         
         try:
-            import json
-            with open(events_path, "w", encoding="utf-8") as f:
-                json.dump(events, f, indent=2)
+            # Wait for the write, so a failed one falls back to the text file
+            self.writer.write_json(events_path, events).result()
         except Exception:
             # If JSON fails, create a simple text file
             events_path = self.current_session_dir / "events" / "events.txt"
-            with open(events_path, "w", encoding="utf-8") as f:
-                for event in events:
-                    f.write(f"{event.get('timestamp', '')} - {event.get('event_type', '')}\n")
+            self.writer.write(events_path, "".join(
+                f"{event.get('timestamp', '')} - {event.get('event_type', '')}\n"
+                for event in events
+            ))
         
         return events_path
     
-    def get_screenshot_path(self, filename: Optional[str] = None) -> Path:
+    def get_screenshot_path(self, filename: Optional[str] = None, extension: str = ".png") -> Path:
         """
         Get path for saving a screenshot in the current session.
         
         Args:
             filename: Optional custom filename (if None, auto-generates)
+            extension: Extension of auto-generated names, matching the image format
         
         Returns:
             Path object for the screenshot file
@@ -214,10 +269,25 @@ class SessionManager:
         
         if filename is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
-            filename = f"command_{timestamp}.png"
+            filename = f"command_{timestamp}{extension}"
         
         return screenshots_dir / filename
     
+    def resolve_screenshot_path(self, screenshot_path: str) -> str:
+        """
+        Get a readable path for a captured screenshot.
+        Screenshots deduplicated without a hard link live only in the shared store.
+        
+        Args:
+            screenshot_path: Path the screenshot was captured to
+        
+        Returns:
+            The same path, or the stored object it refers to
+        """
+        if self.screenshot_store:
+            return self.screenshot_store.resolve(screenshot_path)
+        return screenshot_path
+    
     def get_documentation_path(self, filename: Optional[str] = None) -> Path:
         """
         Get path for saving documentation in the current session.
@@ -247,13 +317,30 @@ class SessionManager:
         if not self.current_session_dir:
             return {}
         
+        # Everything queued so far must be on disk before files are counted and read
+        self.writer.flush()
+        
         end_time = datetime.now()
         duration = None
         if self.session_start_time:
             duration = (end_time - self.session_start_time).total_seconds()
         
         # Count files
-        screenshot_count = len(list((self.current_session_dir / "screenshots").glob("*.png")))
+        screenshot_count = sum(
+            1 for path in (self.current_session_dir / "screenshots").glob("*")
+            if path.suffix.lower() in SCREENSHOT_EXTENSIONS
+        )
+        
+        # Deduplication results (steps may exist only as manifest references)
+        if self.screenshot_store:
+            dedup_stats = self.screenshot_store.get_stats()
+            if dedup_stats['steps']:
+                self.screenshot_store.write_manifest()
+                screenshot_count = dedup_stats['steps']
+                self.extra_metadata['screenshot_dedup'] = dedup_stats
+        
+        # Write queue and backpressure counters
+        self.extra_metadata['session_writer'] = self.writer.get_stats()
         
         # Load events if available
         events_summary = {}
@@ -308,6 +395,9 @@ class SessionManager:
         if events_summary:
             summary.update(events_summary)
         
+        # Add extra sections (e.g. OCR cache statistics)
+        summary.update(self.extra_metadata)
+        
         # Update metadata file with end time
         metadata_file = self.current_session_dir / "metadata" / "session_info.json"
         if metadata_file.exists():
@@ -323,11 +413,16 @@ class SessionManager:
                 if events_summary:
                     metadata.update(events_summary)
                 
-                with open(metadata_file, "w", encoding="utf-8") as f:
-                    json.dump(metadata, f, indent=2)
+                metadata.update(self.extra_metadata)
+                
+                self.writer.write_json(metadata_file, metadata)
             except Exception:
                 pass
         
+        # Flush and stop the writer thread; later writes (e.g. appending to the
+        # documentation) restart it, so whoever makes them stops it again
+        self.writer.stop()
+        
         return summary
     
     def get_session_path(self, relative_path: str) -> Path:
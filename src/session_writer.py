@@ -0,0 +1,209 @@
+"""
+Session Writer - One thread that performs every file write for a session.
+Screenshots, events, metadata and documentation used to be written from
+whichever thread produced them (keyboard-listener threads, the Tk thread, the
+processing thread), racing each other for the disk. Producers now hand bytes
+to a single writer thread through a bounded queue: when the disk falls behind,
+producers block (backpressure) instead of piling up memory, and the time they
+spend blocked is measured.
+
+Files are written to a temporary name and renamed into place, so readers never
+see a half-written file. The fsync policy decides when data is forced to disk:
+
+    never     leave it to the OS (fastest)
+    on_flush  fsync everything written since the last flush() when flush() runs
+    always    fsync every file before it is renamed into place (most durable)
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+FSYNC_POLICIES = ('never', 'on_flush', 'always')
+
+
+class SessionWriter:
+    """Single writer thread with a bounded queue for session files."""
+
+    def __init__(self, max_pending: int = 64, fsync_policy: str = 'never'):
+        """
+        Initialize session writer.
+
+        Args:
+            max_pending: Queued writes before producers block
+            fsync_policy: One of FSYNC_POLICIES
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.fsync_policy = fsync_policy
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Files written since the last flush (fsynced then with 'on_flush')
+        self._unsynced: List[Path] = []
+        self.writes = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self.fsyncs = 0
+        self.write_seconds = 0.0
+        self.max_depth = 0
+        self.stalls = 0
+        self.stall_seconds = 0.0
+
+    def start(self) -> 'SessionWriter':
+        """Start the writer thread (no-op if already running)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return self
+
+    def write(self, path, data: Union[bytes, str], append: bool = False) -> Future:
+        """
+        Queue a file write. Blocks while the queue is full.
+
+        Args:
+            path: Destination path (parent folders are created)
+            data: File contents (str is written as UTF-8)
+            append: Append to the file instead of replacing it
+
+        Returns:
+            Future resolving to the path once it is on disk (or to the write's error)
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return self.call(self._write_file, Path(path), data, append)
+
+    def write_json(self, path, obj, indent: int = 2) -> Future:
+        """Queue a JSON file write; obj is serialized now, on the calling thread."""
+        return self.write(path, json.dumps(obj, indent=indent))
+
+    def call(self, fn: Callable, *args) -> Future:
+        """
+        Run some other file operation (e.g. os.link) on the writer thread, in
+        order with the queued writes.
+
+        Returns:
+            Future resolving to fn's result
+        """
+        future: Future = Future()
+        self._put((fn, args, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until everything queued so far is on disk (fsynced with 'on_flush').
+
+        Returns:
+            Whether the flush completed within the timeout
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        barrier = self.call(self._sync_unsynced)
+        try:
+            barrier.result(timeout)
+            return True
+        except Exception:
+            return False
+
+    def stop(self):
+        """Flush, then stop the writer thread."""
+        self.flush()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+    @property
+    def depth(self) -> int:
+        """Writes currently queued."""
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict:
+        """Write and backpressure counters suitable for session metadata."""
+        return {
+            'fsync_policy': self.fsync_policy,
+            'writes': self.writes,
+            'bytes_written': self.bytes_written,
+            'errors': self.errors,
+            'fsyncs': self.fsyncs,
+            'avg_write_ms': round(self.write_seconds / self.writes * 1000, 2) if self.writes else 0.0,
+            'queue_capacity': self._queue.maxsize,
+            'queue_depth': self.depth,
+            'max_queue_depth': self.max_depth,
+            'stalls': self.stalls,
+            'stall_seconds': round(self.stall_seconds, 4),
+        }
+
+    def _put(self, item):
+        self.start()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Backpressure: wait for the writer to catch up
+            started = time.perf_counter()
+            self._queue.put(item)
+            with self._lock:
+                self.stalls += 1
+                self.stall_seconds += time.perf_counter() - started
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def _run(self):
+        """Writer loop: run queued operations in order until a stop sentinel arrives."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            fn, args, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                self.errors += 1
+                future.set_exception(e)
+
+    def _write_file(self, path: Path, data: bytes, append: bool) -> Path:
+        started = time.perf_counter()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if append:
+            with open(path, "ab") as f:
+                f.write(data)
+                self._sync_file(f)
+        else:
+            temp = path.with_name(path.name + ".tmp")
+            with open(temp, "wb") as f:
+                f.write(data)
+                self._sync_file(f)
+            os.replace(temp, path)
+        if self.fsync_policy == 'on_flush':
+            self._unsynced.append(path)
+        self.writes += 1
+        self.bytes_written += len(data)
+        self.write_seconds += time.perf_counter() - started
+        return path
+
+    def _sync_file(self, f):
+        if self.fsync_policy == 'always':
+            f.flush()
+            os.fsync(f.fileno())
+            self.fsyncs += 1
+
+    def _sync_unsynced(self):
+        """fsync files written since the last flush ('on_flush' policy)."""
+        paths, self._unsynced = self._unsynced, []
+        for path in paths:
+            try:
+                with open(path, "rb") as f:
+                    os.fsync(f.fileno())
+                self.fsyncs += 1
+            except OSError:
+                self.errors += 1
@@ -1,15 +1,214 @@
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, List, Optional
+
 from openai import OpenAI
 from dotenv import load_dotenv
 
+try:
+    from .thumbnails import ThumbnailService
+    from .llm_cache import get_llm_cache
+    from .llm_calls import get_llm_caller, AttemptTimeout, CancelToken, StreamInterrupted
+    from .summarizers import Summarizer, OfflineSummarizer, register_summarizer, create_summarizer
+except ImportError:
+    # Imported as a top-level module (e.g. from main.py)
+    from thumbnails import ThumbnailService
+    from llm_cache import get_llm_cache
+    from llm_calls import get_llm_caller, AttemptTimeout, CancelToken, StreamInterrupted
+    from summarizers import Summarizer, OfflineSummarizer, register_summarizer, create_summarizer
+
 # Load environment variables from .env file
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
+
+MODEL = "gpt-4o-mini"
+
+# Created on first use, so importing this module doesn't need an API key
+client = None
+
+# Long sessions are summarized in windows of about this many prompt tokens each
+DEFAULT_CHUNK_TOKENS = 3000
+# Windows summarized at the same time in map-reduce mode
+DEFAULT_CONCURRENCY = 4
+# Rough English/code average, so no tokenizer dependency is needed
+CHARS_PER_TOKEN = 4
+# Least seconds between progress reports while a completion streams in
+PROGRESS_INTERVAL = 0.5
+
+
+def get_client():
+    """The shared OpenAI client (created on first use)."""
+    global client
+    if client is None:
+        # Retries and timeouts are handled by llm_calls
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return client
+
+
+def complete(prompt: str, temperature: float = 0.3,
+             on_token: Optional[Callable[[str], None]] = None, use_cache: bool = True,
+             cancel: Optional[CancelToken] = None) -> str:
+    """
+    Run one chat completion and return its text.
+    Answers come from the LLM cache when the same request was made before.
+    The request runs under the process-wide LlmCaller's deadline, retries and
+    hedging (streamed completions are not hedged, nor retried once text arrived).
+
+    Args:
+        prompt: User message
+        temperature: Sampling temperature
+        on_token: Optional callback function(text); the completion is then
+                  streamed and each piece is passed on as it arrives (a cached
+                  answer arrives as a single piece)
+        use_cache: False skips the cache lookup (the fresh answer is still stored)
+        cancel: Optional CancelToken that stops waiting for the LLM
+
+    Returns:
+        The completion text
+
+    Raises:
+        LlmCallCancelled, LlmDeadlineExceeded, or the request's error
+    """
+    cache = get_llm_cache()
+    key = cache.make_key(MODEL, temperature, prompt)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            if on_token is not None:
+                on_token(cached)
+            return cached
+    else:
+        cache.record_bypass()
+    caller = get_llm_caller()
+    if on_token is None:
+        text = caller.call(lambda timeout: _request_completion(prompt, temperature, timeout), cancel=cancel)
+    else:
+        text = caller.call(_StreamedCompletion(prompt, temperature, on_token, cancel), cancel=cancel, hedge=False)
+    cache.put(key, text)
+    return text
+
+
+def _request_completion(prompt: str, temperature: float, timeout: float) -> str:
+    """Send one chat completion request."""
+    response = get_client().chat.completions.create(
+        model=MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        timeout=timeout,
+    )
+    return response.choices[0].message.content.strip()
+
+
+class _StreamedCompletion:
+    """
+    Streamed completion request for LlmCaller.call.
+    Only the latest attempt may pass text on, so a request the caller gave up
+    on can't write into the document; once text was passed on, failures raise
+    StreamInterrupted so the call isn't retried (that would repeat the text).
+    """
+
+    def __init__(self, prompt: str, temperature: float, on_token: Callable[[str], None],
+                 cancel: Optional[CancelToken]):
+        self.prompt = prompt
+        self.temperature = temperature
+        self.on_token = on_token
+        self.cancel = cancel
+        self._lock = threading.Lock()
+        self._attempt = 0
+        self._delivered = False
+
+    def __call__(self, timeout: float) -> str:
+        with self._lock:
+            if self._delivered:
+                # A retry would start the text over
+                raise StreamInterrupted("LLM stream was interrupted after output started")
+            self._attempt += 1
+            attempt = self._attempt
+        give_up_at = time.monotonic() + timeout
+        stream = get_client().chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": self.prompt}],
+            temperature=self.temperature,
+            stream=True,
+            timeout=timeout,
+        )
+        pieces = []
+        try:
+            for chunk in stream:
+                if self.cancel is not None:
+                    self.cancel.raise_if_cancelled()
+                if time.monotonic() > give_up_at:
+                    raise AttemptTimeout(f"Streamed LLM request took longer than {timeout:.0f}s")
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    pieces.append(text)
+                    with self._lock:
+                        if attempt != self._attempt:
+                            raise AttemptTimeout("Streamed LLM request was superseded")
+                        self._delivered = True
+                        self.on_token(text)
+        except Exception as e:
+            if self._delivered:
+                raise StreamInterrupted(f"LLM stream failed after output started: {e}") from e
+            raise
+        finally:
+            stream.close()
+        return "".join(pieces).strip()
+
+
+def _streaming_progress(on_token: Optional[Callable[[str], None]],
+                        on_progress: Optional[Callable[[str], None]]) -> Optional[Callable[[str], None]]:
+    """Token callback that also reports how much has been written, at most every PROGRESS_INTERVAL."""
+    if on_progress is None:
+        return on_token
+    state = {'chars': 0, 'reported': 0.0}
+
+    def handle(text: str):
+        if on_token is not None:
+            on_token(text)
+        state['chars'] += len(text)
+        now = time.monotonic()
+        if now - state['reported'] >= PROGRESS_INTERVAL:
+            state['reported'] = now
+            on_progress(f"Writing... {state['chars']} chars")
+
+    return handle
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
 
 
-def summarize_text(ocr_text):
-    """Send OCR result to LLM and return step-by-step documentation."""
+def chunk_by_tokens(parts: List[str], token_budget: int) -> List[List[str]]:
+    """
+    Group consecutive parts into windows of at most token_budget tokens.
+    A part larger than the budget gets a window of its own.
+    """
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for part in parts:
+        tokens = estimate_tokens(part)
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(part)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def summarize_text(ocr_text, on_token=None, use_cache=True, cancel=None):
+    """Send OCR result to LLM and return step-by-step documentation (streamed to on_token if given)."""
     prompt = f"""
 You are an assistant turning raw OCR text into step-by-step procedural documentation.
 Write concise numbered steps describing what the user did,
@@ -17,16 +216,156 @@ based only on this OCR text:
 
 {ocr_text}
 """
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,
-    )
-    summary = response.choices[0].message.content.strip()
-    return summary
+    return complete(prompt, on_token=on_token, use_cache=use_cache, cancel=cancel)
+
+
+def _documentation_prompt(commands_text: str, events_context: str = "") -> str:
+    return f"""You are an assistant creating step-by-step workflow documentation from terminal commands.
+
+The user executed these commands in sequence:
+{commands_text}{events_context}
+
+Create clear, numbered step-by-step documentation that:
+1. Explains what each command does
+2. Provides context for why it's needed
+3. Notes any important details or requirements
+4. Formats commands in code blocks
+5. Is suitable for someone learning this workflow
+
+Write the documentation in markdown format with proper formatting."""
 
 
-def summarize_commands(command_history, include_screenshots=True, session_base_path=None, events=None):
+def _section_prompt(commands_text: str, part: int, parts: int) -> str:
+    return f"""You are an assistant creating step-by-step workflow documentation from terminal commands.
+
+This is part {part} of {parts} of a longer session. The user executed these commands in sequence:
+{commands_text}
+
+Document only these steps, keeping their step numbers. For each, explain what the
+command does and why it's needed, note important details, and format commands in
+code blocks. Write markdown without an introduction or conclusion; the parts are
+merged afterwards."""
+
+
+def _merge_prompt(sections: List[str], events_context: str = "") -> str:
+    joined = "\n\n".join(f"--- Part {i} ---\n{section}" for i, section in enumerate(sections, 1))
+    return f"""You are an assistant creating step-by-step workflow documentation from terminal commands.
+
+The documentation of a long session was written in consecutive parts:
+{joined}{events_context}
+
+Merge the parts into one clear, numbered step-by-step document. Keep every step and
+its code blocks in order, remove repetition between parts, and add a short overview
+at the top. Write the documentation in markdown format with proper formatting."""
+
+
+def summarize_steps(step_lines: List[str], events_context: str = "",
+                    chunk_tokens: Optional[int] = DEFAULT_CHUNK_TOKENS,
+                    concurrency: int = DEFAULT_CONCURRENCY,
+                    on_token: Optional[Callable[[str], None]] = None,
+                    on_progress: Optional[Callable[[str], None]] = None,
+                    use_cache: bool = True, cancel: Optional[CancelToken] = None) -> str:
+    """
+    Document a session's steps with the LLM.
+    Sessions that fit in chunk_tokens take a single completion. Longer ones are
+    map-reduced: windows of steps are documented concurrently, then merged in
+    one more pass (in several rounds if the parts themselves are too long).
+
+    Args:
+        step_lines: Prompt text per step, in order
+        events_context: Optional extra context (e.g. applications used)
+        chunk_tokens: Prompt token budget per window (None = always one completion)
+        concurrency: Windows documented at the same time
+        on_token: Optional callback function(text) the final completion is streamed to
+        on_progress: Optional callback function(status) for progress messages
+        use_cache: False asks the LLM again even for cached requests
+        cancel: Optional CancelToken that stops the remaining LLM calls
+
+    Returns:
+        Markdown documentation
+    """
+    stream_to = _streaming_progress(on_token, on_progress)
+    commands_text = "".join(step_lines)
+    if not chunk_tokens or estimate_tokens(commands_text) <= chunk_tokens:
+        return complete(_documentation_prompt(commands_text, events_context), on_token=stream_to,
+                        use_cache=use_cache, cancel=cancel)
+
+    chunks = chunk_by_tokens(step_lines, chunk_tokens)
+    logger.info("Summarizing %d steps in %d parts", len(step_lines), len(chunks))
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        futures = {
+            pool.submit(complete, _section_prompt("".join(chunk), part, len(chunks)),
+                        use_cache=use_cache, cancel=cancel): part
+            for part, chunk in enumerate(chunks, 1)
+        }
+        results = {}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if on_progress is not None:
+                on_progress(f"Part {len(results)}/{len(chunks)}")
+        sections = [results[part] for part in sorted(results)]
+
+        # Reduce: merge neighbouring parts until they fit in one merge prompt
+        while len(sections) > 1 and estimate_tokens("".join(sections)) > chunk_tokens:
+            groups = chunk_by_tokens(sections, chunk_tokens)
+            if len(groups) == len(sections):
+                # Every part is already a window of its own
+                break
+            sections = list(pool.map(lambda group: complete(_merge_prompt(group), use_cache=use_cache, cancel=cancel),
+                                     groups))
+    return complete(_merge_prompt(sections, events_context), on_token=stream_to, use_cache=use_cache,
+                    cancel=cancel)
+
+
+class LlmSummarizer(Summarizer):
+    """Documents sessions with the OpenAI chat model (map-reduced when long)."""
+
+    name = 'llm'
+
+    def __init__(self, chunk_tokens: Optional[int] = DEFAULT_CHUNK_TOKENS,
+                 concurrency: int = DEFAULT_CONCURRENCY, use_cache: bool = True,
+                 cancel: Optional[CancelToken] = None):
+        """
+        Initialize LLM summarizer.
+
+        Args:
+            chunk_tokens: Prompt token budget per LLM call (None = one call)
+            concurrency: Windows documented at the same time
+            use_cache: False asks the LLM again even for cached requests
+            cancel: Optional CancelToken that stops the LLM calls
+        """
+        self.chunk_tokens = chunk_tokens
+        self.concurrency = concurrency
+        self.use_cache = use_cache
+        self.cancel = cancel
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return client is not None or bool(os.getenv("OPENAI_API_KEY"))
+
+    def summarize(self, steps, applications=(), on_token=None, on_progress=None) -> str:
+        step_lines = []
+        for i, (command, timestamp, screenshot) in enumerate(steps, 1):
+            line = f"Step {i} ({timestamp.strftime('%H:%M:%S')}): {command}\n"
+            if screenshot:
+                line += f"  Screenshot: {screenshot}\n"
+            step_lines.append(line)
+        events_context = ""
+        if applications:
+            events_context = f"\n\nApplications used during this session: {', '.join(sorted(applications))}\n"
+        return summarize_steps(
+            step_lines, events_context, self.chunk_tokens, self.concurrency,
+            on_token=on_token, on_progress=on_progress, use_cache=self.use_cache, cancel=self.cancel
+        )
+
+
+register_summarizer('llm', LlmSummarizer, preferred=True)
+
+
+def summarize_commands(command_history, include_screenshots=True, session_base_path=None, events=None,
+                       thumbnail_width=None, thumbnails=None,
+                       chunk_tokens=DEFAULT_CHUNK_TOKENS, concurrency=DEFAULT_CONCURRENCY,
+                       document=None, on_progress=None, use_cache=True, summarizer=None, cancel=None):
     """
     Generate documentation from a list of captured commands.
     
@@ -35,12 +374,31 @@ def summarize_commands(command_history, include_screenshots=True, session_base_p
         include_screenshots: Whether to reference screenshots in documentation
         session_base_path: Optional base path for session (used to create relative paths)
         events: Optional list of event dictionaries (from EventTracker)
+        thumbnail_width: Optional preview width; screenshots are then embedded as
+                         previews of this width that link to the full-size image
+        thumbnails: Optional ThumbnailService holding the previews (default: a
+                    cache in <session_base_path>/thumbnails)
+        chunk_tokens: Prompt token budget per LLM call; longer sessions are
+                      documented in windows and merged (None = one call)
+        concurrency: Windows documented at the same time
+        document: Optional DocumentStream; the documentation is written to it as
+                  the LLM produces it, and replaced by the finished document at the end
+        on_progress: Optional callback function(status) for progress messages
+        use_cache: False asks the LLM again even if the same request was cached
+        summarizer: Summarizer name ('llm', 'offline', ...) or instance writing the
+                    documentation body (default: the LLM); if it fails, the offline
+                    summarizer writes it instead
+        cancel: Optional CancelToken; cancelling stops waiting for the LLM and the
+                offline summarizer writes the documentation instead
     
     Returns:
         Formatted markdown documentation
     """
     if not command_history:
-        return "# Command Session\n\nNo commands were captured.\n"
+        doc = "# Command Session\n\nNo commands were captured.\n"
+        if document is not None:
+            document.replace(doc)
+        return doc
     
     def get_relative_path(full_path, base_path):
         """Convert absolute path to relative path if within session folder."""
@@ -59,91 +417,73 @@ def summarize_commands(command_history, include_screenshots=True, session_base_p
         except Exception:
             return full_path
     
-    # Build command list for LLM
-    commands_text = ""
+    if thumbnail_width and thumbnails is None:
+        cache_base = session_base_path or Path(command_history[0][2] or ".").parent
+        thumbnails = ThumbnailService(Path(cache_base) / "thumbnails")
+    
+    def screenshot_markdown(screenshot_path, alt):
+        """Image markdown for a screenshot (a linked preview with thumbnail_width)."""
+        rel_path = get_relative_path(screenshot_path, session_base_path)
+        if thumbnail_width:
+            preview = thumbnails.get(screenshot_path, thumbnail_width)
+            if preview:
+                rel_preview = get_relative_path(preview, session_base_path)
+                return f"[![{alt}]({rel_preview})]({rel_path})"
+        return f"![{alt}]({rel_path})"
+    
+    # Steps as the summarizer sees them (screenshots relative to the session folder)
+    steps = [
+        (command, timestamp,
+         get_relative_path(screenshot_path, session_base_path) if include_screenshots and screenshot_path else None)
+        for command, timestamp, screenshot_path in command_history
+    ]
+    
+    # Get applications used
+    applications_used = set()
+    for event in events or []:
+        event_data = event.get('event_data', {})
+        if 'process_name' in event_data and event_data['process_name']:
+            applications_used.add(event_data['process_name'])
+    
+    # Add header and command list
+    header = "# Command Session Documentation\n\n"
+    header += f"**Session Date:** {command_history[0][1].strftime('%Y-%m-%d %H:%M:%S')}\n"
+    header += f"**Total Commands:** {len(command_history)}\n\n"
+    
+    # Add event summary if available
+    if applications_used:
+        header += f"**Applications Used:** {', '.join(sorted(applications_used))}\n\n"
+    
+    header += "## Commands Executed\n\n"
+    
     for i, (command, timestamp, screenshot_path) in enumerate(command_history, 1):
-        commands_text += f"Step {i} ({timestamp.strftime('%H:%M:%S')}): {command}\n"
+        header += f"{i}. `{command}`\n"
         if include_screenshots and screenshot_path:
             # Use relative path if session_base_path is provided
-            rel_path = get_relative_path(screenshot_path, session_base_path)
-            commands_text += f"  Screenshot: {rel_path}\n"
-    
-    # Add event context if available
-    events_context = ""
-    if events:
-        # Get applications used
-        applications_used = set()
-        for event in events:
-            event_data = event.get('event_data', {})
-            if 'process_name' in event_data and event_data['process_name']:
-                applications_used.add(event_data['process_name'])
-        
-        if applications_used:
-            events_context = f"\n\nApplications used during this session: {', '.join(sorted(applications_used))}\n"
-    
-    prompt = f"""You are an assistant creating step-by-step workflow documentation from terminal commands.
-
-The user executed these commands in sequence:
-{commands_text}{events_context}
-
-Create clear, numbered step-by-step documentation that:
-1. Explains what each command does
-2. Provides context for why it's needed
-3. Notes any important details or requirements
-4. Formats commands in code blocks
-5. Is suitable for someone learning this workflow
-
-Write the documentation in markdown format with proper formatting."""
+            header += f"   {screenshot_markdown(screenshot_path, f'Screenshot {i}')}\n"
+    
+    header += "\n---\n\n## Documentation\n\n"
+    
+    if document is not None:
+        document.replace(header)
+    
+    if summarizer is None or summarizer == 'llm':
+        summarizer = LlmSummarizer(chunk_tokens, concurrency, use_cache, cancel)
+    elif isinstance(summarizer, str):
+        summarizer = create_summarizer(summarizer)
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
+        summary = summarizer.summarize(
+            steps, applications_used,
+            on_token=document.write if document is not None else None,
+            on_progress=on_progress
         )
-        summary = response.choices[0].message.content.strip()
-        
-        # Add header and command list
-        header = "# Command Session Documentation\n\n"
-        header += f"**Session Date:** {command_history[0][1].strftime('%Y-%m-%d %H:%M:%S')}\n"
-        header += f"**Total Commands:** {len(command_history)}\n\n"
-        
-        # Add event summary if available
-        if events:
-            applications_used = set()
-            for event in events:
-                event_data = event.get('event_data', {})
-                if 'process_name' in event_data and event_data['process_name']:
-                    applications_used.add(event_data['process_name'])
-            
-            if applications_used:
-                header += f"**Applications Used:** {', '.join(sorted(applications_used))}\n\n"
-        
-        header += "## Commands Executed\n\n"
-        
-        for i, (command, timestamp, screenshot_path) in enumerate(command_history, 1):
-            header += f"{i}. `{command}`\n"
-            if include_screenshots and screenshot_path:
-                # Use relative path if session_base_path is provided
-                rel_path = get_relative_path(screenshot_path, session_base_path)
-                header += f"   ![Screenshot {i}]({rel_path})\n"
-        
-        header += "\n---\n\n## Documentation\n\n"
-        
-        return header + summary
     except Exception:
-        # Fallback: simple markdown without LLM
-        doc = "# Command Session Documentation\n\n"
-        doc += f"**Session Date:** {command_history[0][1].strftime('%Y-%m-%d %H:%M:%S')}\n"
-        doc += f"**Total Commands:** {len(command_history)}\n\n"
-        doc += "## Steps\n\n"
-        
-        for i, (command, timestamp, screenshot_path) in enumerate(command_history, 1):
-            doc += f"### Step {i}: {command}\n\n"
-            doc += f"**Time:** {timestamp.strftime('%H:%M:%S')}\n\n"
-            if include_screenshots and screenshot_path:
-                # Use relative path if session_base_path is provided
-                rel_path = get_relative_path(screenshot_path, session_base_path)
-                doc += f"![Screenshot]({rel_path})\n\n"
-        
-        return doc
+        # Fallback: document the steps without the LLM
+        logger.warning("%s summarizer failed, using offline documentation", summarizer.name, exc_info=True)
+        summary = OfflineSummarizer().summarize(steps, applications_used)
+    doc = header + summary
+    
+    if document is not None:
+        document.replace(doc)
+    return doc
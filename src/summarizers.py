@@ -0,0 +1,343 @@
+"""
+Summarizers - Backends that write the documentation body for a session.
+summarize_commands builds the document header and command list, then asks a
+summarizer for the part under "## Documentation". The LLM summarizer lives in
+summarize.py and registers itself when that module is imported (which
+create_summarizer does on first use); the offline summarizer here needs no
+network: it recognizes common command families, groups consecutive related
+steps, and explains subcommands and flags from the bundled table in
+command_knowledge.py.
+"""
+
+import importlib
+import re
+import shlex
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .command_knowledge import FAMILIES, TOOLS, ALIASES, WRAPPERS, FALLBACK_COMMAND
+except ImportError:
+    # Imported as a top-level module (e.g. from main.py)
+    from command_knowledge import FAMILIES, TOOLS, ALIASES, WRAPPERS, FALLBACK_COMMAND
+
+# (command, timestamp, screenshot path to show or None)
+Step = Tuple[str, datetime, Optional[str]]
+
+# What the OCR pipeline stores when it can't read a capture's command
+UNREADABLE_COMMANDS = {"", FALLBACK_COMMAND}
+
+# Shell operators between commands on one line, and how steps read across them
+OPERATORS = {
+    '&&': ", then ",
+    ';': ", then ",
+    '||': ", or if that fails, ",
+    '|': ", and pass the output to: ",
+    '&': " in the background, then ",
+}
+
+OTHER_FAMILY = "Other commands"
+
+_ENV_ASSIGNMENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+_PROGRAM_SUFFIXES = ('.exe', '.cmd', '.bat', '.ps1')
+
+
+class Summarizer:
+    """Writes the body of a session's documentation."""
+
+    name = ''
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Whether this summarizer can run in this environment."""
+        return True
+
+    def summarize(self, steps: List[Step], applications: Iterable[str] = (),
+                  on_token: Optional[Callable[[str], None]] = None,
+                  on_progress: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Document a session's steps.
+
+        Args:
+            steps: (command, timestamp, screenshot) per step, in order; screenshot
+                   is the path to show in the document, or None
+            applications: Applications used during the session
+            on_token: Optional callback function(text) the body is streamed to
+            on_progress: Optional callback function(status) for progress messages
+
+        Returns:
+            Markdown documentation body
+        """
+        raise NotImplementedError
+
+
+class CommandExplanation:
+    """What one command on a step's line does."""
+
+    def __init__(self, family: Optional[str], summary: str, flags: List[Tuple[str, str]]):
+        """
+        Initialize command explanation.
+
+        Args:
+            family: Key into FAMILIES, or None for unknown programs
+            summary: One-sentence description
+            flags: (flag as typed, meaning) for each recognized flag
+        """
+        self.family = family
+        self.summary = summary
+        self.flags = flags
+
+
+def split_commands(line: str) -> Tuple[List[List[str]], List[str]]:
+    """
+    Split a command line into commands and the operators between them.
+
+    Returns:
+        (list of token lists, list of operators)
+    """
+    lexer = shlex.shlex(line, posix=False, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        # Unbalanced quotes (often an OCR slip): fall back to whitespace
+        tokens = line.split()
+
+    commands: List[List[str]] = [[]]
+    operators: List[str] = []
+    for token in tokens:
+        if token in OPERATORS:
+            if commands[-1]:
+                commands.append([])
+                operators.append(token)
+            continue
+        if len(token) >= 2 and token[0] == token[-1] and token[0] in "'\"":
+            token = token[1:-1]
+        commands[-1].append(token)
+    if not commands[-1]:
+        commands.pop()
+        operators = operators[:len(commands) - 1]
+    return commands, operators
+
+
+def _program_name(token: str) -> str:
+    name = re.split(r"[\\/]", token)[-1].lower()
+    for suffix in _PROGRAM_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return ALIASES.get(name, name)
+
+
+def _flag_table(*tables: Dict[str, str]) -> Dict[str, Tuple[str, bool]]:
+    """Flag -> (meaning, takes a value) from knowledge-table flag dicts."""
+    merged = {}
+    for table in tables:
+        for key, meaning in table.items():
+            flag, _, placeholder = key.partition(' ')
+            merged[flag] = (meaning, bool(placeholder))
+    return merged
+
+
+def _format_args(args: List[str]) -> str:
+    return ", ".join(f"`{arg}`" for arg in args)
+
+
+def explain_command(tokens: List[str]) -> CommandExplanation:
+    """Explain one command (a token list without shell operators)."""
+    tokens = list(tokens)
+    while tokens and (_ENV_ASSIGNMENT.match(tokens[0]) or tokens[0].lower() in WRAPPERS):
+        tokens.pop(0)
+    if not tokens:
+        return CommandExplanation('shell', "Set environment variables", [])
+
+    program = _program_name(tokens[0])
+    args = tokens[1:]
+    # "python -m pip install ..." is explained as "pip install ..."
+    if program == 'python' and len(args) >= 2 and args[0] == '-m' and _program_name(args[1]) in TOOLS:
+        program = _program_name(args[1])
+        args = args[2:]
+
+    entry = TOOLS.get(program)
+    if entry is None:
+        return CommandExplanation(None, f"Run `{' '.join(tokens)}`", [])
+
+    subcommands = entry['subcommands']
+    subcommand = None
+    flags = _flag_table(entry['flags'])
+    explained: List[Tuple[str, str]] = []
+    positional: List[str] = []
+    i = 0
+    while i < len(args):
+        token = args[i]
+        i += 1
+        if subcommand is None and not positional and token in subcommands:
+            subcommand = subcommands[token]
+            flags = _flag_table(entry['flags'], subcommand[1])
+            continue
+        name, _, inline_value = token.partition('=')
+        if name in flags:
+            meaning, takes_value = flags[name]
+            shown = token
+            if takes_value and not inline_value and i < len(args):
+                value = args[i]
+                shown = f'{token} "{value}"' if " " in value else f"{token} {value}"
+                i += 1
+            explained.append((shown, meaning))
+        elif token.startswith('--'):
+            continue
+        elif token.startswith('-') and len(token) > 2 and all(f"-{c}" in flags for c in token[1:]):
+            # Combined short flags, e.g. ls -la
+            explained.extend((f"-{c}", flags[f"-{c}"][0]) for c in token[1:])
+        elif token.startswith('-') and token != '-':
+            continue
+        else:
+            positional.append(token)
+
+    if subcommand is not None:
+        summary = subcommand[0]
+        if positional and len(subcommand) > 2:
+            summary = subcommand[2].format(args=_format_args(positional))
+    elif positional and entry.get('with_args'):
+        summary = entry['with_args'].format(args=_format_args(positional))
+    elif positional and subcommands:
+        summary = f"{entry['summary']}: `{' '.join(positional)}`"
+    else:
+        summary = entry['summary']
+    return CommandExplanation(entry['family'], summary, explained)
+
+
+def explain_line(line: str) -> Tuple[Optional[str], str, List[Tuple[str, str]]]:
+    """
+    Explain a step's command line (which may chain several commands).
+
+    Returns:
+        (family of the first recognized command or None, description, flags)
+    """
+    commands, operators = split_commands(line)
+    explanations = [explain_command(tokens) for tokens in commands]
+    if not explanations:
+        return None, f"Run `{line}`", []
+    description = explanations[0].summary
+    for operator, explanation in zip(operators, explanations[1:]):
+        description += OPERATORS[operator] + explanation.summary[:1].lower() + explanation.summary[1:]
+    family = next((e.family for e in explanations if e.family), None)
+    flags = [flag for e in explanations for flag in e.flags]
+    return family, description, flags
+
+
+class OfflineSummarizer(Summarizer):
+    """Rule/template summarizer: deterministic and instant, no network needed."""
+
+    name = 'offline'
+
+    def summarize(self, steps: List[Step], applications: Iterable[str] = (),
+                  on_token: Optional[Callable[[str], None]] = None,
+                  on_progress: Optional[Callable[[str], None]] = None) -> str:
+        # Consecutive steps of the same family form one section
+        sections: List[Tuple[str, List[Tuple[int, str, str, List[Tuple[str, str]]]]]] = []
+        unreadable = 0
+        for number, (command, timestamp, screenshot) in enumerate(steps, 1):
+            command = (command or "").strip()
+            if command in UNREADABLE_COMMANDS:
+                unreadable += 1
+                family = sections[-1][0] if sections else OTHER_FAMILY
+                entry = (number, "", "The command text could not be read from the screenshot.", [])
+            else:
+                family_key, description, flags = explain_line(command)
+                family = FAMILIES.get(family_key, OTHER_FAMILY)
+                entry = (number, command, description.rstrip('.') + ".", flags)
+            if sections and sections[-1][0] == family:
+                sections[-1][1].append(entry)
+            else:
+                sections.append((family, [entry]))
+
+        body = self._overview(len(steps), sections, unreadable, applications)
+        for family, entries in sections:
+            first, last = entries[0][0], entries[-1][0]
+            span = f"Step {first}" if first == last else f"Steps {first}-{last}"
+            body += f"\n\n### {family} ({span})"
+            for number, command, description, flags in entries:
+                body += f"\n\n**Step {number}.** {description}"
+                if command:
+                    body += f"\n\n```shell\n{command}\n```"
+                if flags:
+                    body += "\n\n" + "\n".join(f"- `{flag}`: {meaning}" for flag, meaning in flags)
+        body += "\n"
+
+        if on_token is not None:
+            on_token(body)
+        return body
+
+    @staticmethod
+    def _overview(step_count: int, sections, unreadable: int, applications: Iterable[str]) -> str:
+        families = list(OrderedDict.fromkeys(family for family, _ in sections if family != OTHER_FAMILY))
+        overview = f"This session ran {step_count} command{'s' if step_count != 1 else ''}"
+        if families:
+            areas = families[0] if len(families) == 1 else f"{', '.join(families[:-1])} and {families[-1]}"
+            overview += f" in {len(families)} area{'s' if len(families) != 1 else ''}: {areas}"
+        overview += "."
+        applications = sorted(applications)
+        if applications:
+            overview += f" Applications used: {', '.join(applications)}."
+        if unreadable:
+            overview += (f" {unreadable} command{'s' if unreadable != 1 else ''} could not be read"
+                         " from the screenshots; see the screenshots above.")
+        return overview
+
+
+SUMMARIZERS: Dict[str, type] = OrderedDict([
+    ('offline', OfflineSummarizer),
+])
+
+
+def register_summarizer(name: str, summarizer_class: type, preferred: bool = False):
+    """
+    Add a summarizer.
+
+    Args:
+        name: Summarizer name used with create_summarizer
+        summarizer_class: Summarizer subclass
+        preferred: Try it before the others during auto-selection
+    """
+    SUMMARIZERS[name] = summarizer_class
+    if preferred:
+        SUMMARIZERS.move_to_end(name, last=False)
+
+
+def _register_llm_summarizer():
+    """Import summarize.py, which registers the 'llm' summarizer."""
+    if 'llm' in SUMMARIZERS:
+        return
+    if __package__:
+        importlib.import_module('.summarize', __package__)
+    else:
+        # Imported as a top-level module (e.g. from main.py)
+        importlib.import_module('summarize')
+
+
+def create_summarizer(name: Optional[str] = None, **kwargs) -> Summarizer:
+    """
+    Create a summarizer.
+    The 'llm' summarizer is registered by importing summarize.py, which is
+    done here first if nothing imported it yet.
+
+    Args:
+        name: Summarizer name ('llm', 'offline', or a registered one);
+              None picks the first one available in this environment
+        **kwargs: Passed to the summarizer's constructor
+
+    Returns:
+        Summarizer instance
+    """
+    if name is None or name == 'llm':
+        _register_llm_summarizer()
+    if name is not None:
+        if name not in SUMMARIZERS:
+            raise ValueError(f"Unknown summarizer: {name}")
+        return SUMMARIZERS[name](**kwargs)
+
+    for summarizer_class in SUMMARIZERS.values():
+        if summarizer_class.is_available():
+            return summarizer_class(**kwargs)
+    return OfflineSummarizer()
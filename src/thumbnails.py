@@ -0,0 +1,213 @@
+"""
+Thumbnails - Downscaled screenshot previews cached in the session folder.
+Full-size captures are several MB each at 4K, so the recording log and the
+generated documentation show small previews instead and link to the full
+image. Previews are made lazily on first request, or in the background right
+after a capture (straight from the in-memory frame, no decode), and cached as
+JPEG under <session>/thumbnails/ keyed by screenshot name and width.
+"""
+
+import io
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+from PIL import Image
+
+DEFAULT_THUMBNAIL_WIDTH = 320
+
+
+class ThumbnailService:
+    """Makes and caches screenshot previews, on demand or on a background thread."""
+
+    def __init__(self, cache_dir, default_width: int = DEFAULT_THUMBNAIL_WIDTH,
+                 quality: int = 80, on_ready: Optional[Callable[[str, str], None]] = None,
+                 writer=None):
+        """
+        Initialize thumbnail service.
+
+        Args:
+            cache_dir: Folder previews are cached in (e.g. <session>/thumbnails)
+            default_width: Preview width in pixels when none is requested
+            quality: JPEG quality of the previews
+            on_ready: Optional callback function(screenshot_path, thumbnail_path)
+                      called from the background thread as previews are made
+            writer: Optional SessionWriter that performs the file writes
+        """
+        self.cache_dir = Path(cache_dir)
+        self.default_width = default_width
+        self.quality = quality
+        self.on_ready = on_ready
+        self.writer = writer
+        self._lock = threading.Lock()
+        # thumbnail path -> Event set once it is written (or failed)
+        self._pending: Dict[str, threading.Event] = {}
+        # Previews made by this service (made from frames, they may predate the file)
+        self._made: Set[str] = set()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.generated = 0
+        self.cache_hits = 0
+        self.failed = 0
+        self.bytes_written = 0
+
+    def thumbnail_path(self, screenshot_path, width: Optional[int] = None) -> Path:
+        """Where the preview of a screenshot at this width is cached."""
+        width = width or self.default_width
+        return self.cache_dir / f"{Path(screenshot_path).stem}_w{width}.jpg"
+
+    def get(self, screenshot_path, width: Optional[int] = None) -> Optional[str]:
+        """
+        Get a screenshot's preview, making it now if it isn't cached yet.
+
+        Args:
+            screenshot_path: Full-size screenshot
+            width: Preview width (None uses default_width)
+
+        Returns:
+            Path to the preview, or None if the screenshot can't be read
+        """
+        if not screenshot_path:
+            return None
+        return self._make(screenshot_path, width)
+
+    def submit(self, screenshot_path: str, frame=None, width: Optional[int] = None):
+        """
+        Make a preview in the background.
+
+        Args:
+            screenshot_path: Full-size screenshot (need not be written yet if frame is given)
+            frame: Optional in-memory Frame to downscale instead of reading the file;
+                   the service holds its own reference until it is done
+            width: Preview width (None uses default_width)
+        """
+        if not screenshot_path:
+            return
+        self._start()
+        self._queue.put((screenshot_path, frame.retain() if frame is not None else None, width))
+
+    def flush(self):
+        """Block until every submitted preview has been made."""
+        if self._thread and self._thread.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        """Make any pending previews, then stop the background thread."""
+        thread = self._thread
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+        self._thread = None
+
+    def get_stats(self) -> Dict:
+        """Preview counters suitable for session metadata."""
+        return {
+            'generated': self.generated,
+            'cache_hits': self.cache_hits,
+            'failed': self.failed,
+            'bytes_written': self.bytes_written,
+        }
+
+    def _start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Background loop: make queued previews until a stop sentinel arrives."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                screenshot_path, frame, width = item
+                try:
+                    thumbnail = self._make(screenshot_path, width, frame)
+                finally:
+                    if frame is not None:
+                        frame.release()
+                if thumbnail and self.on_ready:
+                    try:
+                        self.on_ready(screenshot_path, thumbnail)
+                    except Exception:
+                        # Don't let callback errors stop the service
+                        pass
+            finally:
+                self._queue.task_done()
+
+    def _make(self, screenshot_path, width: Optional[int], frame=None) -> Optional[str]:
+        """Return the cached preview, making it if needed (one maker per preview)."""
+        target = self.thumbnail_path(screenshot_path, width)
+        key = str(target)
+
+        with self._lock:
+            event = self._pending.get(key)
+            is_maker = event is None
+            if is_maker:
+                if self._is_fresh(target, screenshot_path):
+                    self.cache_hits += 1
+                    return key
+                event = self._pending[key] = threading.Event()
+
+        if not is_maker:
+            # Another thread is making the same preview
+            event.wait()
+            return key if target.exists() else None
+
+        try:
+            img = frame.to_image() if frame is not None else self._open(screenshot_path)
+            if img is None:
+                with self._lock:
+                    self.failed += 1
+                return None
+            width = width or self.default_width
+            if img.width > width:
+                height = max(1, round(img.height * width / img.width))
+                img = img.resize((width, height), Image.BILINEAR, reducing_gap=2.0)
+            if self.writer is not None:
+                buffer = io.BytesIO()
+                img.convert('RGB').save(buffer, format='JPEG', quality=self.quality, optimize=True)
+                self.writer.write(target, buffer.getvalue()).result()
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                # Write beside the target and swap in, so readers never see a partial file
+                temp = target.with_name(target.name + ".tmp")
+                img.convert('RGB').save(temp, format='JPEG', quality=self.quality, optimize=True)
+                os.replace(temp, target)
+            with self._lock:
+                self._made.add(key)
+                self.generated += 1
+                self.bytes_written += target.stat().st_size
+            return key
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            event.set()
+
+    def _is_fresh(self, target: Path, screenshot_path) -> bool:
+        """Whether a cached preview exists and is not older than its screenshot (lock held)."""
+        if not target.exists():
+            return False
+        if str(target) in self._made:
+            return True
+        try:
+            return target.stat().st_mtime >= Path(screenshot_path).stat().st_mtime
+        except OSError:
+            return True
+
+    @staticmethod
+    def _open(screenshot_path) -> Optional[Image.Image]:
+        try:
+            with Image.open(screenshot_path) as img:
+                img.load()
+                return img
+        except OSError:
+            return None
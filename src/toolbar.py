@@ -6,6 +6,7 @@ A minimal, unobtrusive toolbar that stays at the bottom of the screen.
 import tkinter as tk
 from tkinter import messagebox
 import threading
+import multiprocessing
 from pathlib import Path
 import os
 from datetime import datetime
@@ -17,14 +18,30 @@ except ImportError:
         pass
 import sys
 
+try:
+    from PIL import Image, ImageTk
+    IMAGETK_AVAILABLE = True
+except ImportError:
+    # Pillow built without Tk support: the recording log shows text only
+    IMAGETK_AVAILABLE = False
+
 # Windows API for monitor detection
 if sys.platform == 'win32':
     import ctypes
 
-from .capture import capture_and_ocr, extract_terminal_text
+from .capture import capture_and_ocr
 from .summarize import summarize_text, summarize_commands
+from .document_stream import DocumentStream
 from .command_recorder import CommandRecorder
 from .session_manager import SessionManager
+from .ocr_pipeline import process_command_history
+from .ocr_cache import get_ocr_cache, configure_ocr_cache
+from .llm_cache import get_llm_cache, configure_llm_cache
+from .llm_calls import CallPolicy, CancelToken, LlmCallCancelled, configure_llm_calls, get_llm_caller
+from .delta_ocr import get_delta_ocr
+from .preprocess import configure_preprocessing
+from .encoder import ImageEncoder
+from .capture_backend import enable_dpi_awareness
 
 
 class ToolTip:
@@ -88,19 +105,15 @@ class ToolTip:
 
 class FloatingToolbar:
     def __init__(self):
+        # Per-monitor DPI awareness (Windows) so window rectangles and screen grabs
+        # agree on scaled monitors; must happen before the first window exists
+        enable_dpi_awareness()
+        
         self.root = tk.Tk()
         self.root.overrideredirect(True)  # Remove window decorations
         self.root.attributes('-topmost', True)  # Always on top
         self.root.attributes('-alpha', 0.95)  # Slight transparency
         
-        # Enable DPI awareness on Windows
-        if sys.platform == 'win32':
-            try:
-                ctypes.windll.shcore.SetProcessDpiAwareness(1)
-            except (AttributeError, OSError):
-                # DPI awareness not available or failed
-                pass
-        
         # Load environment variables
         load_dotenv()
         self.api_key = os.getenv("OPENAI_API_KEY", "")
@@ -121,8 +134,57 @@ class FloatingToolbar:
         # Recording log window for visual feedback
         self.log_window = None
         self.log_text = None
+        # PhotoImages shown in the log (Tk drops images nothing references)
+        self.log_preview_images = []
         self.captured_commands = []  # Store recent captures for display
         
+        # Post-recording OCR settings
+        self.ocr_workers = None  # Worker processes (None = CPU count, 1 = serial)
+        self.ocr_item_timeout = 60.0  # Seconds to wait for each screenshot's OCR
+        self.streaming_ocr = True  # OCR captures in the background while recording
+        self.ocr_options = {
+            'delta': True,  # Only OCR terminal lines that changed between captures
+            'bottom_up': True,  # Scan lines upward and stop at the prompt line
+        }
+        self.ocr_preprocessing = None  # Image cleanup before OCR, e.g. PreprocessConfig() (None = plain PIL path)
+        # Screenshot format: 'png' (compress_level 0-9), 'webp' (lossless) or 'qoi'
+        self.screenshot_encoder = ImageEncoder('png', compress_level=6)
+        # Grab only the command/focus area (plus margin) between full-window keyframes
+        self.region_capture = False
+        self.region_margin = 32  # Pixels around the region
+        self.keyframe_interval = 10  # Every Nth capture is the whole window
+        # Sample the terminal in the background so captures show it as it was before Enter
+        self.pre_capture_sampling = False
+        self.sampler_fps = 6.0  # 4-10 is plenty to catch the typed command
+        self.sampler_max_bytes = 64 * 1024 * 1024  # Memory cap for sampled frames
+        # Write every capture's stage timestamps to metadata/capture_trace.jsonl
+        # (latency histograms go to session_info.json either way)
+        self.latency_trace = False
+        # Small preview of each capture in the recording log, made in the background
+        self.log_previews = True
+        self.log_preview_width = 160
+        # Preview width for documentation.md (e.g. 480); None embeds full-size screenshots
+        self.doc_thumbnail_width = None
+        # When session files are forced to disk: 'never', 'on_flush' or 'always'
+        self.fsync_policy = 'on_flush'
+        # Long sessions are documented in windows of this many prompt tokens, then merged
+        self.summary_chunk_tokens = 3000
+        self.summary_concurrency = 4  # Windows documented at the same time
+        # LLM answers are cached under the sessions base dir; bypass to regenerate fresh docs
+        self.llm_cache_max_bytes = 64 * 1024 * 1024
+        self.llm_cache_bypass = False
+        # OCR results are cached on disk under the sessions base dir too (least recently used pruned)
+        self.ocr_cache_max_bytes = 64 * 1024 * 1024
+        # Who writes the documentation: 'llm', or 'offline' (rule-based, no API key or network)
+        self.summarizer = 'llm'
+        # LLM calls give up after llm_deadline seconds (retries included), a single
+        # request after llm_attempt_timeout; hedging re-sends requests slower than the p95
+        self.llm_deadline = 180.0
+        self.llm_attempt_timeout = 60.0
+        self.llm_hedging = False
+        # Set while documentation is generated; the record button cancels it
+        self.llm_cancel = None
+        
         # Auto-hide settings
         self.hide_delay = 3000  # Hide after 3 seconds of inactivity
         self.hide_timer = None
@@ -697,7 +759,10 @@ class FloatingToolbar:
         
     def toggle_recording(self):
         """Toggle recording on/off - ONLY way to stop recording."""
-        if self.is_recording:
+        if self.is_processing:
+            # Pressed while documentation is generated: stop waiting for the LLM
+            self.cancel_processing()
+        elif self.is_recording:
             # Stop recording (ONLY called via button press)
             self.stop_recording()
         else:
@@ -706,7 +771,9 @@ class FloatingToolbar:
     
     def toggle_capture_or_record(self):
         """Toggle between manual capture and command recording mode."""
-        if self.is_recording:
+        if self.is_processing:
+            self.cancel_processing()
+        elif self.is_recording:
             # Stop recording
             self.stop_recording()
         else:
@@ -719,7 +786,7 @@ class FloatingToolbar:
         if self.is_processing or self.is_recording:
             return
         
-        if not self.api_key or self.api_key.strip() == "":
+        if self.summarizer == 'llm' and (not self.api_key or self.api_key.strip() == ""):
             self.show_settings()
             messagebox.showwarning(
                 "API Key Required",
@@ -739,15 +806,41 @@ class FloatingToolbar:
         tracked_windows, tracked_processes = selection
         
         # Create session folder for this recording
-        self.session_manager = SessionManager()
+        self.session_manager = SessionManager(fsync_policy=self.fsync_policy)
         self.session_manager.create_session_folder()
+        self.session_manager.thumbnails.default_width = self.log_preview_width
+        self.session_manager.thumbnails.on_ready = self.on_thumbnail_ready
+        
+        # OCR results are cached across sessions under the sessions base dir
+        ocr_cache = get_ocr_cache()
+        ocr_cache_dir = self.session_manager.get_ocr_cache_dir()
+        if ocr_cache.disk_dir != ocr_cache_dir or ocr_cache.max_disk_bytes != self.ocr_cache_max_bytes:
+            ocr_cache = configure_ocr_cache(disk_dir=str(ocr_cache_dir), max_disk_bytes=self.ocr_cache_max_bytes)
+        ocr_cache.reset_stats()
+        self.configure_llm_cache(self.session_manager).reset_stats()
+        self.configure_llm_calls().reset_stats()
+        get_delta_ocr().reset()
+        get_delta_ocr().reset_stats()
+        configure_preprocessing(self.ocr_preprocessing)
         
         # Initialize command recorder with session manager and event filters
         self.is_recording = True
         self.command_recorder = CommandRecorder(
             on_command_captured=self.on_command_captured,
-            session_manager=self.session_manager
+            session_manager=self.session_manager,
+            streaming_ocr=self.streaming_ocr,
+            on_command_recognized=self.on_command_recognized,
+            ocr_options=self.ocr_options,
+            image_encoder=self.screenshot_encoder
         )
+        self.command_recorder.region_capture = self.region_capture
+        self.command_recorder.region_margin = self.region_margin
+        self.command_recorder.keyframe_interval = self.keyframe_interval
+        self.command_recorder.pre_capture_sampling = self.pre_capture_sampling
+        self.command_recorder.sampler_fps = self.sampler_fps
+        self.command_recorder.sampler_max_bytes = self.sampler_max_bytes
+        self.command_recorder.latency_trace = self.latency_trace
+        self.command_recorder.background_thumbnails = self.log_previews and IMAGETK_AVAILABLE
         
         # Set event tracker filters
         if self.command_recorder.event_tracker:
@@ -775,8 +868,8 @@ class FloatingToolbar:
         if not self.is_recording or not self.command_recorder:
             return
         
-        # Stop recording
-        command_history = self.command_recorder.stop_recording()
+        # Stop capturing; writers and OCR are drained by the processing thread
+        command_history = self.command_recorder.request_stop()
         self.is_recording = False
         
         # Save events if available
@@ -808,9 +901,14 @@ class FloatingToolbar:
         
         # Generate documentation from commands
         if command_history:
+            self.is_processing = True
+            self.llm_cancel = CancelToken()
+            ToolTip(self.capture_btn, "Cancel documentation")
             thread = threading.Thread(target=self.process_command_session, args=(command_history,), daemon=True)
             thread.start()
         else:
+            # Nothing to document, but the writers still need to finish
+            threading.Thread(target=self.command_recorder.finish_recording, daemon=True).start()
             self.root.after(0, lambda: messagebox.showinfo("Recording", "No commands were captured."))
             self.root.after(0, lambda: self.capture_btn.config(state=tk.NORMAL))
             self.root.after(0, lambda: self.update_status_indicator('idle'))
@@ -836,6 +934,22 @@ class FloatingToolbar:
             # Don't let UI updates stop recording
             pass
     
+    def on_command_recognized(self, command, screenshot_path):
+        """Callback from the streaming OCR thread when a capture's command is recognized."""
+        try:
+            self.root.after(0, lambda: self.update_recording_log_command(command, screenshot_path))
+        except Exception:
+            # Don't let UI updates stop recording
+            pass
+    
+    def on_thumbnail_ready(self, screenshot_path, thumbnail_path):
+        """Callback from the thumbnail thread when a capture's preview is ready."""
+        try:
+            self.root.after(0, lambda: self.update_recording_log_preview(thumbnail_path))
+        except Exception:
+            # Don't let UI updates stop recording
+            pass
+    
     def show_recording_log(self):
         """Show a log window displaying captured commands during recording."""
         if self.log_window:
@@ -961,10 +1075,59 @@ class FloatingToolbar:
                 self.log_text.config(state=tk.NORMAL)
                 self.log_text.delete("1.0", f"{len(lines) - 50}.0")
                 self.log_text.config(state=tk.DISABLED)
+                self._prune_log_preview_images()
         except Exception:
             # Don't let log updates break recording
             pass
     
+    def update_recording_log_command(self, command, screenshot_path):
+        """Add the recognized command text for a capture to the recording log."""
+        if not self.log_window or not self.log_text:
+            return
+        
+        try:
+            self.log_text.config(state=tk.NORMAL)
+            
+            filename = Path(screenshot_path).name if screenshot_path else "Unknown"
+            self.log_text.insert(tk.END, "    ", "info")
+            self.log_text.insert(tk.END, f"{command}", "command")
+            self.log_text.insert(tk.END, f"  ({filename})\n", "time")
+            
+            # Auto-scroll to bottom
+            self.log_text.see(tk.END)
+            self.log_text.config(state=tk.DISABLED)
+        except Exception:
+            # Don't let log updates break recording
+            pass
+    
+    def update_recording_log_preview(self, thumbnail_path):
+        """Show a capture's preview image in the recording log."""
+        if not self.log_window or not self.log_text or not IMAGETK_AVAILABLE:
+            return
+        
+        try:
+            with Image.open(thumbnail_path) as img:
+                photo = ImageTk.PhotoImage(img)
+            # Referenced for as long as the log shows it (see _prune_log_preview_images)
+            self.log_preview_images.append(photo)
+            
+            self.log_text.config(state=tk.NORMAL)
+            self.log_text.insert(tk.END, "    ", "info")
+            self.log_text.image_create(tk.END, image=photo, name=str(photo))
+            self.log_text.insert(tk.END, "\n", "info")
+            
+            # Auto-scroll to bottom
+            self.log_text.see(tk.END)
+            self.log_text.config(state=tk.DISABLED)
+        except Exception:
+            # Don't let log updates break recording
+            pass
+    
+    def _prune_log_preview_images(self):
+        """Drop references to previews whose lines were trimmed from the log."""
+        shown = set(self.log_text.image_names())
+        self.log_preview_images = [photo for photo in self.log_preview_images if str(photo) in shown]
+    
     def hide_recording_log(self):
         """Hide or close the recording log window."""
         if self.log_window:
@@ -974,6 +1137,7 @@ class FloatingToolbar:
                 pass
             self.log_window = None
             self.log_text = None
+        self.log_preview_images = []
         self.captured_commands = []
     
     def _show_new_windows_dialog(self):
@@ -1280,6 +1444,37 @@ class FloatingToolbar:
         # Make it clickable
         notif.attributes('-topmost', True)
     
+    def configure_llm_cache(self, session_manager):
+        """Point the LLM cache at the session manager's base dir (kept if already there)."""
+        llm_cache = get_llm_cache()
+        llm_cache_path = session_manager.get_llm_cache_path()
+        if llm_cache.db_path != llm_cache_path or llm_cache.max_bytes != self.llm_cache_max_bytes:
+            llm_cache = configure_llm_cache(str(llm_cache_path), max_bytes=self.llm_cache_max_bytes)
+        return llm_cache
+    
+    def configure_llm_calls(self):
+        """Apply the LLM deadline, timeout and hedging settings (kept if unchanged)."""
+        caller = get_llm_caller()
+        policy = caller.policy
+        if (policy.deadline, policy.attempt_timeout, policy.hedge) != \
+                (self.llm_deadline, self.llm_attempt_timeout, self.llm_hedging):
+            caller = configure_llm_calls(CallPolicy(
+                deadline=self.llm_deadline,
+                attempt_timeout=self.llm_attempt_timeout,
+                hedge=self.llm_hedging
+            ))
+        return caller
+    
+    def cancel_processing(self):
+        """Stop waiting for the LLM; the documentation is then written offline."""
+        if self.llm_cancel is not None and not self.llm_cancel.cancelled:
+            self.llm_cancel.cancel()
+            self.step_label.config(text="Cancelling...")
+    
+    def show_processing_progress(self, status):
+        """Show documentation progress in the toolbar (safe to call from any thread)."""
+        self.root.after(0, lambda: self.step_label.config(text=status))
+    
     def process_command_session(self, command_history):
         """Process recorded commands and generate documentation."""
         try:
@@ -1291,49 +1486,39 @@ class FloatingToolbar:
             
             # NOW process all screenshots - extract commands using OCR
             # This is where we do the image processing, not during capture
-            processed_history = []
-            for item in command_history:
-                # Handle both old format (command, timestamp, screenshot_path) 
-                # and new format (command, timestamp, screenshot_path, region)
-                if len(item) == 4:
-                    command, timestamp, screenshot_path, region = item
-                else:
-                    # Backward compatibility: old format without region
-                    command, timestamp, screenshot_path = item
-                    region = None
-                
-                # Process each screenshot to extract command text
-                if not command or command.strip() == "":
-                    # Extract from screenshot using OCR with focus region
-                    try:
-                        # Get window handle from region if available, otherwise from command_recorder
-                        window_hwnd = None
-                        if region and 'window_hwnd' in region:
-                            window_hwnd = region.get('window_hwnd')
-                        elif self.command_recorder and self.command_recorder.detected_terminal:
-                            window_hwnd = self.command_recorder.detected_terminal
-                        
-                        # Extract text with region support
-                        extracted = extract_terminal_text(
-                            screenshot_path, 
-                            region=region,
-                            window_hwnd=window_hwnd
-                        )
-                        if extracted and extracted.strip():
-                            command = extracted
-                        else:
-                            command = "Command captured"
-                    except Exception:
-                        # If OCR fails, just mark as captured
-                        command = "Command captured"
-                
-                processed_history.append((command, timestamp, screenshot_path))
+            default_hwnd = None
+            frames = None
+            on_ocr_result = None
+            if self.command_recorder:
+                # Wait for the writers (processing reads the session's files back)
+                # and pick up commands streaming OCR recognized meanwhile
+                command_history = self.command_recorder.finish_recording()
+                default_hwnd = self.command_recorder.detected_terminal
+                # Frames still in memory are OCR'd without re-reading the files
+                frames = self.command_recorder.take_frames()
+                latency = self.command_recorder.latency
+                on_ocr_result = lambda command, path: latency.mark(path, 'ocr_done')
+            
+            processed_history = process_command_history(
+                command_history,
+                workers=self.ocr_workers,
+                item_timeout=self.ocr_item_timeout,
+                default_hwnd=default_hwnd,
+                frames=frames,
+                ocr_options=self.ocr_options,
+                on_result=on_ocr_result
+            )
             
             # Generate documentation from processed commands
             # Pass session base path to use relative paths for screenshots
             session_base_path = None
             if self.session_manager and self.session_manager.current_session_dir:
                 session_base_path = str(self.session_manager.current_session_dir)
+                # Deduplicated screenshots without a hard link are linked via their stored object
+                processed_history = [
+                    (command, timestamp, self.session_manager.resolve_screenshot_path(path))
+                    for command, timestamp, path in processed_history
+                ]
             
             # Load events if available
             events = None
@@ -1347,13 +1532,6 @@ class FloatingToolbar:
                 except Exception:
                     pass
             
-            summary = summarize_commands(
-                processed_history, 
-                include_screenshots=True,
-                session_base_path=session_base_path,
-                events=events
-            )
-            
             # Save to file in session folder
             if self.session_manager:
                 output_path = self.session_manager.get_documentation_path("documentation.md")
@@ -1361,11 +1539,48 @@ class FloatingToolbar:
                 # Fallback to old location if no session manager
                 output_path = Path("docs/generated") / f"command_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
             
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(summary)
+            # The documentation is written to the file as it is generated
+            document = DocumentStream(
+                output_path, writer=self.session_manager.writer if self.session_manager else None
+            )
+            summarize_commands(
+                processed_history, 
+                include_screenshots=True,
+                session_base_path=session_base_path,
+                events=events,
+                thumbnail_width=self.doc_thumbnail_width,
+                thumbnails=self.session_manager.thumbnails if self.session_manager else None,
+                chunk_tokens=self.summary_chunk_tokens,
+                concurrency=self.summary_concurrency,
+                document=document,
+                on_progress=self.show_processing_progress,
+                use_cache=not self.llm_cache_bypass,
+                summarizer=self.summarizer,
+                cancel=self.llm_cancel
+            )
             
             # Finalize session and add session info to documentation
             if self.session_manager:
+                self.session_manager.add_metadata('ocr_cache', get_ocr_cache().get_stats())
+                self.session_manager.add_metadata('llm_cache', get_llm_cache().get_stats())
+                self.session_manager.add_metadata('llm_calls', get_llm_caller().get_stats())
+                if self.ocr_options.get('delta'):
+                    self.session_manager.add_metadata('delta_ocr', get_delta_ocr().get_stats())
+                if self.command_recorder:
+                    self.session_manager.add_metadata(
+                        'screenshot_encoding', self.command_recorder.frame_writer.get_stats()
+                    )
+                    self.session_manager.add_metadata(
+                        'capture', self.command_recorder.get_capture_stats()
+                    )
+                    latency = self.command_recorder.latency
+                    self.session_manager.add_metadata('latency', latency.get_histograms())
+                    if self.latency_trace:
+                        latency.write_trace(
+                            self.session_manager.get_session_path("metadata/capture_trace.jsonl"),
+                            writer=self.session_manager.writer
+                        )
+                self.session_manager.add_metadata('thumbnails', self.session_manager.thumbnails.get_stats())
                 session_summary = self.session_manager.finalize_session()
                 # Append session info to documentation
                 session_info = "\n\n---\n\n## Session Information\n\n"
@@ -1381,8 +1596,8 @@ class FloatingToolbar:
                 
                 session_info += f"- **Session Folder:** `{session_summary.get('session_dir', 'N/A')}`\n"
                 
-                with open(output_path, "a", encoding="utf-8") as f:
-                    f.write(session_info)
+                self.session_manager.writer.write(output_path, session_info, append=True)
+                self.session_manager.writer.stop()
             
             # Update UI
             self.root.after(0, lambda: self.capture_btn.config(state=tk.NORMAL))
@@ -1401,6 +1616,8 @@ class FloatingToolbar:
             self.root.after(2000, lambda: self.update_status_indicator('idle'))
         finally:
             self.is_processing = False
+            self.llm_cancel = None
+            self.root.after(0, lambda: ToolTip(self.capture_btn, "Start Recording"))
             # Change logo back to white when done
             self.root.after(0, lambda: self.logo_label.config(fg='#FFFFFF'))
     
@@ -1418,6 +1635,7 @@ class FloatingToolbar:
             return
         
         self.is_processing = True
+        self.llm_cancel = CancelToken()
         self.capture_btn.config(state=tk.DISABLED)
         self.update_status_indicator('processing')
         # Change logo to red when capturing
@@ -1441,13 +1659,14 @@ class FloatingToolbar:
             # Capture and OCR
             ocr_result = capture_and_ocr()
             
-            # Generate summary
-            summary = summarize_text(ocr_result)
-            
-            # Save to file
+            # Generate summary, writing it to the file as it arrives
             output_path = Path("docs/generated") / f"generated_doc_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(summary)
+            document = DocumentStream(output_path)
+            self.configure_llm_cache(self.session_manager or SessionManager())
+            self.configure_llm_calls()
+            summary = summarize_text(ocr_result, on_token=document.write, use_cache=not self.llm_cache_bypass,
+                                     cancel=self.llm_cancel)
+            document.replace(summary)
             
             # Update UI
             self.root.after(0, lambda: self.capture_btn.config(state=tk.NORMAL))
@@ -1457,6 +1676,10 @@ class FloatingToolbar:
             # Reset status after 2 seconds
             self.root.after(2000, lambda: self.draw_status_indicator('idle'))
             
+        except LlmCallCancelled:
+            self.root.after(0, lambda: self.capture_btn.config(state=tk.NORMAL))
+            self.root.after(0, lambda: self.show_notification("Documentation cancelled"))
+            self.root.after(0, lambda: self.update_status_indicator('idle'))
         except Exception as e:
             error_msg = str(e)
             self.root.after(0, lambda: self.capture_btn.config(state=tk.NORMAL))
@@ -1465,6 +1688,7 @@ class FloatingToolbar:
             self.root.after(2000, lambda: self.update_status_indicator('idle'))
         finally:
             self.is_processing = False
+            self.llm_cancel = None
             # Change logo back to white when done
             self.root.after(0, lambda: self.logo_label.config(fg='#FFFFFF'))
             
@@ -1602,6 +1826,8 @@ class FloatingToolbar:
 
 
 def main():
+    # Needed for the OCR process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     app = FloatingToolbar()
     app.run()
 
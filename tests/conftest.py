@@ -0,0 +1,28 @@
+"""
+Shared pytest setup - makes the `src` package importable from the tests.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def bgra_frame(width, height, bgr):
+    """A solid-colour Frame in the BGRA layout screen grabs use."""
+    from src.frame import Frame
+
+    pixel = bytes(bgr) + b'\xff'
+    return Frame(pixel * (width * height), width, height, 'BGRA')
+
+
+@pytest.fixture
+def ocr_cache(monkeypatch):
+    """A fresh process-wide OCR cache, restored after the test."""
+    from src import ocr_cache as ocr_cache_module
+
+    cache = ocr_cache_module.OcrCache()
+    monkeypatch.setattr(ocr_cache_module, '_cache', cache)
+    return cache
@@ -0,0 +1,155 @@
+"""
+Tests for capture.py OCR helpers.
+"""
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+import src.capture as capture
+
+
+class ScriptedEngine:
+    """Returns the given lines in order, one per OCR call."""
+    lang = 'eng'
+
+    def __init__(self, lines):
+        self.lines = list(lines)
+        self.psms = []
+
+    def image_to_string(self, img, psm=None):
+        self.psms.append(psm)
+        return self.lines[len(self.psms) - 1] + "\n"
+
+
+class RecordingEngine:
+    """Returns the same text for every OCR call and records the image sizes."""
+    lang = 'eng'
+
+    def __init__(self, text):
+        self.text = text
+        self.sizes = []
+
+    def image_to_string(self, img, psm=None):
+        self.sizes.append(img.size)
+        return self.text
+
+
+def _terminal(line_count):
+    img = Image.new('RGB', (400, 24 * line_count + 8), color='black')
+    draw = ImageDraw.Draw(img)
+    for i in range(line_count):
+        draw.text((8, 4 + i * 24), f"line number {i}", fill='white')
+    return img
+
+
+def test_bottom_up_scan_stops_at_prompt(monkeypatch, ocr_cache):
+    engine = ScriptedEngine(["Compiling...", "user@host:~/app$ make test", "unused"])
+    monkeypatch.setattr(capture, "get_ocr_engine", lambda: engine)
+
+    line = capture.scan_prompt_bottom_up(_terminal(8))
+
+    assert line == "user@host:~/app$ make test"
+    assert engine.psms == [capture.SINGLE_LINE_PSM] * 2
+
+
+def test_bottom_up_scan_gives_up_after_max_lines(monkeypatch, ocr_cache):
+    engine = ScriptedEngine(["no prompt here"] * 8)
+    monkeypatch.setattr(capture, "get_ocr_engine", lambda: engine)
+
+    assert capture.scan_prompt_bottom_up(_terminal(8), max_lines=3) is None
+    assert len(engine.psms) == 3
+
+
+def test_extract_terminal_text_uses_bottom_up_result(monkeypatch, ocr_cache):
+    engine = ScriptedEngine(["C:\\Users\\dev> git status"])
+    monkeypatch.setattr(capture, "get_ocr_engine", lambda: engine)
+
+    command = capture.extract_terminal_text(_terminal(3), bottom_up=True)
+
+    assert command == "git status"
+    assert len(engine.psms) == 1
+
+
+def test_plan_capture_region_covers_command_area_and_focus():
+    focus = {'x': 100, 'y': 50, 'width': 40, 'height': 20}
+
+    region = capture.plan_capture_region(800, 600, focus, margin=10)
+
+    assert region == {'x': 0, 'y': 40, 'width': 800, 'height': 560}
+
+
+def test_translate_region_into_capture_coordinates():
+    focus = {'x': 100, 'y': 50, 'width': 40, 'height': 20, 'confidence': 0.8}
+
+    assert capture.translate_region(focus, (0, 40)) == {
+        'x': 100, 'y': 10, 'width': 40, 'height': 20, 'confidence': 0.8
+    }
+    assert capture.translate_region(focus, (0, 60))['height'] == 10
+    assert capture.translate_region(None, (0, 60)) is None
+
+
+@pytest.mark.parametrize('kind', ['path', 'pil', 'numpy'])
+def test_screenshot_is_decoded_once_for_all_passes(kind, tmp_path, monkeypatch, ocr_cache):
+    img = _terminal(4)
+    source = {
+        'path': lambda: img.save(tmp_path / "shot.png") or str(tmp_path / "shot.png"),
+        'pil': lambda: img,
+        'numpy': lambda: np.asarray(img),
+    }[kind]()
+    opened = []
+    real_open = Image.open
+
+    def counting_open(*args, **kwargs):
+        opened.append(args)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(capture.Image, 'open', counting_open)
+    engine = RecordingEngine("")
+    monkeypatch.setattr(capture, "get_ocr_engine", lambda: engine)
+    monkeypatch.setattr(capture, "WIN32_AVAILABLE", False)
+
+    region = {'x': 0, 'y': 0, 'width': 100, 'height': 20, 'confidence': 0.8}
+    capture.extract_terminal_text(source, region=region, window_hwnd=7)
+
+    # Focus region and full window OCR share one decode (none for decoded input)
+    assert engine.sizes == [(100, 20), img.size]
+    assert len(opened) == (1 if kind == 'path' else 0)
+
+
+def test_open_image_passes_decoded_images_through():
+    img = _terminal(2)
+    array = np.asarray(img)
+
+    assert capture.open_image(img) is img
+    assert capture.open_image(array) is array
+
+
+def test_numpy_crop_is_a_view():
+    array = np.zeros((100, 400, 3), dtype=np.uint8)
+
+    crop = capture.crop_region(array, {'x': 10, 'y': 70, 'width': 500, 'height': 50})
+
+    # Clamped to the image, and no pixels copied
+    assert crop.shape == (30, 390, 3)
+    assert np.shares_memory(crop, array)
+    crop[0, 0] = 255
+    assert array[70, 10].tolist() == [255, 255, 255]
+
+
+def test_pil_crop_is_clamped_to_the_image():
+    crop = capture.crop_region(Image.new('RGB', (400, 100)), {'x': 10, 'y': 70, 'width': 500, 'height': 50})
+
+    assert crop.size == (390, 30)
+
+
+def test_heuristic_region_uses_image_size_without_window_rect(monkeypatch, ocr_cache):
+    engine = RecordingEngine("user@host:~/app$ make test")
+    monkeypatch.setattr(capture, "get_ocr_engine", lambda: engine)
+    monkeypatch.setattr(capture, "WIN32_AVAILABLE", False)
+
+    command = capture.extract_terminal_text(Image.new('RGB', (400, 100)), window_hwnd=7)
+
+    assert command == "make test"
+    # Bottom 30% of the image, full width
+    assert engine.sizes == [(400, 30)]
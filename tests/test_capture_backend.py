@@ -0,0 +1,301 @@
+"""
+Tests for capture backends: buffer recycling and window discovery.
+"""
+
+import os
+import pickle
+import time
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from src import capture_backend
+from src.capture_backend import (
+    CAPTURE_BACKENDS, CaptureBackend, FrameBufferPool, X11CaptureBackend, clamp_region,
+    create_capture_backend, monitor_for_rect, register_capture_backend, screen_area_for_rect
+)
+from src.command_recorder import CommandRecorder
+from src.frame import Frame
+
+
+def test_pool_reuses_released_buffers():
+    pool = FrameBufferPool(max_free=1)
+
+    first = pool.acquire(64)
+    pool.give_back(first)
+    second = pool.acquire(64)
+    other_size = pool.acquire(32)
+
+    assert second is first
+    assert other_size is not first
+    assert (pool.allocated, pool.reused) == (2, 1)
+
+
+def test_pool_drops_buffers_beyond_limit():
+    pool = FrameBufferPool(max_free=1)
+    pool.give_back(bytearray(8))
+    pool.give_back(bytearray(8))
+
+    pool.acquire(8)
+    pool.acquire(8)
+
+    assert pool.reused == 1
+
+
+def test_frame_recycled_after_last_release():
+    backend = CaptureBackend()
+    buffer = backend.pool.acquire(16)
+    frame = Frame(buffer, 2, 2, 'BGRA', on_release=backend._recycle)
+
+    # Handed to a writer and an OCR queue
+    frame.retain()
+    frame.retain()
+    frame.release()
+    frame.release()
+    assert backend.pool.acquire(16) is not buffer
+
+    frame.release()
+    assert backend.pool.acquire(16) is buffer
+
+
+def test_pickled_frame_owns_its_pixels():
+    released = []
+    frame = Frame(bytearray(b'\x01\x02\x03' * 4), 2, 2, 'RGB', on_release=released.append)
+
+    copy = pickle.loads(pickle.dumps(frame))
+    copy.release()
+
+    assert released == []
+    assert copy.to_image().getpixel((1, 1)) == (1, 2, 3)
+
+
+class FakeWindowBackend(CaptureBackend):
+    """Backend with a fixed set of windows, for exercising window discovery."""
+    name = 'fake'
+    supports_windows = True
+
+    def grab_window(self, window_id, region=None):
+        x, y, width, height = clamp_region(region, 40, 30)
+        return Frame(b'\x00\x00\x00' * (width * height), width, height, 'RGB',
+                     window_hwnd=window_id, offset=(x, y), window_size=(40, 30))
+
+    def get_window_size(self, window_id):
+        return (40, 30)
+
+    def list_windows(self):
+        return [(1, "notes.txt - editor"), (2, "dev@box: ~ - xterm"), (3, "Konsole")]
+
+    def get_foreground_window(self):
+        return 3
+
+    def get_window_title(self, window_id):
+        return dict(self.list_windows()).get(window_id, "")
+
+    def is_window_visible(self, window_id):
+        return window_id in dict(self.list_windows())
+
+
+def test_create_capture_backend(monkeypatch):
+    monkeypatch.setattr(capture_backend, 'CAPTURE_BACKENDS', CAPTURE_BACKENDS.copy())
+    register_capture_backend('fake', FakeWindowBackend, preferred=True)
+
+    assert next(iter(capture_backend.CAPTURE_BACKENDS)) == 'fake'
+
+    assert isinstance(create_capture_backend('fake'), FakeWindowBackend)
+    assert create_capture_backend('screen').supports_windows is False
+    with pytest.raises(ValueError):
+        create_capture_backend('nope')
+
+
+@pytest.mark.skipif(not os.environ.get('DISPLAY'), reason="needs an X server (e.g. Xvfb)")
+def test_x11_backend_grabs_window_by_xid():
+    xdisplay = pytest.importorskip('Xlib.display')
+    from Xlib import X
+
+    display = xdisplay.Display()
+    screen = display.screen()
+    # Solid colour window (0x336699 on a TrueColor visual) the server paints itself
+    window = screen.root.create_window(10, 10, 32, 16, 0, screen.root_depth, X.InputOutput,
+                                       X.CopyFromParent, background_pixel=0x336699)
+    window.map()
+    display.sync()
+    backend = X11CaptureBackend().open()
+    try:
+        # Mapping and the first expose are asynchronous
+        deadline = time.monotonic() + 2.0
+        while True:
+            frame = backend.grab_window(window.id)
+            pixel = frame.to_image().getpixel((16, 8))
+            if pixel == (0x33, 0x66, 0x99) or time.monotonic() > deadline:
+                break
+            frame.release()
+            time.sleep(0.05)
+
+        assert (frame.width, frame.height) == (32, 16)
+        assert frame.window_hwnd == window.id
+        assert frame.window_size == (32, 16)
+        assert pixel == (0x33, 0x66, 0x99)
+        assert backend.get_window_size(window.id) == (32, 16)
+        frame.release()
+    finally:
+        backend.close()
+        window.destroy()
+        display.close()
+
+
+def test_recorder_finds_and_captures_terminal_through_backend(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CAPTURE_BACKENDS, 'fake', FakeWindowBackend)
+    recorder = CommandRecorder(capture_backend='fake')
+    recorder.start_recording()
+    try:
+        # The focused terminal wins over the first one listed
+        assert recorder._find_terminal_window() == 3
+        assert recorder._is_terminal_window(2)
+        assert not recorder._is_terminal_window(1)
+
+        recorder.detected_terminal = 3
+        recorder._capture_command()
+    finally:
+        history = recorder.stop_recording()
+
+    assert len(history) == 1
+    assert history[0][2].endswith(".png")
+    assert Path(history[0][2]).is_file()
+
+
+def test_request_stop_leaves_draining_to_finish_recording(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CAPTURE_BACKENDS, 'fake', FakeWindowBackend)
+    recorder = CommandRecorder(capture_backend='fake')
+    recorder.start_recording()
+    recorder.detected_terminal = 3
+    recorder._capture_command()
+    writer_stops = []
+    stop_writer = recorder.frame_writer.stop
+    monkeypatch.setattr(recorder.frame_writer, 'stop', lambda: writer_stops.append(1) or stop_writer())
+
+    # What the UI thread does: no joins, flushes or backend teardown
+    history = recorder.request_stop()
+    assert not recorder.is_recording
+    assert len(history) == 1
+    assert writer_stops == []
+    assert recorder.capture_backend is not None
+
+    assert recorder.finish_recording() == history
+    assert writer_stops == [1]
+    assert recorder.capture_backend is None
+    assert Path(history[0][2]).is_file()
+
+
+def test_region_capture_with_keyframes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CAPTURE_BACKENDS, 'fake', FakeWindowBackend)
+    recorder = CommandRecorder(capture_backend='fake')
+    recorder.region_capture = True
+    recorder.region_margin = 2
+    recorder.keyframe_interval = 3
+    recorder.start_recording()
+    try:
+        recorder.detected_terminal = 3
+        for _ in range(4):
+            recorder._capture_command()
+            time.sleep(0.005)  # Screenshot names have millisecond resolution
+    finally:
+        history = recorder.stop_recording()
+
+    sizes = []
+    for _, _, path, _ in history:
+        with Image.open(path) as img:
+            sizes.append(img.size)
+    # Keyframe, two region grabs (bottom 30% of 30px + margin), keyframe
+    assert sizes == [(40, 30), (40, 11), (40, 11), (40, 30)]
+    stats = recorder.get_capture_stats()
+    assert (stats['keyframes'], stats['region_captures']) == (2, 2)
+    assert 0 < stats['bytes_ratio'] < 1
+
+
+# Three 4K monitors side by side; mss puts the combined virtual screen first
+TRIPLE_4K = [
+    {'left': 0, 'top': 0, 'width': 11520, 'height': 2160},
+    {'left': 0, 'top': 0, 'width': 3840, 'height': 2160},
+    {'left': 3840, 'top': 0, 'width': 3840, 'height': 2160},
+    {'left': 7680, 'top': 0, 'width': 3840, 'height': 2160},
+]
+
+
+def test_monitor_for_rect_picks_largest_overlap():
+    # Mostly on the third monitor, slightly overlapping the second
+    assert monitor_for_rect(TRIPLE_4K, (7000, 100, 9000, 900)) is TRIPLE_4K[3]
+    assert monitor_for_rect(TRIPLE_4K, (4000, 100, 4800, 900)) is TRIPLE_4K[2]
+    # Entirely off-screen: primary monitor
+    assert monitor_for_rect(TRIPLE_4K, (-900, -900, -100, -100)) is TRIPLE_4K[1]
+
+
+def test_screen_area_is_clipped_to_the_monitor():
+    area = screen_area_for_rect(TRIPLE_4K, (7000, 100, 9000, 900))
+
+    assert area == {'left': 7680, 'top': 100, 'width': 1320, 'height': 800}
+
+
+class FakeScreenGrabber:
+    """Stands in for mss: records grabbed areas and returns blank BGRA pixels."""
+
+    monitors = TRIPLE_4K
+
+    def __init__(self):
+        self.areas = []
+
+    def grab(self, area):
+        self.areas.append(area)
+        raw = bytearray(area['width'] * area['height'] * 4)
+        return type('Shot', (), {'raw': raw, 'width': area['width'], 'height': area['height']})
+
+
+class OffsetWindowBackend(CaptureBackend):
+    """Screen-only backend that knows where one window is."""
+
+    def __init__(self):
+        super().__init__()
+        self._sct = FakeScreenGrabber()
+
+    def get_window_rect(self, window_id):
+        return (8000, 200, 8400, 500)
+
+
+def test_window_area_grab_reads_only_the_window():
+    backend = OffsetWindowBackend()
+
+    frame = backend.grab_window(5, {'x': 0, 'y': 200, 'width': 400, 'height': 100})
+
+    assert backend._sct.areas == [{'left': 8000, 'top': 400, 'width': 400, 'height': 100}]
+    assert frame.size == (400, 100)
+    assert frame.offset == (0, 200)
+    assert frame.window_size == (400, 300)
+    assert frame.window_hwnd == 5
+
+
+def test_window_capture_falls_back_to_full_screen_without_backend(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    recorder = CommandRecorder()
+    screen_rects = []
+
+    class ClosingBackend(FakeWindowBackend):
+        def grab_window(self, window_id, region=None):
+            # The recording stops (and drops its backend) mid-capture
+            recorder.capture_backend = None
+            raise OSError("window is gone")
+
+    def fake_grab_screen(window_rect=None):
+        screen_rects.append(window_rect)
+        return Frame(b'\x00\x00\x00' * 16, 4, 4, 'RGB')
+
+    monkeypatch.setattr('src.capture.grab_screen', fake_grab_screen)
+    recorder.capture_backend = ClosingBackend()
+
+    path, frame = recorder._capture_window_screenshot(3)
+    recorder.frame_writer.stop()
+
+    assert path and frame is not None
+    assert screen_rects == [None]
@@ -0,0 +1,69 @@
+"""
+Tests for line-band segmentation and delta OCR.
+"""
+
+from PIL import Image, ImageDraw
+
+from src.delta_ocr import DeltaOcr, segment_line_bands, to_grayscale_array
+
+LINE_HEIGHT = 20
+
+
+def _terminal(lines, dark=True):
+    background, foreground = ('black', 'white') if dark else ('white', 'black')
+    img = Image.new('RGB', (400, LINE_HEIGHT * 12), color=background)
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        draw.text((8, 4 + i * LINE_HEIGHT), line, fill=foreground)
+    return img
+
+
+class FakeOcr:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, img, psm=None):
+        self.calls += 1
+        return f"line {self.calls}\n"
+
+
+def test_segments_one_band_per_line_in_both_themes():
+    lines = ["C:\\> dir", "build ok", "C:\\> git status"]
+
+    for dark in (True, False):
+        bands = segment_line_bands(to_grayscale_array(_terminal(lines, dark)))
+        assert len(bands) == 3
+        assert all(top < bottom for top, bottom in bands)
+
+
+def test_only_changed_lines_are_ocrd():
+    delta = DeltaOcr()
+    ocr = FakeOcr()
+    history = ["$ make", "compiling main.c", "linking", "$ ./app", "hello"]
+
+    delta.extract(_terminal(history[:4]), ocr, window_key=1)
+    assert ocr.calls == 4
+
+    # One new line at the bottom: only that band is OCR'd
+    text = delta.extract(_terminal(history), ocr, window_key=1)
+    assert ocr.calls == 5
+    assert text.splitlines() == ["line 1", "line 2", "line 3", "line 4", "line 5"]
+
+    # Scrolled by one line: every remaining line is still reused
+    delta.extract(_terminal(history[1:]), ocr, window_key=1)
+    assert ocr.calls == 5
+
+    stats = delta.get_stats()
+    assert stats['bands_reused'] == 8
+    assert stats['pixels_ocrd'] < stats['pixels_total']
+
+
+def test_windows_do_not_share_previous_frames():
+    delta = DeltaOcr()
+    ocr = FakeOcr()
+    img = _terminal(["$ ls"])
+
+    delta.extract(img, ocr, window_key=1)
+    delta.extract(img, ocr, window_key=2)
+
+    assert ocr.calls == 2
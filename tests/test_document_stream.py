@@ -0,0 +1,53 @@
+"""
+Tests for incrementally written documents.
+"""
+
+from src.document_stream import DocumentStream
+from src.session_writer import SessionWriter
+
+
+def test_text_is_appended_in_batches(tmp_path):
+    path = tmp_path / "doc.md"
+    document = DocumentStream(path, flush_chars=10, flush_interval=60)
+    document.replace("# Title\n")
+
+    document.write("abc")
+    assert path.read_text() == "# Title\n"
+    document.write("defghijk")
+    assert path.read_text() == "# Title\nabcdefghijk"
+    assert document.appends == 1
+
+
+def test_flush_writes_the_rest(tmp_path):
+    path = tmp_path / "doc.md"
+    document = DocumentStream(path, flush_chars=1000, flush_interval=60)
+
+    document.write("partial")
+    document.flush()
+
+    assert path.read_text() == "partial"
+    assert document.chars_written == 7
+
+
+def test_replace_drops_buffered_text(tmp_path):
+    path = tmp_path / "doc.md"
+    document = DocumentStream(path, flush_chars=1000, flush_interval=60)
+    document.write("draft")
+
+    document.replace("final")
+    document.flush()
+
+    assert path.read_text() == "final"
+
+
+def test_writes_through_session_writer(tmp_path):
+    writer = SessionWriter()
+    path = tmp_path / "doc.md"
+    document = DocumentStream(path, writer=writer, flush_chars=1)
+
+    document.replace("# Doc\n")
+    document.write("streamed")
+    writer.flush()
+
+    assert path.read_text() == "# Doc\nstreamed"
+    writer.stop()
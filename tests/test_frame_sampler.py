@@ -0,0 +1,126 @@
+"""
+Tests for the pre-keypress frame sampler.
+"""
+
+import time
+
+from PIL import Image
+
+from src.capture_backend import CAPTURE_BACKENDS
+from src.command_recorder import CommandRecorder
+from src.frame import Frame
+from src.frame_sampler import FrameSampler
+
+from tests.test_capture_backend import FakeWindowBackend
+
+
+class FakeScreen:
+    """Grab function returning whatever the 'window' currently shows."""
+
+    def __init__(self):
+        self.shade = 0
+        self.released = 0
+
+    def grab(self, window):
+        time.sleep(0.002)  # Keep frame timestamps distinct
+        return Frame(bytes([self.shade]) * (4 * 4 * 3), 4, 4, 'RGB', window_hwnd=window,
+                     on_release=self._on_release)
+
+    def _on_release(self, frame):
+        self.released += 1
+
+
+def test_unchanged_window_is_not_buffered_again():
+    screen = FakeScreen()
+    sampler = FrameSampler(screen.grab, lambda: 7)
+
+    for _ in range(3):
+        sampler.sample()
+
+    assert len(sampler) == 1
+    assert sampler.get_stats()['unchanged'] == 2
+    assert screen.released == 2
+
+
+def test_buffer_is_capped_in_bytes():
+    screen = FakeScreen()
+    # Room for two 48-byte frames
+    sampler = FrameSampler(screen.grab, lambda: 7, max_bytes=100)
+
+    for shade in range(5):
+        screen.shade = shade
+        sampler.sample()
+
+    assert len(sampler) == 2
+    assert sampler.buffered_bytes == 96
+    assert screen.released == 3
+    sampler.stop()
+    assert screen.released == 5
+
+
+def test_frame_before_keypress_is_selected():
+    screen = FakeScreen()
+    sampler = FrameSampler(screen.grab, lambda: 7)
+    sampler.sample()  # Command typed, Enter not yet pressed
+    pressed_at = time.time()
+    screen.shade = 200  # Command output appears
+    sampler.sample()
+
+    frame = sampler.frame_before(pressed_at, window=7)
+
+    assert frame is not None
+    assert frame.data[0] == 0
+    assert sampler.frame_before(pressed_at, window=8) is None
+    frame.release()
+
+
+def test_stale_frame_is_not_used():
+    screen = FakeScreen()
+    sampler = FrameSampler(screen.grab, lambda: 7, fps=10)
+    sampler.sample()
+
+    # Nothing sampled for far longer than the sampling interval
+    assert sampler.frame_before(time.time() + 5.0) is None
+
+
+def test_recorder_captures_sampled_frame(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CAPTURE_BACKENDS, 'fake', FakeWindowBackend)
+    recorder = CommandRecorder(capture_backend='fake')
+    recorder.pre_capture_sampling = True
+    recorder.sampler_fps = 10
+    recorder.start_recording()
+    try:
+        recorder.detected_terminal = 3
+        deadline = time.time() + 2.0
+        while recorder.frame_sampler.get_stats()['samples'] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        recorder._capture_command(time.time())
+        stats = recorder.get_capture_stats()
+    finally:
+        history = recorder.stop_recording()
+
+    assert stats['sampled'] == 1
+    assert stats['sampler']['hits'] == 1
+    assert recorder.frame_sampler is None
+    with Image.open(history[0][2]) as img:
+        assert img.size == (40, 30)
+
+
+class UnopenableBackend(FakeWindowBackend):
+    def open(self):
+        raise OSError("no display")
+
+
+def test_recording_starts_without_sampler_when_backend_fails(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CAPTURE_BACKENDS, 'unopenable', UnopenableBackend)
+    recorder = CommandRecorder(capture_backend='unopenable')
+    recorder.pre_capture_sampling = True
+
+    recorder.start_recording()
+    try:
+        assert recorder.capture_backend is None
+        assert recorder.frame_sampler is None
+    finally:
+        recorder.stop_recording()
@@ -0,0 +1,91 @@
+"""
+Tests for in-memory frames and the background frame writer.
+"""
+
+from PIL import Image
+
+import pytest
+
+from src.encoder import ImageEncoder, QOI_AVAILABLE
+from src.frame_writer import FrameWriter
+from src.session_manager import SessionManager
+
+from tests.conftest import bgra_frame
+
+
+def test_bgra_frame_decodes_to_rgb():
+    frame = bgra_frame(4, 2, (10, 20, 30))
+
+    img = frame.to_image()
+
+    assert img.mode == 'RGB'
+    assert img.size == (4, 2)
+    assert img.getpixel((3, 1)) == (30, 20, 10)
+
+
+def test_writer_persists_frames_in_background(tmp_path):
+    writer = FrameWriter()
+    paths = [str(tmp_path / "screenshots" / f"command_{i}.png") for i in range(3)]
+
+    for i, path in enumerate(paths):
+        writer.submit(bgra_frame(8, 8, (i, i, i)), path)
+    writer.stop()
+
+    assert writer.written_count == 3
+    assert writer.failed_paths == []
+    for i, path in enumerate(paths):
+        with Image.open(path) as img:
+            assert img.format == 'PNG'
+            assert img.getpixel((0, 0)) == (i, i, i)
+
+
+def test_writer_records_failed_writes(tmp_path):
+    writer = FrameWriter()
+    # The parent "directory" is a file, so the write must fail
+    (tmp_path / "not_a_dir").write_text("")
+    bad_path = str(tmp_path / "not_a_dir" / "command.png")
+
+    writer.submit(bgra_frame(2, 2, (0, 0, 0)), bad_path)
+    writer.flush()
+    writer.stop()
+
+    assert writer.failed_paths == [bad_path]
+
+
+@pytest.mark.parametrize("encoder", [
+    ImageEncoder('png', compress_level=1),
+    ImageEncoder('webp'),
+    ImageEncoder('qoi'),
+], ids=lambda encoder: encoder.format)
+def test_encoders_are_lossless_and_named_by_format(tmp_path, encoder):
+    writer = FrameWriter(encoder=encoder)
+    frame = bgra_frame(16, 8, (200, 100, 50))
+    path = str(tmp_path / f"command{encoder.extension}")
+
+    writer.submit(frame, path)
+    writer.stop()
+
+    assert writer.get_stats()['written'] == 1
+    with Image.open(path) as img:
+        assert img.format == encoder.FORMATS[encoder.format][0]
+        assert img.convert('RGB').tobytes() == frame.to_image().tobytes()
+
+
+def test_unavailable_format_falls_back_to_png(monkeypatch):
+    if QOI_AVAILABLE:
+        monkeypatch.setattr('src.encoder.QOI_AVAILABLE', False)
+
+    assert ImageEncoder('qoi').extension == '.png'
+
+
+def test_session_counts_screenshots_of_every_format(tmp_path):
+    manager = SessionManager(base_dir=str(tmp_path))
+    manager.create_session_folder()
+    writer = FrameWriter()
+    for extension in ('.png', '.webp'):
+        path = manager.get_screenshot_path(f"command{extension}")
+        writer.submit(bgra_frame(4, 4, (0, 0, 0)), str(path))
+    writer.stop()
+
+    assert manager.get_screenshot_path(extension='.webp').suffix == '.webp'
+    assert manager.finalize_session()['screenshot_count'] == 2
@@ -0,0 +1,88 @@
+"""
+Tests for capture latency tracing.
+"""
+
+import json
+from datetime import datetime
+
+from src.capture_backend import CAPTURE_BACKENDS
+from src.command_recorder import CommandRecorder
+from src.latency import CaptureTrace, LatencyTracker, percentile, summarize_durations
+from src.ocr_pipeline import process_command_history
+
+from tests.test_capture_backend import FakeWindowBackend
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+
+
+def test_summary_buckets_durations():
+    summary = summarize_durations([0.5, 3.0, 3.5, 7000.0])
+
+    assert summary['count'] == 4
+    assert summary['max_ms'] == 7000.0
+    assert summary['buckets'] == {'<=1': 1, '<=5': 2, '>5000': 1}
+
+
+def test_tracker_aggregates_stage_intervals(tmp_path):
+    tracker = LatencyTracker(keep_traces=True)
+    for i in range(3):
+        trace = CaptureTrace(started=100.0)
+        trace.mark('grab_start', 100.001)
+        trace.mark('grabbed', 100.011 + i * 0.010)
+        tracker.attach(trace, f"command_{i}.png")
+    tracker.mark("command_0.png", 'written', 100.050)
+    tracker.mark("unknown.png", 'written', 100.050)
+    tracker.record_failure('grab')
+
+    histograms = tracker.get_histograms()
+
+    assert histograms['captures'] == 3
+    assert histograms['failures'] == {'grab': 1}
+    assert histograms['intervals']['grab']['count'] == 3
+    assert round(histograms['intervals']['grab']['p50_ms']) == 20
+    assert histograms['intervals']['keypress_to_disk']['count'] == 1
+    trace_path = tracker.write_trace(tmp_path / "capture_trace.jsonl")
+    lines = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert lines[0]['capture'] == "command_0.png"
+    assert round(lines[0]['stages_ms']['written']) == 50
+
+
+def test_recorder_traces_capture_to_disk_and_ocr(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CAPTURE_BACKENDS, 'fake', FakeWindowBackend)
+    recorder = CommandRecorder(capture_backend='fake')
+    recorder.start_recording()
+    try:
+        recorder.detected_terminal = 3
+        recorder._capture_command()
+    finally:
+        history = recorder.stop_recording()
+
+    latency = recorder.latency
+    process_command_history(
+        history, workers=1, on_result=lambda command, path: latency.mark(path, 'ocr_done')
+    )
+    intervals = latency.get_histograms()['intervals']
+
+    for name in ('grab', 'handoff', 'encode_write', 'keypress_to_disk', 'end_to_end'):
+        assert intervals[name]['count'] == 1
+    assert latency.write_trace(tmp_path / "trace.jsonl") is None
+
+
+def test_process_command_history_reports_each_result(tmp_path):
+    results = []
+    history = [("", datetime.now(), "does/not/exist.png", None),
+               ("echo hi", datetime.now(), "kept.png", None)]
+
+    process_command_history(history, workers=1,
+                            on_result=lambda command, path: results.append(path))
+
+    # Only captures that needed OCR are reported
+    assert results == ["does/not/exist.png"]
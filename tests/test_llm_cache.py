@@ -0,0 +1,103 @@
+"""
+Tests for the persistent LLM response cache.
+"""
+
+from datetime import datetime
+
+import pytest
+from openai import OpenAI
+
+from src import summarize
+from src.llm_cache import LlmCache, configure_llm_cache
+
+from tests.test_summarize import FakeOpenAIServer
+
+
+@pytest.fixture
+def cached_openai(tmp_path, monkeypatch):
+    server = FakeOpenAIServer()
+    monkeypatch.setattr(summarize, 'client', OpenAI(api_key='test', base_url=server.base_url, max_retries=0))
+    cache = configure_llm_cache(str(tmp_path / "llm_cache.sqlite3"))
+    yield server, cache
+    configure_llm_cache(None)
+    server.close()
+
+
+def test_key_ignores_formatting_noise():
+    key = LlmCache.make_key("gpt-4o-mini", 0.3, "Explain:\r\n  ls -la  \r\n")
+
+    assert key == LlmCache.make_key("gpt-4o-mini", 0.3, "\nExplain:\n  ls -la\n")
+    assert key != LlmCache.make_key("gpt-4o-mini", 0.7, "Explain:\n  ls -la")
+    assert key != LlmCache.make_key("gpt-4o", 0.3, "Explain:\n  ls -la")
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = LlmCache(path)
+    first.put("k", "answer")
+    first.close()
+
+    second = LlmCache(path)
+
+    assert second.get("k") == "answer"
+    assert second.get("other") is None
+    stats = second.get_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = LlmCache(str(tmp_path / "cache.sqlite3"), max_bytes=25)
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    cache.get("a")
+
+    cache.put("c", "z" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 10
+    assert cache.get("c") == "z" * 10
+    assert cache.get_stats()['evictions'] == 1
+    assert cache.get_stats()['stored_bytes'] <= 25
+
+
+def test_without_a_path_nothing_is_cached():
+    cache = LlmCache()
+    cache.put("k", "answer")
+
+    assert cache.get("k") is None
+    assert cache.get_stats()['enabled'] is False
+
+
+def test_repeated_documentation_is_served_from_cache(cached_openai):
+    server, cache = cached_openai
+    history = [("git status", datetime(2025, 1, 1, 12, 0, 0), None)]
+
+    first = summarize.summarize_commands(history)
+    second = summarize.summarize_commands(history)
+
+    assert first == second
+    assert len(server.requests) == 1
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_bypass_asks_again_and_refreshes_the_entry(cached_openai):
+    server, cache = cached_openai
+    server.respond = lambda body: "old"
+    summarize.summarize_text("$ ls")
+    server.respond = lambda body: "new"
+
+    assert summarize.summarize_text("$ ls", use_cache=False) == "new"
+    assert summarize.summarize_text("$ ls") == "new"
+    assert len(server.requests) == 2
+    assert cache.get_stats()['bypassed'] == 1
+
+
+def test_cached_answer_is_streamed_in_one_piece(cached_openai):
+    server, cache = cached_openai
+    server.respond = lambda body: "1. Ran ls"
+    summarize.summarize_text("$ ls")
+    tokens = []
+
+    assert summarize.summarize_text("$ ls", on_token=tokens.append) == "1. Ran ls"
+    assert tokens == ["1. Ran ls"]
+    assert len(server.requests) == 1
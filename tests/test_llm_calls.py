@@ -0,0 +1,223 @@
+"""
+Tests for LLM call deadlines, retries, hedging and cancellation, run against
+the local OpenAI-compatible stub server with injected latency and errors.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import openai
+import pytest
+from openai import OpenAI
+
+from src import summarize
+from src.llm_calls import (
+    CallPolicy, CancelToken, LlmCallCancelled, LlmCaller, LlmDeadlineExceeded, StreamInterrupted,
+    configure_llm_calls, is_retryable
+)
+
+from tests.test_summarize import FakeOpenAIServer
+
+
+def _fast_policy(**overrides):
+    settings = dict(deadline=5.0, attempt_timeout=2.0, max_attempts=3, backoff_base=0.01, backoff_max=0.05)
+    settings.update(overrides)
+    return CallPolicy(**settings)
+
+
+@pytest.fixture
+def flaky_openai(monkeypatch):
+    server = FakeOpenAIServer()
+    monkeypatch.setattr(summarize, 'client', OpenAI(api_key='test', base_url=server.base_url, max_retries=0))
+    yield server
+    configure_llm_calls()
+    server.close()
+
+
+def _failing(times, answer="documented", delay=0.0):
+    """respond() that fails the first `times` requests with a 500, then answers after `delay`."""
+    state = {'count': 0}
+    lock = threading.Lock()
+
+    def respond(body):
+        with lock:
+            state['count'] += 1
+            count = state['count']
+        if count <= times:
+            raise RuntimeError("injected server error")
+        time.sleep(delay)
+        return answer
+
+    return respond
+
+
+def _slow_first(seconds, answer="documented"):
+    """respond() whose first request takes `seconds`; later ones answer at once."""
+    calls = []
+    lock = threading.Lock()
+
+    def respond(body):
+        with lock:
+            calls.append(body)
+            first = len(calls) == 1
+        if first:
+            time.sleep(seconds)
+        return answer
+
+    return respond
+
+
+def test_server_errors_are_retried(flaky_openai):
+    caller = configure_llm_calls(_fast_policy())
+    flaky_openai.respond = _failing(2)
+
+    assert summarize.summarize_text("$ ls", use_cache=False) == "documented"
+    stats = caller.get_stats()
+    assert (stats['calls'], stats['requests'], stats['retries']) == (1, 3, 2)
+    assert len(flaky_openai.requests) == 3
+
+
+def test_retries_stop_after_max_attempts(flaky_openai):
+    caller = configure_llm_calls(_fast_policy(max_attempts=2))
+    flaky_openai.respond = _failing(5)
+
+    with pytest.raises(openai.InternalServerError):
+        summarize.summarize_text("$ ls", use_cache=False)
+    assert len(flaky_openai.requests) == 2
+    assert caller.get_stats()['failures'] == 1
+
+
+class _BadRequest(Exception):
+    status = 400
+
+
+def test_client_errors_are_not_retried(flaky_openai):
+    caller = configure_llm_calls(_fast_policy())
+
+    def respond(body):
+        raise _BadRequest("prompt rejected")
+
+    flaky_openai.respond = respond
+
+    with pytest.raises(openai.BadRequestError):
+        summarize.summarize_text("$ ls", use_cache=False)
+    assert len(flaky_openai.requests) == 1
+    assert caller.get_stats()['retries'] == 0
+    assert not is_retryable(ValueError("bad prompt"))
+
+
+def test_slow_request_is_timed_out_and_retried(flaky_openai):
+    caller = configure_llm_calls(_fast_policy(attempt_timeout=0.3))
+    flaky_openai.respond = _slow_first(1.0)
+
+    assert summarize.summarize_text("$ ls", use_cache=False) == "documented"
+    # Either our timer or the HTTP client's may fire first; both count as a timeout
+    stats = caller.get_stats()
+    assert (stats['timeouts'], stats['retries']) == (1, 1)
+    assert len(flaky_openai.requests) == 2
+
+
+def test_deadline_covers_all_attempts(flaky_openai):
+    caller = configure_llm_calls(_fast_policy(deadline=0.5, attempt_timeout=0.3, max_attempts=10))
+    flaky_openai.respond = lambda body: time.sleep(1.0) or "late"
+
+    with pytest.raises(LlmDeadlineExceeded):
+        summarize.summarize_text("$ ls", use_cache=False)
+    assert caller.get_stats()['deadline_exceeded'] == 1
+
+
+def test_hedged_request_wins_when_first_is_slow(flaky_openai):
+    caller = configure_llm_calls(_fast_policy(hedge=True, hedge_delay=0.1))
+    flaky_openai.respond = _slow_first(1.5)
+
+    assert summarize.summarize_text("$ ls", use_cache=False) == "documented"
+    stats = caller.get_stats()
+    assert (stats['hedges'], stats['hedge_wins'], stats['retries']) == (1, 1, 0)
+
+
+def test_hedge_delay_follows_recent_latency():
+    caller = LlmCaller(_fast_policy(hedge_delay=10.0))
+    assert caller.hedge_delay() == 10.0
+
+    for _ in range(20):
+        caller.call(lambda timeout: time.sleep(0.01))
+
+    assert caller.hedge_delay() < 1.0
+
+
+def test_hedge_delay_ignores_failed_attempts_and_backoff():
+    caller = LlmCaller(_fast_policy(backoff_base=0.3, backoff_max=0.3))
+    failures = []
+
+    def request(timeout):
+        if len(failures) < 2:
+            failures.append(1)
+            time.sleep(0.2)
+            raise ConnectionError("connection reset")
+        return "ok"
+
+    assert caller.call(request) == "ok"
+
+    # Only the successful attempt is sampled, not the 0.4s of failures before it
+    assert len(caller._durations) == 1
+    assert caller._durations[0] < 0.15
+
+
+def test_streamed_calls_are_not_hedged(flaky_openai):
+    caller = configure_llm_calls(_fast_policy(hedge=True, hedge_delay=0.05))
+    flaky_openai.respond = lambda body: time.sleep(0.3) or "one two"
+    tokens = []
+
+    assert summarize.summarize_text("$ ls", on_token=tokens.append, use_cache=False) == "one two"
+    assert "".join(tokens) == "one two "
+    assert caller.get_stats()['hedges'] == 0
+
+
+def test_interrupted_stream_is_not_repeated(flaky_openai):
+    configure_llm_calls(_fast_policy(attempt_timeout=0.3))
+    flaky_openai.respond = lambda body: "one two three"
+    flaky_openai.on_chunk = lambda piece: time.sleep(1.0) if piece == "one" else None
+    tokens = []
+
+    with pytest.raises(StreamInterrupted):
+        summarize.summarize_text("$ ls", on_token=tokens.append, use_cache=False)
+    assert tokens == ["one "]
+    assert len(flaky_openai.requests) == 1
+
+
+def test_cancel_stops_waiting_promptly(flaky_openai):
+    caller = configure_llm_calls(_fast_policy())
+    flaky_openai.respond = lambda body: time.sleep(2.0) or "late"
+    cancel = CancelToken()
+    threading.Timer(0.2, cancel.cancel).start()
+    started = time.monotonic()
+
+    with pytest.raises(LlmCallCancelled):
+        summarize.summarize_text("$ ls", use_cache=False, cancel=cancel)
+    # Well before the slow response would have arrived
+    assert time.monotonic() - started < 1.5
+    assert caller.get_stats()['cancelled'] == 1
+
+
+def test_cancelled_documentation_falls_back_to_offline(flaky_openai):
+    configure_llm_calls(_fast_policy())
+    flaky_openai.respond = lambda body: time.sleep(2.0) or "late"
+    cancel = CancelToken()
+    threading.Timer(0.2, cancel.cancel).start()
+    history = [("git status", datetime(2025, 1, 1, 12, 0, 0), None)]
+
+    doc = summarize.summarize_commands(history, cancel=cancel)
+
+    assert "**Step 1.** Show which files are modified, staged or untracked." in doc
+
+
+def test_backoff_is_jittered_and_capped():
+    caller = LlmCaller(CallPolicy(backoff_base=0.5, backoff_max=4.0))
+
+    first = [caller.backoff(1) for _ in range(200)]
+    late = [caller.backoff(6) for _ in range(200)]
+
+    assert all(0 <= delay <= 0.5 for delay in first)
+    assert all(0 <= delay <= 4.0 for delay in late)
+    assert len(set(first)) > 1
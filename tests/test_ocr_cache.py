@@ -0,0 +1,100 @@
+"""
+Tests for the content-hash OCR result cache.
+"""
+
+import json
+import os
+
+from PIL import Image
+
+import src.capture as capture
+from src.ocr_cache import OcrCache
+from src.session_manager import SessionManager
+
+
+class CountingEngine:
+    lang = 'eng'
+
+    def __init__(self):
+        self.calls = 0
+
+    def image_to_string(self, img, psm=None):
+        self.calls += 1
+        return f"text {self.calls}"
+
+
+def test_lru_evicts_oldest():
+    cache = OcrCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    key = OcrCache.make_key(Image.new('RGB', (4, 4)), "psm=None")
+    OcrCache(disk_dir=str(tmp_path)).put(key, "git status")
+
+    other = OcrCache(disk_dir=str(tmp_path))
+
+    assert other.get(key) == "git status"
+    assert other.get_stats()['disk_hits'] == 1
+
+
+def test_disk_tier_prunes_least_recently_used(tmp_path):
+    cache = OcrCache(max_entries=1, disk_dir=str(tmp_path), max_disk_bytes=350)
+    for i, key in enumerate(["aa01", "bb02", "cc03"]):
+        cache.put(key, str(i) * 100)
+        # Distinct ages, oldest first, whatever the filesystem's timestamp resolution
+        os.utime(cache._disk_path(key), (1000 + i, 1000 + i))
+    # A disk hit makes the oldest entry the most recently used
+    cache._entries.clear()
+    assert cache.get("aa01") == "0" * 100
+
+    cache.put("dd04", "3" * 100)
+
+    assert cache._read_disk("bb02") is None
+    assert [cache._read_disk(key) is not None for key in ("aa01", "cc03", "dd04")] == [True] * 3
+    assert cache.get_stats()['disk_evictions'] == 1
+    assert sum(path.stat().st_size for path in tmp_path.rglob("*.txt")) <= 350
+
+
+def test_key_depends_on_pixels_and_config():
+    black = Image.new('RGB', (4, 4), 'black')
+    white = Image.new('RGB', (4, 4), 'white')
+
+    assert OcrCache.make_key(black, "psm=7") == OcrCache.make_key(black.copy(), "psm=7")
+    assert OcrCache.make_key(black, "psm=7") != OcrCache.make_key(white, "psm=7")
+    assert OcrCache.make_key(black, "psm=7") != OcrCache.make_key(black, "psm=3")
+
+
+def test_cache_hit_skips_engine(monkeypatch, ocr_cache):
+    engine = CountingEngine()
+    monkeypatch.setattr(capture, "get_ocr_engine", lambda: engine)
+    img = Image.new('RGB', (32, 16), 'black')
+
+    first = capture.extract_text_from_frame(img)
+    second = capture.extract_text_from_frame(img.copy())
+
+    assert first == second
+    assert engine.calls == 1
+
+
+def test_stats_written_to_session_metadata(tmp_path):
+    manager = SessionManager(base_dir=str(tmp_path))
+    manager.create_session_folder(folder_name="session")
+    cache = OcrCache()
+    cache.get("missing")
+
+    manager.add_metadata('ocr_cache', cache.get_stats())
+    summary = manager.finalize_session()
+
+    with open(tmp_path / "session" / "metadata" / "session_info.json", encoding="utf-8") as f:
+        metadata = json.load(f)
+    assert metadata['ocr_cache']['misses'] == 1
+    assert summary['ocr_cache'] == metadata['ocr_cache']
@@ -0,0 +1,143 @@
+"""
+Tests for the persistent OCR engine and its pytesseract fallback.
+"""
+
+import logging
+
+from PIL import Image
+
+from src import ocr_engine
+from src.ocr_engine import DEFAULT_PSM, OcrEngine, get_ocr_engine
+
+
+class FakeTessBaseAPI:
+    """Stands in for tesserocr.PyTessBaseAPI and records how it is used."""
+
+    instances = []
+
+    def __init__(self, path=None, lang='eng'):
+        self.lang = lang
+        self.psms = []
+        self.images = []
+        self.ended = False
+        self.fail = False
+        FakeTessBaseAPI.instances.append(self)
+
+    def SetPageSegMode(self, psm):
+        self.psms.append(psm)
+
+    def SetImage(self, img):
+        if self.fail:
+            raise RuntimeError("engine crashed")
+        self.images.append(img)
+
+    def GetUTF8Text(self):
+        return f"api text {len(self.images)}"
+
+    def End(self):
+        self.ended = True
+
+
+class FakeTesserocr:
+    PyTessBaseAPI = FakeTessBaseAPI
+
+
+class BrokenTesserocr:
+    @staticmethod
+    def PyTessBaseAPI(path=None, lang='eng'):
+        raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+
+
+def _use_tesserocr(monkeypatch, module):
+    FakeTessBaseAPI.instances = []
+    monkeypatch.setattr(ocr_engine, 'tesserocr', module)
+    monkeypatch.setattr(ocr_engine, 'TESSEROCR_AVAILABLE', module is not None)
+
+
+def _record_pytesseract(monkeypatch):
+    calls = []
+
+    def image_to_string(img, lang=None, config=''):
+        calls.append((lang, config))
+        return "cli text"
+
+    monkeypatch.setattr(ocr_engine.pytesseract, 'image_to_string', image_to_string)
+    return calls
+
+
+def test_persistent_api_is_reused_across_calls(monkeypatch):
+    _use_tesserocr(monkeypatch, FakeTesserocr)
+    cli_calls = _record_pytesseract(monkeypatch)
+    engine = OcrEngine(lang='eng+deu')
+    img = Image.new('RGB', (8, 8))
+
+    assert engine.backend == 'tesserocr'
+    assert engine.image_to_string(img) == "api text 1"
+    assert engine.image_to_string(img, psm=7) == "api text 2"
+    assert engine.image_to_string(img, psm=7) == "api text 3"
+
+    # Language data is loaded once; the page mode only changes when asked to
+    assert len(FakeTessBaseAPI.instances) == 1
+    api = FakeTessBaseAPI.instances[0]
+    assert api.lang == 'eng+deu'
+    assert api.psms == [DEFAULT_PSM, 7]
+    assert cli_calls == []
+
+
+def test_missing_tesserocr_falls_back_to_pytesseract(monkeypatch):
+    _use_tesserocr(monkeypatch, None)
+    cli_calls = _record_pytesseract(monkeypatch)
+    engine = OcrEngine()
+
+    assert engine.backend == 'pytesseract'
+    assert engine.image_to_string(Image.new('RGB', (8, 8)), psm=7) == "cli text"
+    assert engine.image_to_string(Image.new('RGB', (8, 8))) == "cli text"
+    assert cli_calls == [('eng', '--psm 7'), ('eng', '')]
+
+
+def test_unusable_tesserocr_falls_back_to_pytesseract(monkeypatch):
+    _use_tesserocr(monkeypatch, BrokenTesserocr)
+    _record_pytesseract(monkeypatch)
+
+    engine = OcrEngine()
+
+    assert engine.backend == 'pytesseract'
+    assert engine.image_to_string(Image.new('RGB', (8, 8))) == "cli text"
+
+
+def test_failed_api_call_uses_pytesseract_for_that_call(monkeypatch):
+    _use_tesserocr(monkeypatch, FakeTesserocr)
+    cli_calls = _record_pytesseract(monkeypatch)
+    engine = OcrEngine()
+    api = FakeTessBaseAPI.instances[0]
+    img = Image.new('RGB', (8, 8))
+
+    api.fail = True
+    assert engine.image_to_string(img) == "cli text"
+    api.fail = False
+    assert engine.image_to_string(img) == "api text 1"
+    assert len(cli_calls) == 1
+
+
+def test_close_releases_the_api(monkeypatch):
+    _use_tesserocr(monkeypatch, FakeTesserocr)
+    _record_pytesseract(monkeypatch)
+    engine = OcrEngine()
+
+    engine.close()
+
+    assert FakeTessBaseAPI.instances[0].ended
+    assert engine.backend == 'pytesseract'
+    assert engine.image_to_string(Image.new('RGB', (8, 8))) == "cli text"
+
+
+def test_active_backend_is_logged_once(monkeypatch, caplog):
+    _use_tesserocr(monkeypatch, None)
+    monkeypatch.setattr(ocr_engine, '_engine', None)
+
+    with caplog.at_level(logging.INFO, logger='src.ocr_engine'):
+        first = get_ocr_engine()
+        second = get_ocr_engine()
+
+    assert first is second
+    assert [record.getMessage() for record in caplog.records] == ["OCR backend: pytesseract"]
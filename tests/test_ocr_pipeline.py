@@ -0,0 +1,130 @@
+"""
+Tests for the OCR pipeline (post-recording pool and streaming worker).
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from src import ocr_pipeline
+from src.frame import Frame
+from src.ocr_pipeline import (
+    process_command_history, resolve_worker_count, StreamingOcr, FALLBACK_COMMAND
+)
+
+
+def _make_history(tmp_path, count):
+    history = []
+    start = datetime(2025, 11, 9, 22, 45, 0)
+    for i in range(count):
+        path = tmp_path / f"command_{i}.png"
+        Image.new('RGB', (64, 32), color='black').save(path)
+        command = f"echo {i}" if i % 3 == 0 else ""
+        history.append((command, start + timedelta(seconds=i), str(path), None))
+    return history
+
+
+def _fake_ocr(source, region=None, window_hwnd=None, **options):
+    """OCR stand-in that "reads" a distinct command from each capture's file name."""
+    return f"git status {Path(source).stem}"
+
+
+# Pool workers only see a monkeypatched OCR function when they are forked
+needs_fork = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                                reason="stubbed OCR is not visible to spawned workers")
+
+
+@needs_fork
+def test_pool_returns_recognized_text(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_pipeline, 'extract_terminal_text', _fake_ocr)
+    history = [("", datetime(2025, 11, 9, 22, 45, i), str(tmp_path / f"command_{i}.png"), None)
+               for i in range(3)]
+
+    pooled = process_command_history(history, workers=2, item_timeout=30)
+
+    assert [command for command, _, _ in pooled] == [f"git status command_{i}" for i in range(3)]
+
+
+@needs_fork
+def test_pool_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_pipeline, 'extract_terminal_text', _fake_ocr)
+    history = _make_history(tmp_path, 6)
+
+    serial = process_command_history(history, workers=1)
+    pooled = process_command_history(history, workers=2, item_timeout=30)
+
+    assert pooled == serial
+    assert serial[1][0] == "git status command_1"
+    assert len({command for command, _, _ in serial}) == len(history)
+    assert [path for _, _, path in pooled] == [item[2] for item in history]
+
+
+def test_existing_commands_are_kept(tmp_path):
+    history = _make_history(tmp_path, 4)
+    # Old-format entries without a region are still accepted
+    history[1] = history[1][:3]
+
+    processed = process_command_history(history, workers=1)
+
+    assert processed[0][0] == "echo 0"
+    assert processed[3][0] == "echo 3"
+    assert all(command for command, _, _ in processed)
+    assert all(len(item) == 3 for item in processed)
+
+
+def test_missing_screenshot_falls_back():
+    history = [("", datetime.now(), "does/not/exist.png", None)]
+
+    processed = process_command_history(history, workers=1)
+
+    assert processed[0][0] == FALLBACK_COMMAND
+
+
+def test_resolve_worker_count():
+    assert resolve_worker_count(8, 3) == 3
+    assert resolve_worker_count(4, 0) == 1
+    assert resolve_worker_count(None, 100) >= 1
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_streaming_ocr_waits_for_idle_and_reports_results():
+    ocr_queue = queue.Queue()
+    capture_idle = threading.Event()
+    recognized = []
+    released = []
+    worker = StreamingOcr(
+        ocr_queue,
+        capture_idle,
+        on_result=lambda command, path: recognized.append(path),
+        on_item_done=released.append,
+    )
+    frame = Frame(b'\x00\x00\x00' * 16, 4, 4, 'RGB')
+    ocr_queue.put(("a.png", frame, None))
+    ocr_queue.put(("b.png", None, None))
+
+    worker.start()
+    # A capture is "in progress", so nothing may be processed yet
+    time.sleep(0.3)
+    assert worker.get_results() == {}
+
+    capture_idle.set()
+    assert _wait_for(lambda: len(worker.get_results()) == 2)
+    worker.stop(timeout=5)
+
+    assert recognized == ["a.png", "b.png"]
+    assert released == [frame, None]
+    assert worker.get_results()["a.png"] == FALLBACK_COMMAND
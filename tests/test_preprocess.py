@@ -0,0 +1,39 @@
+"""
+Tests for the OCR preprocessing stage.
+"""
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from src.preprocess import PreprocessConfig, preprocess_image, estimate_glyph_height
+
+
+def _dark_terminal():
+    img = Image.new('RGB', (300, 120), color=(10, 10, 10))
+    draw = ImageDraw.Draw(img)
+    for i in range(4):
+        draw.text((8, 6 + i * 24), f"user@host:~$ echo {i}", fill=(200, 200, 200))
+    return img
+
+
+def test_dark_theme_becomes_binary_dark_on_light():
+    out = np.asarray(preprocess_image(_dark_terminal(), PreprocessConfig(target_glyph_height=None)))
+
+    assert out.shape == (120, 300)
+    assert set(np.unique(out)) <= {0, 255}
+    # Background is now white, text black
+    assert (out == 255).mean() > 0.8
+    assert (out == 0).any()
+
+
+def test_rescales_towards_target_glyph_height():
+    img = _dark_terminal()
+    glyph_height = estimate_glyph_height(np.asarray(img.convert('L')).astype(np.float32))
+
+    out = preprocess_image(img, PreprocessConfig(target_glyph_height=int(glyph_height * 2)))
+
+    assert abs(out.height - img.height * 2) <= 2
+
+
+def test_cache_tag_changes_with_settings():
+    assert PreprocessConfig().cache_tag() != PreprocessConfig(invert_dark=False).cache_tag()
@@ -0,0 +1,50 @@
+"""
+Tests for prompt grammars and command extraction from OCR text.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from src.capture import _parse_command_from_text
+from src.prompt_grammar import PromptGrammar, PromptGrammarRegistry, BUILTIN_GRAMMARS
+
+CORPUS = json.loads((Path(__file__).parent / "data" / "prompt_corpus.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[f"{c['shell']}-{i}" for i, c in enumerate(CORPUS)])
+def test_corpus(case):
+    assert _parse_command_from_text(case["text"], case["window_title"]) == case["expected"]
+
+
+def test_window_title_selects_grammar_first():
+    registry = PromptGrammarRegistry()
+
+    assert registry.select("Windows PowerShell")[0].name == "powershell"
+    assert registry.select("fish /home/dev")[0].name == "fish"
+    assert [g.name for g in registry.select(None)] == [g.name for g in BUILTIN_GRAMMARS]
+
+
+def test_bare_prompt_is_matched_but_has_no_command():
+    registry = PromptGrammarRegistry()
+
+    grammar, command = registry.match_line("C:\\Program Files>")
+    assert grammar.name == "cmd"
+    assert command == ""
+    assert registry.find_command("C:\\Program Files>") is None
+
+
+def test_custom_grammar():
+    registry = PromptGrammarRegistry()
+    registry.register(PromptGrammar("nushell", r"^〉\s*(?P<command>.*)$", ("nu",)))
+
+    assert registry.find_command("〉 ls | where size > 1kb", "nu") == "ls | where size > 1kb"
+
+    registry.unregister("nushell")
+    assert registry.find_command("〉 ls") is None
+
+
+def test_grammar_requires_command_group():
+    with pytest.raises(ValueError):
+        PromptGrammar("broken", r"^\$ (.*)$")
@@ -0,0 +1,119 @@
+"""
+Tests for the content-addressed screenshot store.
+"""
+
+import json
+import os
+import threading
+
+from PIL import Image
+
+from src.encoder import ImageEncoder
+from src.frame_writer import FrameWriter
+from src.screenshot_store import ScreenshotStore, pixel_hash
+from src.session_manager import SessionManager
+
+from tests.conftest import bgra_frame
+
+
+def test_pixel_hash_depends_on_pixels_and_shape():
+    assert pixel_hash(bgra_frame(4, 4, (1, 2, 3))) == pixel_hash(bgra_frame(4, 4, (1, 2, 3)))
+    assert pixel_hash(bgra_frame(4, 4, (1, 2, 3))) != pixel_hash(bgra_frame(4, 4, (3, 2, 1)))
+    assert pixel_hash(bgra_frame(8, 2, (1, 2, 3))) != pixel_hash(bgra_frame(4, 4, (1, 2, 3)))
+
+
+def test_identical_frames_are_stored_once(tmp_path):
+    store = ScreenshotStore(tmp_path / "screenshots")
+    writer = FrameWriter(store=store)
+    paths = [str(tmp_path / "screenshots" / f"command_{i}.png") for i in range(4)]
+
+    for i, path in enumerate(paths):
+        # Three repeated Enters and one different screen
+        writer.submit(bgra_frame(8, 8, (0, 0, 0) if i < 3 else (9, 9, 9)), path)
+    writer.stop()
+
+    stats = store.get_stats()
+    assert writer.failed_paths == []
+    assert (stats['steps'], stats['unique_images'], stats['duplicates']) == (4, 2, 2)
+    assert stats['dedup_ratio'] == 2.0
+    assert stats['bytes_saved'] > 0
+    assert len(list((tmp_path / "screenshots" / "objects").rglob("*.png"))) == 2
+    for path in paths:
+        with Image.open(store.resolve(path)) as img:
+            assert img.format == 'PNG'
+
+
+def test_step_files_are_hard_links(tmp_path):
+    store = ScreenshotStore(tmp_path / "screenshots")
+    frame = bgra_frame(4, 4, (5, 5, 5))
+
+    first = store.put(frame, tmp_path / "screenshots" / "command_1.png", ImageEncoder())
+    second = store.put(frame, tmp_path / "screenshots" / "command_2.png", ImageEncoder())
+
+    assert os.path.samefile(first, second)
+    assert os.stat(first).st_nlink == 3
+
+
+def test_unlinked_steps_resolve_to_their_object(tmp_path, monkeypatch):
+    store = ScreenshotStore(tmp_path / "screenshots")
+
+    def no_links(src, dst):
+        raise OSError("hard links not supported")
+
+    monkeypatch.setattr(os, 'link', no_links)
+    step_path = str(tmp_path / "screenshots" / "command_1.png")
+    written = store.put(bgra_frame(4, 4, (5, 5, 5)), step_path, ImageEncoder())
+
+    assert not os.path.exists(step_path)
+    assert store.resolve(step_path) == written
+    assert "objects" in written
+
+
+def test_finalize_reports_dedup_and_writes_manifest(tmp_path):
+    manager = SessionManager(base_dir=str(tmp_path))
+    session_dir = manager.create_session_folder()
+    writer = FrameWriter(store=manager.screenshot_store)
+    for i in range(3):
+        writer.submit(bgra_frame(4, 4, (7, 7, 7)), str(manager.get_screenshot_path(f"command_{i}.png")))
+    writer.stop()
+
+    summary = manager.finalize_session()
+
+    assert summary['screenshot_count'] == 3
+    assert summary['screenshot_dedup']['unique_images'] == 1
+    assert summary['screenshot_dedup']['dedup_ratio'] == 3.0
+    manifest = json.loads((session_dir / "screenshots" / "manifest.json").read_text())
+    assert [step['path'] for step in manifest['steps']] == [f"command_{i}.png" for i in range(3)]
+    assert len({step['object'] for step in manifest['steps']}) == 1
+    info = json.loads((session_dir / "metadata" / "session_info.json").read_text())
+    assert info['screenshot_dedup']['duplicates'] == 2
+
+
+class _HoldFirstFrame:
+    """Latency hook that keeps command_0's encoder waiting until command_2 is written."""
+
+    def __init__(self):
+        self.last_written = threading.Event()
+
+    def mark(self, path, stage, when=None):
+        if stage == 'encode_start' and path.endswith("command_0.png"):
+            assert self.last_written.wait(timeout=5)
+        elif stage == 'written' and path.endswith("command_2.png"):
+            self.last_written.set()
+
+    def record_failure(self, stage):
+        pass
+
+
+def test_manifest_keeps_capture_order_when_encoders_finish_out_of_order(tmp_path):
+    store = ScreenshotStore(tmp_path / "screenshots")
+    writer = FrameWriter(store=store, workers=2)
+    writer.latency = _HoldFirstFrame()
+
+    for i in range(3):
+        writer.submit(bgra_frame(4, 4, (i, i, i)), str(tmp_path / "screenshots" / f"command_{i}.png"))
+    writer.stop()
+
+    assert writer.latency.last_written.is_set()
+    manifest = json.loads(store.write_manifest().read_text())
+    assert [step['path'] for step in manifest['steps']] == [f"command_{i}.png" for i in range(3)]
@@ -0,0 +1,114 @@
+"""
+Tests for the single-writer session I/O queue.
+"""
+
+import json
+import threading
+
+import pytest
+
+from src.session_manager import SessionManager
+from src.session_writer import SessionWriter
+
+
+def test_writes_land_in_queue_order(tmp_path):
+    writer = SessionWriter()
+    target = tmp_path / "nested" / "log.txt"
+
+    writer.write(target, "first\n")
+    writer.write(target, "second\n", append=True)
+    last = writer.write(target, "third\n", append=True)
+
+    assert last.result(timeout=5) == target
+    assert target.read_text() == "first\nsecond\nthird\n"
+    assert not (tmp_path / "nested" / "log.txt.tmp").exists()
+    writer.stop()
+
+
+def test_full_queue_blocks_producers(tmp_path):
+    writer = SessionWriter(max_pending=1)
+    busy, gate = threading.Event(), threading.Event()
+    writer.call(lambda: (busy.set(), gate.wait()))
+    busy.wait(timeout=5)
+    # The writer thread is now busy; this one fills the queue
+    writer.write(tmp_path / "a.txt", "a")
+    blocked = threading.Thread(target=writer.write, args=(tmp_path / "b.txt", "b"))
+    blocked.start()
+    blocked.join(timeout=0.2)
+
+    assert blocked.is_alive()
+    gate.set()
+    blocked.join(timeout=5)
+    writer.stop()
+
+    stats = writer.get_stats()
+    assert stats['stalls'] >= 1
+    assert stats['stall_seconds'] > 0
+    assert stats['queue_capacity'] == 1
+    assert (tmp_path / "b.txt").read_text() == "b"
+
+
+@pytest.mark.parametrize("policy, expected", [('never', 0), ('on_flush', 2), ('always', 2)])
+def test_fsync_policies(tmp_path, policy, expected):
+    writer = SessionWriter(fsync_policy=policy)
+    writer.write(tmp_path / "a.bin", b"\x00" * 10)
+    writer.write_json(tmp_path / "b.json", {'ok': True})
+
+    assert writer.flush(timeout=5)
+    assert writer.get_stats()['fsyncs'] == expected
+    writer.stop()
+
+
+def test_unknown_fsync_policy_is_rejected():
+    with pytest.raises(ValueError):
+        SessionWriter(fsync_policy='sometimes')
+
+
+def test_write_errors_surface_on_the_future(tmp_path):
+    (tmp_path / "blocker").write_text("a file, not a folder")
+    writer = SessionWriter()
+
+    future = writer.write(tmp_path / "blocker" / "child.txt", "x")
+
+    with pytest.raises(OSError):
+        future.result(timeout=5)
+    # The writer keeps going after a failed write
+    assert writer.write(tmp_path / "ok.txt", "x").result(timeout=5)
+    assert writer.get_stats()['errors'] == 1
+    writer.stop()
+
+
+def test_session_files_go_through_the_writer(tmp_path):
+    manager = SessionManager(base_dir=str(tmp_path), fsync_policy='on_flush')
+    session_dir = manager.create_session_folder()
+    manager.save_events([{'timestamp': 't', 'event_type': 'keypress', 'event_data': {}}])
+
+    summary = manager.finalize_session()
+
+    assert summary['event_count'] == 1
+    info = json.loads((session_dir / "metadata" / "session_info.json").read_text())
+    assert info['session_writer']['writes'] >= 2
+    assert info['session_writer']['errors'] == 0
+    assert manager.writer.get_stats()['fsyncs'] >= 2
+
+
+def test_finalize_stops_the_writer_thread(tmp_path):
+    manager = SessionManager(base_dir=str(tmp_path))
+    manager.create_session_folder()
+
+    manager.finalize_session()
+
+    assert manager.writer._thread is None
+
+
+def test_failed_events_write_falls_back_to_text(tmp_path):
+    manager = SessionManager(base_dir=str(tmp_path))
+    session_dir = manager.create_session_folder()
+    # A folder where events.json should go makes the JSON write fail
+    (session_dir / "events" / "events.json").mkdir(parents=True)
+
+    path = manager.save_events([{'timestamp': 't', 'event_type': 'keypress', 'event_data': {}}])
+
+    manager.finalize_session()
+    assert path.name == "events.txt"
+    assert (session_dir / "events" / "events.txt").read_text() == "t - keypress\n"
@@ -4,6 +4,7 @@ Run this to check if everything is configured correctly.
 """
 
 import sys
+import tempfile
 from pathlib import Path
 
 # Fix Windows console encoding for checkmarks
@@ -62,8 +63,8 @@ def test_tesseract():
         print(f"   ✗ Error: {e}")
         return False
 
-def test_ocr_on_test_image():
-    """Test OCR on a simple test image."""
+def test_ocr_on_test_image(tmp_path):
+    """Test OCR on a simple test image written under tmp_path."""
     print("\n3. Testing OCR functionality...")
     try:
         from PIL import Image, ImageDraw, ImageFont
@@ -87,16 +88,12 @@ def test_ocr_on_test_image():
         test_text = "Hello ALIVE Data Test"
         draw.text((50, 30), test_text, fill='black')
         
-        test_image_path = "test_image.png"
-        img.save(test_image_path)
+        img.save(tmp_path / "test_image.png")
         
         # Try OCR
         text = pytesseract.image_to_string(img)
         text = text.strip()
         
-        # Clean up
-        Path(test_image_path).unlink(missing_ok=True)
-        
         if text:
             print(f"   ✓ OCR extracted text: '{text[:50]}...'")
             return True
@@ -188,7 +185,8 @@ def main():
     results = []
     results.append(("Imports", test_imports()))
     results.append(("Tesseract", test_tesseract()))
-    results.append(("OCR", test_ocr_on_test_image()))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results.append(("OCR", test_ocr_on_test_image(Path(tmp_dir))))
     results.append(("Screenshot", test_screenshot_capture()))
     results.append(("OpenAI", test_openai_config()))
     results.append(("Docs Directory", test_docs_directory()))
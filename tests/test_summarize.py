@@ -0,0 +1,236 @@
+"""
+Tests for LLM summarization, run against a local OpenAI-compatible stub server.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import OpenAI
+
+from src import summarize
+from src.document_stream import DocumentStream
+
+
+class FakeOpenAIServer:
+    """
+    Minimal /v1/chat/completions server on localhost.
+
+    respond(body) returns the completion text for a request body; it may sleep
+    to simulate latency. Streamed requests get the text back word by word as
+    server-sent events. Requests are recorded, as is the peak number served
+    at once.
+    """
+
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda body: "documented")
+        # Called after each streamed piece is sent (e.g. to pause mid-stream)
+        self.on_chunk = lambda piece: None
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with server._lock:
+                    server.requests.append(body)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    content = server.respond(body)
+                except Exception as e:
+                    # An exception with a .status attribute picks the error status
+                    self._send_json(getattr(e, 'status', 500), {'error': {'message': str(e), 'type': 'server_error'}})
+                    return
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                if body.get('stream'):
+                    self._send_stream(body, content)
+                    return
+                self._send_json(200, {
+                    'id': 'chatcmpl-test', 'object': 'chat.completion', 'created': 0,
+                    'model': body['model'],
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': content}}],
+                })
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, body, content):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                try:
+                    for piece in content.split(" "):
+                        event = {
+                            'id': 'chatcmpl-test', 'object': 'chat.completion.chunk', 'created': 0,
+                            'model': body['model'],
+                            'choices': [{'index': 0, 'finish_reason': None,
+                                         'delta': {'content': piece + " "}}],
+                        }
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                        self.wfile.flush()
+                        server.on_chunk(piece)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except ConnectionError:
+                    # The client stopped reading (cancelled or timed out)
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}/v1"
+
+    def prompts(self):
+        return [body['messages'][0]['content'] for body in self.requests]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    server = FakeOpenAIServer()
+    monkeypatch.setattr(summarize, 'client', OpenAI(api_key='test', base_url=server.base_url, max_retries=0))
+    yield server
+    server.close()
+
+
+def _history(count):
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    return [(f"echo step-{i}", start + timedelta(seconds=i), None) for i in range(1, count + 1)]
+
+
+def test_client_is_created_on_first_use(monkeypatch):
+    monkeypatch.setattr(summarize, 'client', None)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+    assert summarize.get_client() is summarize.get_client()
+
+
+def test_chunks_respect_token_budget():
+    parts = ["a" * 40, "b" * 40, "c" * 40, "d" * 200]
+
+    chunks = summarize.chunk_by_tokens(parts, token_budget=20)
+
+    assert chunks == [["a" * 40, "b" * 40], ["c" * 40], ["d" * 200]]
+
+
+def test_short_session_takes_one_completion(fake_openai):
+    doc = summarize.summarize_commands(_history(3))
+
+    assert len(fake_openai.requests) == 1
+    assert "echo step-3" in fake_openai.prompts()[0]
+    assert doc.endswith("documented")
+    assert "**Total Commands:** 3" in doc
+
+
+def test_long_session_is_map_reduced_in_order(fake_openai):
+    def respond(body):
+        prompt = body['messages'][0]['content']
+        if "Merge the parts" in prompt:
+            return "merged"
+        time.sleep(0.05)
+        first = prompt.split("echo step-")[1].split("\n")[0]
+        return f"section from step {first}"
+    fake_openai.respond = respond
+
+    doc = summarize.summarize_commands(_history(40), chunk_tokens=60, concurrency=3)
+
+    prompts = fake_openai.prompts()
+    sections = [p for p in prompts if "Merge the parts" not in p]
+    assert len(sections) > 3
+    # Every step went to exactly one window
+    assert sum(p.count("echo step-") for p in sections) == 40
+    assert 1 < fake_openai.max_in_flight <= 3
+    merge = prompts[-1]
+    assert "Merge the parts" in merge
+    firsts = [int(part.split("section from step ")[1].split("\n")[0])
+              for part in merge.split("--- Part ")[1:]]
+    assert firsts == sorted(firsts)
+    assert doc.endswith("merged")
+
+
+def test_no_chunk_budget_means_one_completion(fake_openai):
+    summarize.summarize_commands(_history(40), chunk_tokens=None)
+
+    assert len(fake_openai.requests) == 1
+
+
+def test_failed_completion_falls_back_to_step_list(fake_openai):
+    def respond(body):
+        raise RuntimeError("boom")
+    fake_openai.respond = respond
+
+    doc = summarize.summarize_commands(_history(2))
+
+    # The offline summarizer writes the documentation instead
+    assert "## Documentation" in doc
+    assert "**Step 2.** Print `step-2`." in doc
+
+
+def test_streamed_documentation_is_written_as_it_arrives(fake_openai, tmp_path):
+    fake_openai.respond = lambda body: "one two three four"
+    document = DocumentStream(tmp_path / "documentation.md", flush_chars=1)
+    seen = []
+
+    def on_chunk(piece):
+        # The earlier pieces reach the file while the stream is still open
+        if piece == "three":
+            deadline = time.monotonic() + 5
+            while "three" not in (tmp_path / "documentation.md").read_text() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            seen.append((tmp_path / "documentation.md").read_text())
+    fake_openai.on_chunk = on_chunk
+    progress = []
+
+    doc = summarize.summarize_commands(_history(2), document=document, on_progress=progress.append)
+
+    assert fake_openai.requests[0]['stream'] is True
+    assert "## Documentation" in seen[0] and "one two three" in seen[0]
+    assert "four" not in seen[0]
+    assert doc.endswith("one two three four")
+    assert (tmp_path / "documentation.md").read_text() == doc
+    assert progress and progress[0].startswith("Writing...")
+
+
+def test_fallback_replaces_partial_document(fake_openai, tmp_path):
+    def respond(body):
+        raise RuntimeError("boom")
+    fake_openai.respond = respond
+    document = DocumentStream(tmp_path / "documentation.md")
+
+    doc = summarize.summarize_commands(_history(2), document=document)
+
+    assert (tmp_path / "documentation.md").read_text() == doc
+    assert "**Step 1.** Print `step-1`." in doc
+
+
+def test_summarize_text_streams_tokens(fake_openai):
+    fake_openai.respond = lambda body: "1. Ran ls"
+    tokens = []
+
+    summary = summarize.summarize_text("$ ls", on_token=tokens.append)
+
+    assert summary == "1. Ran ls"
+    assert "".join(tokens).strip() == "1. Ran ls"
@@ -0,0 +1,167 @@
+"""
+Tests for the summarizer backends and the offline documentation engine.
+"""
+
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from src import summarize, summarizers
+from src.summarizers import (
+    OfflineSummarizer, Summarizer, create_summarizer, explain_line, register_summarizer,
+    split_commands, SUMMARIZERS
+)
+
+
+def _steps(*commands):
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    return [(command, start + timedelta(seconds=i), None) for i, command in enumerate(commands)]
+
+
+def test_chained_commands_are_split_on_operators():
+    commands, operators = split_commands('cd app && npm ci | tee "build log.txt"')
+
+    assert commands == [['cd', 'app'], ['npm', 'ci'], ['tee', 'build log.txt']]
+    assert operators == ['&&', '|']
+
+
+@pytest.mark.parametrize("line, family, summary", [
+    ("git status", 'git', "Show which files are modified, staged or untracked"),
+    ("git checkout -b feature/login", 'git', "Switch branches or restore files"),
+    ("pip3 install requests flask", 'python', "Install the Python package(s) `requests`, `flask`"),
+    ("python -m pip install -r requirements.txt", 'python', "Install Python packages"),
+    ("npm run build", 'node', "Run the package.json script `build`"),
+    ("docker-compose -f dev.yml up -d", 'docker', "Create and start the application's containers"),
+    ("cd C:\\Users\\dev\\src", 'files', "Change into the folder `C:\\Users\\dev\\src`"),
+    ("sudo apt-get install -y curl", 'system', "Install the system package(s) `curl`"),
+    ("DEBUG=1 make -j8 test", 'build', "Build the make target `test`"),
+    ("frobnicate --now", None, "Run `frobnicate --now`"),
+])
+def test_commands_are_recognized(line, family, summary):
+    assert explain_line(line)[:2] == (family, summary)
+
+
+def test_flags_are_explained_with_their_values():
+    family, summary, flags = explain_line('docker run --rm -it -p 8080:80 --name=web nginx')
+
+    assert summary == "Start a container from `nginx`"
+    assert ('-p 8080:80', "Publish a container port on the host (host:container)") in flags
+    assert ('--name=web', "Name the container") in flags
+    assert [flag for flag, _ in flags] == ['--rm', '-it', '-p 8080:80', '--name=web']
+
+
+def test_combined_short_flags_are_split():
+    _, summary, flags = explain_line("ls -la")
+
+    assert summary == "List the files in the current folder"
+    assert [flag for flag, _ in flags] == ['-l', '-a']
+
+
+def test_related_steps_are_grouped_in_order():
+    body = OfflineSummarizer().summarize(_steps(
+        "git clone https://example.com/app.git", "cd app", "git status",
+        "git add -A", 'git commit -m "Initial import"', "Command captured",
+    ), applications=["WindowsTerminal.exe"])
+
+    assert body.startswith("This session ran 6 commands in 2 areas: Version control and Files and folders.")
+    assert "Applications used: WindowsTerminal.exe." in body
+    assert "1 command could not be read" in body
+    sections = [line for line in body.splitlines() if line.startswith("### ")]
+    assert sections == [
+        "### Version control (Step 1)",
+        "### Files and folders (Step 2)",
+        "### Version control (Steps 3-6)",
+    ]
+    assert "**Step 5.** Record the staged changes as a new commit." in body
+    assert '- `-m "Initial import"`: Commit message' in body
+    assert "```shell\ngit add -A\n```" in body
+
+
+def test_offline_documentation_is_fast():
+    steps = _steps(*(["git status", "pip install -r requirements.txt", "npm run build",
+                      "docker ps -a", "ls -la | grep log"] * 200))
+    started = time.perf_counter()
+
+    OfflineSummarizer().summarize(steps)
+
+    assert time.perf_counter() - started < 1.0
+
+
+def test_offline_documents_have_the_llm_layout(tmp_path):
+    doc = summarize.summarize_commands(_steps("git status", "git push"), summarizer='offline')
+
+    assert doc.startswith("# Command Session Documentation\n\n")
+    assert "## Commands Executed\n\n1. `git status`\n2. `git push`\n" in doc
+    assert "\n---\n\n## Documentation\n\n" in doc
+    assert "**Step 2.** Upload local commits to the remote." in doc
+
+
+def test_registered_summarizers_can_be_selected(monkeypatch):
+    class Shouting(Summarizer):
+        name = 'shouting'
+
+        def summarize(self, steps, applications=(), on_token=None, on_progress=None):
+            return "\n".join(command.upper() for command, _, _ in steps)
+
+    monkeypatch.setitem(SUMMARIZERS, 'shouting', Shouting)
+
+    doc = summarize.summarize_commands(_steps("ls"), summarizer='shouting')
+
+    assert doc.endswith("## Documentation\n\nLS")
+    with pytest.raises(ValueError):
+        create_summarizer('missing')
+
+
+def test_auto_selection_falls_back_to_offline_without_api_key(monkeypatch):
+    monkeypatch.setattr(summarize, 'client', None)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    assert isinstance(create_summarizer(), OfflineSummarizer)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    assert isinstance(create_summarizer(), summarize.LlmSummarizer)
+
+
+def test_preferred_summarizer_is_tried_first(monkeypatch):
+    monkeypatch.setattr(summarizers, 'SUMMARIZERS', SUMMARIZERS.copy())
+
+    register_summarizer('custom', OfflineSummarizer, preferred=True)
+
+    assert next(iter(summarizers.SUMMARIZERS)) == 'custom'
+
+
+def _run_in_src(code):
+    """Run code in a fresh interpreter with only src/ importable, as main.py does."""
+    src_dir = Path(__file__).resolve().parent.parent / "src"
+    return subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {str(src_dir)!r}); {code}"],
+                          capture_output=True, text=True, cwd=str(src_dir))
+
+
+def test_summarize_imports_as_a_top_level_module():
+    result = _run_in_src("import summarize, sys; print('capture' in sys.modules)")
+
+    assert result.returncode == 0, result.stderr
+    # The offline summarizer must not pull in the OCR/capture stack
+    assert result.stdout.strip() == "False"
+
+
+def test_llm_summarizer_is_registered_on_demand():
+    # A fresh interpreter that imports only summarizers (not summarize.py)
+    code = ("import os; os.environ['OPENAI_API_KEY'] = 'test'; "
+            "from src.summarizers import create_summarizer; "
+            "print(type(create_summarizer('llm')).__name__)")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=str(Path(__file__).resolve().parent.parent))
+
+    assert result.stdout.strip() == "LlmSummarizer", result.stderr
+
+
+def test_unreadable_captures_match_the_ocr_fallback():
+    from src.ocr_pipeline import FALLBACK_COMMAND
+
+    body = OfflineSummarizer().summarize(_steps(FALLBACK_COMMAND))
+
+    assert "could not be read from the screenshot" in body
@@ -0,0 +1,111 @@
+"""
+Tests for cached screenshot previews.
+"""
+
+from datetime import datetime
+
+from PIL import Image
+
+from src.capture_backend import CAPTURE_BACKENDS
+from src.command_recorder import CommandRecorder
+from src.frame import Frame
+from src.session_manager import SessionManager
+from src.thumbnails import ThumbnailService
+
+from tests.test_capture_backend import FakeWindowBackend
+
+
+def _screenshot(path, size=(1280, 720)):
+    Image.new('RGB', size, color=(30, 60, 90)).save(path)
+    return str(path)
+
+
+def test_preview_is_made_once_and_cached(tmp_path):
+    service = ThumbnailService(tmp_path / "thumbnails")
+    screenshot = _screenshot(tmp_path / "command_1.png")
+
+    first = service.get(screenshot, 320)
+    second = service.get(screenshot, 320)
+
+    assert first == second
+    with Image.open(first) as img:
+        assert img.format == 'JPEG'
+        assert img.size == (320, 180)
+    assert service.get_stats()['generated'] == 1
+    assert service.get_stats()['cache_hits'] == 1
+
+
+def test_small_screenshots_are_not_upscaled(tmp_path):
+    service = ThumbnailService(tmp_path / "thumbnails")
+
+    preview = service.get(_screenshot(tmp_path / "small.png", (100, 50)), 320)
+
+    with Image.open(preview) as img:
+        assert img.size == (100, 50)
+
+
+def test_missing_screenshot_has_no_preview(tmp_path):
+    service = ThumbnailService(tmp_path / "thumbnails")
+
+    assert service.get(str(tmp_path / "missing.png")) is None
+    assert service.get_stats()['failed'] == 1
+
+
+def test_background_preview_from_frame(tmp_path):
+    ready = []
+    service = ThumbnailService(tmp_path / "thumbnails", default_width=8, on_ready=lambda *args: ready.append(args))
+    released = []
+    frame = Frame(b'\x10\x20\x30' * (16 * 4), 16, 4, 'RGB', on_release=released.append)
+
+    # The screenshot file itself has not been written yet
+    service.submit(str(tmp_path / "command_2.png"), frame=frame)
+    frame.release()
+    service.stop()
+
+    assert len(ready) == 1
+    with Image.open(ready[0][1]) as img:
+        assert img.size == (8, 2)
+    assert released == [frame]
+
+
+def test_recorder_makes_previews_in_session(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CAPTURE_BACKENDS, 'fake', FakeWindowBackend)
+    manager = SessionManager(base_dir=str(tmp_path / "sessions"))
+    session_dir = manager.create_session_folder()
+    recorder = CommandRecorder(session_manager=manager, capture_backend='fake')
+    recorder.background_thumbnails = True
+    recorder.start_recording()
+    try:
+        recorder.detected_terminal = 3
+        recorder._capture_command()
+    finally:
+        history = recorder.stop_recording()
+
+    assert manager.thumbnails.get_stats()['generated'] == 1
+    assert manager.thumbnails.thumbnail_path(history[0][2]).parent == session_dir / "thumbnails"
+    assert manager.thumbnails.thumbnail_path(history[0][2]).is_file()
+
+
+def test_documentation_embeds_linked_previews(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    from src import summarize
+
+    class OfflineClient:
+        class chat:
+            class completions:
+                @staticmethod
+                def create(**kwargs):
+                    raise ConnectionError("offline")
+
+    monkeypatch.setattr(summarize, 'client', OfflineClient)
+    (tmp_path / "screenshots").mkdir()
+    screenshot = _screenshot(tmp_path / "screenshots" / "command_1.png")
+
+    doc = summarize.summarize_commands(
+        [("git status", datetime(2025, 1, 1, 12, 0, 0), screenshot)],
+        session_base_path=str(tmp_path), thumbnail_width=240
+    )
+
+    assert "[![Screenshot 1](thumbnails/command_1_w240.jpg)](screenshots/command_1.png)" in doc
+    assert (tmp_path / "thumbnails" / "command_1_w240.jpg").is_file()